@@ -0,0 +1,102 @@
+"""Benchmark event-loop lag under heavy logging.
+
+Usage:
+    python scripts/benchmark_logging.py
+    python scripts/benchmark_logging.py --records 20000 --sink-delay-ms 0.2 --tasks 50
+
+Logs the same burst of records from concurrent tasks twice: once through a
+StreamHandler writing directly to a slow sink (a stand-in for a blocked pipe
+or a busy log collector) and once through the server's LogQueueHandler and
+QueueListener. Reports throughput and the event-loop lag seen meanwhile.
+"""
+import argparse
+import asyncio
+import io
+import logging
+import queue
+import statistics
+import sys
+import time
+from logging.handlers import QueueListener
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import JsonFormatter, LogQueueHandler, RequestContextFilter  # noqa: E402
+
+
+class SlowStream(io.StringIO):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return len(text)
+
+
+async def monitor_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+    return lags
+
+
+async def run(name: str, handler: logging.Handler, records: int, tasks: int) -> dict:
+    bench_logger = logging.getLogger(f"benchmark.{name}")
+    bench_logger.propagate = False
+    bench_logger.handlers = [handler]
+    bench_logger.setLevel(logging.INFO)
+
+    async def emit(count: int):
+        for i in range(count):
+            bench_logger.info("request", extra={"method": "GET", "path": "/api/projects", "status": 200, "i": i})
+            if i % 10 == 0:
+                await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(monitor_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(emit(records // tasks) for _ in range(tasks)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = sorted(await lag) or [0.0]
+    return {
+        "handler": name,
+        "records_per_s": round(records / elapsed),
+        "loop_lag_p50_ms": round(statistics.median(lags), 2),
+        "loop_lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1], 2),
+        "loop_lag_max_ms": round(lags[-1], 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare direct and queued logging under load")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--sink-delay-ms", type=float, default=0.1)
+    args = parser.parse_args()
+    delay = args.sink_delay_ms / 1000
+
+    direct = logging.StreamHandler(SlowStream(delay))
+    direct.setFormatter(JsonFormatter())
+    direct.addFilter(RequestContextFilter())
+    print(await run("direct", direct, args.records, args.tasks))
+
+    log_queue = queue.Queue(args.records * 2)
+    queued = LogQueueHandler(log_queue)
+    queued.addFilter(RequestContextFilter())
+    sink = logging.StreamHandler(SlowStream(delay))
+    sink.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, sink)
+    listener.start()
+    print(await run("queued", queued, args.records, args.tasks))
+    drain_started = time.perf_counter()
+    listener.stop()
+    print(f"listener drained the backlog in {time.perf_counter() - drain_started:.1f}s, dropped {queued.dropped}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
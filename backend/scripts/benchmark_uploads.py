@@ -0,0 +1,107 @@
+"""Benchmark the upload validation pool under concurrent uploads.
+
+Usage:
+    python scripts/benchmark_uploads.py
+    python scripts/benchmark_uploads.py --uploads 200 --concurrency 1 8 32 --pages 40
+
+Generates synthetic PDFs and PNGs, pushes them through inspect_document on
+document_validation_pool and reports throughput, latency percentiles and the
+worst event-loop lag observed while the uploads were in flight.
+"""
+import argparse
+import asyncio
+import statistics
+import struct
+import sys
+import time
+import zlib
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pypdf import PdfWriter  # noqa: E402
+
+from server import DOCUMENT_TYPES, document_validation_pool, inspect_document  # noqa: E402
+
+
+def make_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=595, height=842)
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def make_png(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x80\x80\x80" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+async def monitor_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(files: list, concurrency: int) -> dict:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def validate(content: bytes, content_type: str):
+        async with semaphore:
+            started = time.perf_counter()
+            await loop.run_in_executor(document_validation_pool, inspect_document, content, content_type, DOCUMENT_TYPES)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(monitor_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(validate(content, content_type) for content, content_type in files))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "uploads_per_s": round(len(files) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 1),
+        "max_loop_lag_ms": round(await lag * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent upload validation")
+    parser.add_argument("--uploads", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    pdf, png = make_pdf(args.pages), make_png(1200, 900)
+    files = [(pdf, "application/pdf") if i % 2 == 0 else (png, "image/png") for i in range(args.uploads)]
+    print(f"{args.uploads} uploads, PDF {len(pdf) // 1024}KB ({args.pages} pages), PNG {len(png) // 1024}KB")
+
+    # Warm the pool so process start-up is not counted
+    await run(files[:16], 16)
+    try:
+        for concurrency in args.concurrency:
+            print(await run(files, concurrency))
+    finally:
+        document_validation_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,473 @@
+"""Fill the database with a seeded, production-sized synthetic dataset.
+
+Usage:
+    python scripts/generate_dataset.py --drop
+    python scripts/generate_dataset.py --drop --users 100000 --projects 1000000 --seed 7
+    python scripts/generate_dataset.py --drop --users 2000 --projects 20000 --anchor 2025-06-30
+
+Writes linked users, projects, project_history, comments and notifications
+into DB_NAME, then builds the indexes and user counters the server expects.
+The same seed, volumes and anchor date always produce the same documents;
+each collection draws from its own random stream, so changing the comment
+volume does not reshuffle projects. Every generated account has the password
+"password". Refuses to touch a non-empty users collection unless --drop is
+given.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import (  # noqa: E402
+    NotificationType, ProjectCategory, ProjectStatus, UserRole,
+    client, db, ensure_indexes, gazetteer, get_password_hash, rebuild_user_counters, user_search_keys
+)
+
+COLLECTIONS = ["users", "projects", "project_history", "comments", "notifications", "user_counters"]
+MANIFEST_ID = "synthetic_dataset"
+PASSWORD = "password"
+
+# Region weights follow population; towns and coordinates come from the server's gazetteer
+REGION_WEIGHTS = {
+    "Dakar": 4.0, "Thiès": 2.2, "Diourbel": 2.0, "Kaolack": 1.2, "Saint-Louis": 1.1, "Louga": 1.0, "Fatick": 0.9,
+    "Kolda": 0.9, "Tambacounda": 0.9, "Kaffrine": 0.8, "Matam": 0.7, "Ziguinchor": 0.7, "Sédhiou": 0.6, "Kédougou": 0.2,
+}
+LOCALITIES = defaultdict(list)
+for _place in {place["name"]: place for place in gazetteer.places.values()}.values():
+    LOCALITIES[_place["region"]].append(_place)
+# Spread of project sites around their town, in degrees (about 5 km)
+SITE_SPREAD_DEGREES = 0.05
+
+FIRST_NAMES = ["Mamadou", "Moussa", "Ibrahima", "Cheikh", "Abdoulaye", "Ousmane", "Aliou", "Modou", "Babacar",
+               "Serigne", "Fatou", "Aminata", "Awa", "Mariama", "Khady", "Ndeye", "Aïssatou", "Coumba", "Astou", "Seynabou"]
+LAST_NAMES = ["Diop", "Ndiaye", "Fall", "Sow", "Sy", "Ba", "Diallo", "Gueye", "Faye", "Mbaye",
+              "Sarr", "Cissé", "Diouf", "Thiam", "Ndour", "Kane", "Seck", "Niang", "Camara", "Touré"]
+
+PROJECT_ACTIONS = ["Création", "Extension", "Modernisation", "Lancement", "Développement", "Réhabilitation"]
+PROJECT_SUBJECTS = {
+    ProjectCategory.AGRICULTURE: ["d'une ferme avicole", "d'un périmètre maraîcher", "d'une unité de transformation d'arachide"],
+    ProjectCategory.EDUCATION: ["d'une école communautaire", "d'un centre d'alphabétisation", "d'une bibliothèque de quartier"],
+    ProjectCategory.SANTE: ["d'une case de santé", "d'une pharmacie villageoise", "d'un centre de soins maternels"],
+    ProjectCategory.COMMERCE: ["d'une boutique de quartier", "d'un marché hebdomadaire", "d'un dépôt de céréales"],
+    ProjectCategory.TECHNOLOGIE: ["d'une plateforme de paiement mobile", "d'un espace numérique", "d'une application agricole"],
+    ProjectCategory.ENERGIE: ["d'une mini-centrale solaire", "d'un réseau de lampadaires solaires", "d'une unité de biogaz"],
+    ProjectCategory.TRANSPORT: ["d'une ligne de transport rural", "d'un service de livraison", "d'un atelier de réparation"],
+}
+DEFAULT_SUBJECTS = ["d'une coopérative", "d'une activité génératrice de revenus", "d'un atelier communautaire"]
+
+DESCRIPTION_WORDS = (
+    "le projet vise à renforcer les capacités des femmes et des jeunes de la commune grâce à une activité "
+    "durable qui crée des emplois locaux améliore les revenus des ménages et valorise les ressources du "
+    "territoire la coopérative assurera la formation des membres la gestion des stocks et la commercialisation "
+    "des produits sur les marchés régionaux un comité de suivi rendra compte chaque trimestre des résultats "
+    "obtenus et des difficultés rencontrées le financement couvre l'équipement le fonds de roulement et "
+    "l'accompagnement technique pendant la première année d'exploitation"
+).split()
+
+BUDGET_ITEMS = ["Équipement", "Matériel", "Formation", "Fonds de roulement", "Infrastructure",
+                "Transport", "Communication", "Main d'œuvre", "Intrants", "Suivi-évaluation"]
+
+COMMENT_TEXTS = [
+    "Merci de préciser le calendrier de mise en œuvre.",
+    "Pouvez-vous joindre les devis des fournisseurs ?",
+    "Le budget de formation semble sous-estimé.",
+    "Documents reçus, le dossier est en cours d'examen.",
+    "Nous avons mis à jour le plan de financement.",
+    "Le comité de suivi est constitué, la liste des membres est jointe.",
+]
+
+# Share of projects in each status, and the probability that a
+# notification older than a week has been read
+STATUS_WEIGHTS = {
+    ProjectStatus.DRAFT: 15, ProjectStatus.PENDING: 20, ProjectStatus.DOCUMENTS_REQUESTED: 8,
+    ProjectStatus.VALIDATED: 10, ProjectStatus.APPROVED: 30, ProjectStatus.REJECTED: 17,
+}
+READ_PROBABILITY = 0.85
+
+STATUS_NOTIFICATIONS = {
+    ProjectStatus.DOCUMENTS_REQUESTED: (NotificationType.DOCUMENTS_REQUESTED, "Documents demandés"),
+    ProjectStatus.VALIDATED: (NotificationType.PROJECT_VALIDATED, "Projet validé"),
+    ProjectStatus.APPROVED: (NotificationType.PROJECT_APPROVED, "Projet approuvé"),
+    ProjectStatus.REJECTED: (NotificationType.PROJECT_REJECTED, "Projet rejeté"),
+}
+
+
+@dataclass
+class DatasetConfig:
+    seed: int = 42
+    users: int = 100_000
+    projects: int = 1_000_000
+    officials: float = 0.02
+    admins: float = 0.002
+    comments_per_project: float = 1.5
+    history_days: int = 730
+    anchor: str = field(default_factory=lambda: datetime.now(timezone.utc).date().isoformat())
+    batch_size: int = 5000
+
+
+def stream(config: DatasetConfig, name: str) -> random.Random:
+    """Independent random stream per collection"""
+    return random.Random(f"{config.seed}:{name}")
+
+
+def make_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+class BatchWriter:
+    """Buffers documents per collection and keeps a few insert_many calls in flight"""
+
+    def __init__(self, batch_size: int, in_flight: int = 4):
+        self.batch_size = batch_size
+        self.buffers: Dict[str, list] = {}
+        self.pending: set = set()
+        self.slots = asyncio.Semaphore(in_flight)
+        self.counts: Dict[str, int] = {}
+
+    async def add(self, collection: str, doc: dict):
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            await self._flush(collection)
+
+    async def _flush(self, collection: str):
+        docs = self.buffers.pop(collection, [])
+        if not docs:
+            return
+        self.counts[collection] = self.counts.get(collection, 0) + len(docs)
+        await self.slots.acquire()
+        task = asyncio.create_task(db[collection].insert_many(docs, ordered=False, bypass_document_validation=True))
+        task.add_done_callback(lambda _: self.slots.release())
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def close(self):
+        for collection in list(self.buffers):
+            await self._flush(collection)
+        await asyncio.gather(*self.pending)
+
+
+def description(rng: random.Random) -> str:
+    # Log-normal lengths: most descriptions are a paragraph, a few run to several pages
+    target = min(int(rng.lognormvariate(6.4, 0.7)), 8000)
+    words = []
+    length = 0
+    while length < target:
+        word = rng.choice(DESCRIPTION_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).capitalize() + "."
+
+
+def budget(rng: random.Random, total: float) -> Dict[str, float]:
+    items = rng.sample(BUDGET_ITEMS, rng.randint(2, 6))
+    weights = [rng.random() + 0.2 for _ in items]
+    scale = total / sum(weights)
+    breakdown = {item: round(weight * scale, -3) for item, weight in zip(items, weights)}
+    breakdown[items[0]] += total - sum(breakdown.values())
+    return breakdown
+
+
+def documents(rng: random.Random, uploaded_at: datetime) -> List[dict]:
+    docs = []
+    for i in range(rng.choices([0, 1, 2, 3, 4], [30, 30, 20, 12, 8])[0]):
+        is_pdf = rng.random() < 0.7
+        name = f"piece_{i + 1}.pdf" if is_pdf else f"photo_{i + 1}.jpg"
+        digest = hashlib.sha256(f"{rng.getrandbits(64)}".encode()).hexdigest()
+        docs.append({
+            "id": make_id(rng),
+            "name": name,
+            "file_url": f"https://storage.example.sn/documents/{digest[:16]}/{name}",
+            "file_type": "application/pdf" if is_pdf else "image/jpeg",
+            "file_size": int(min(rng.lognormvariate(12.5, 1.0), 10 * 1024 * 1024)),
+            "sha256": digest,
+            "page_count": rng.randint(1, 40) if is_pdf else None,
+            "width": None if is_pdf else rng.choice([1280, 1600, 3024]),
+            "height": None if is_pdf else rng.choice([960, 1200, 4032]),
+            "uploaded_at": iso(uploaded_at),
+        })
+    return docs
+
+
+def generate_users(config: DatasetConfig, anchor: datetime, password_hash: str) -> List[dict]:
+    rng = stream(config, "users")
+    regions = [region for region in REGION_WEIGHTS if LOCALITIES[region]]
+    region_weights = [REGION_WEIGHTS[r] for r in regions]
+    admins = max(1, int(config.users * config.admins))
+    officials = max(1, int(config.users * config.officials))
+    users = []
+    for i in range(config.users):
+        role = UserRole.ADMIN if i < admins else UserRole.OFFICIAL if i < admins + officials else UserRole.CITIZEN
+        region = rng.choices(regions, region_weights)[0]
+        created_at = anchor - timedelta(days=config.history_days * rng.random() ** 0.7)
+        user = {
+            "id": make_id(rng),
+            "email": f"{role.value}{i}@synthetic.example.sn",
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "phone": f"+2217{rng.choice('05678')}{rng.randrange(10 ** 7):07d}",
+            "address": None,
+            "city": rng.choice(LOCALITIES[region])["name"],
+            "region": region,
+            "role": role.value,
+            "is_verified": rng.random() < 0.9,
+            "is_active": rng.random() < 0.98,
+            "identity_document": None,
+            "filiation": None,
+            "profile_picture": None,
+            "email_mode": None,
+            "created_at": iso(created_at),
+            "updated_at": iso(created_at),
+            "password_hash": password_hash,
+        }
+        user["search_keys"] = user_search_keys(user)
+        users.append(user)
+    return users
+
+
+def project_timeline(rng: random.Random, status: ProjectStatus, created_at: datetime, anchor: datetime) -> Dict[str, datetime]:
+    """Transition dates consistent with the project's status, never after the anchor"""
+    def after(moment: datetime, mean_days: float) -> datetime:
+        return min(moment + timedelta(days=rng.expovariate(1 / mean_days)), anchor)
+
+    timeline = {"created_at": created_at}
+    if status == ProjectStatus.DRAFT:
+        return timeline
+    timeline["submitted_at"] = after(created_at, 5)
+    if status == ProjectStatus.DOCUMENTS_REQUESTED:
+        timeline["documents_requested_at"] = after(timeline["submitted_at"], 10)
+    elif status in (ProjectStatus.VALIDATED, ProjectStatus.APPROVED):
+        timeline["validated_at"] = after(timeline["submitted_at"], 15)
+        if status == ProjectStatus.APPROVED:
+            timeline["approved_at"] = after(timeline["validated_at"], 20)
+    elif status == ProjectStatus.REJECTED:
+        timeline["rejected_at"] = after(timeline["submitted_at"], 20)
+    return timeline
+
+
+async def generate_projects(config: DatasetConfig, anchor: datetime, users: List[dict], writer: BatchWriter):
+    rng = stream(config, "projects")
+    history_rng = stream(config, "project_history")
+    comment_rng = stream(config, "comments")
+    notification_rng = stream(config, "notifications")
+
+    citizens = [u for u in users if u["role"] == UserRole.CITIZEN.value] or users
+    officials = [u for u in users if u["role"] == UserRole.OFFICIAL.value] or users
+    # A few very active owners (cooperatives, associations), a long tail with one or two projects
+    owner_weights = [min(rng.paretovariate(1.5), 100) for _ in citizens]
+    owners = rng.choices(citizens, owner_weights, k=config.projects)
+    statuses, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    categories = list(ProjectCategory)
+    category_weights = [6 if c in PROJECT_SUBJECTS else 1 for c in categories]
+
+    for index, owner in enumerate(owners):
+        status = rng.choices(statuses, status_weights)[0]
+        category = rng.choices(categories, category_weights)[0]
+        town = rng.choice(LOCALITIES[owner["region"]])
+        owner_since = datetime.fromisoformat(owner["created_at"])
+        created_at = owner_since + (anchor - owner_since) * rng.random()
+        timeline = project_timeline(rng, status, created_at, anchor)
+        funding = round(rng.lognormvariate(15.5, 1.0), -4) + 100_000
+        official = rng.choice(officials) if status not in (ProjectStatus.DRAFT, ProjectStatus.PENDING) else None
+        project = {
+            "id": make_id(rng),
+            "user_id": owner["id"],
+            "title": f"{rng.choice(PROJECT_ACTIONS)} {rng.choice(PROJECT_SUBJECTS.get(category, DEFAULT_SUBJECTS))} à {town['name']}",
+            "description": description(rng),
+            "category": category.value,
+            "funding_requested": funding,
+            "start_date": (created_at + timedelta(days=rng.randint(30, 180))).date().isoformat(),
+            "duration_months": rng.choice([6, 12, 18, 24, 36]),
+            "objectives": [f"Objectif {i + 1}: {' '.join(rng.sample(DESCRIPTION_WORDS, 6))}" for i in range(rng.randint(1, 5))],
+            "budget_breakdown": budget(rng, funding),
+            "location": town["name"],
+            "geo": {"type": "Point", "coordinates": [
+                round(town["longitude"] + rng.gauss(0, SITE_SPREAD_DEGREES), 5),
+                round(town["latitude"] + rng.gauss(0, SITE_SPREAD_DEGREES), 5),
+            ]},
+            "region": owner["region"],
+            "status": status.value,
+            "documents": documents(rng, timeline.get("submitted_at", created_at)),
+            "rejection_reason": "Dossier incomplet" if status == ProjectStatus.REJECTED else None,
+            "documents_request_reason": "Pièces justificatives manquantes" if status == ProjectStatus.DOCUMENTS_REQUESTED else None,
+            "assigned_official_id": official["id"] if official else None,
+            "created_at": iso(created_at),
+            "updated_at": iso(max(timeline.values())),
+            "submitted_at": None, "validated_at": None, "approved_at": None, "rejected_at": None,
+            "duplicate_score": None,
+            "duplicate_candidates": [],
+            "anomaly_score": round(rng.betavariate(2, 8), 3) if status != ProjectStatus.DRAFT else None,
+            "budget_analysis": None,
+        }
+        for moment_field in ("submitted_at", "validated_at", "approved_at", "rejected_at"):
+            if moment_field in timeline:
+                project[moment_field] = iso(timeline[moment_field])
+        await writer.add("projects", project)
+        await write_project_activity(project, timeline, owner, official, history_rng, comment_rng, notification_rng, config, anchor, writer)
+
+        if index % 50_000 == 0 and index:
+            print(f"  {index:,} projects generated")
+
+
+async def write_project_activity(project: dict, timeline: Dict[str, datetime], owner: dict, official: Optional[dict],
+                                 history_rng: random.Random, comment_rng: random.Random, notification_rng: random.Random,
+                                 config: DatasetConfig, anchor: datetime, writer: BatchWriter):
+    """History entries, comments and owner notifications for one project"""
+    owner_name = f"{owner['first_name']} {owner['last_name']}"
+    official_name = f"{official['first_name']} {official['last_name']}" if official else None
+    events = [("Projet créé", owner, owner_name, None, ProjectStatus.DRAFT, timeline["created_at"])]
+    if "submitted_at" in timeline:
+        events.append(("Projet soumis", owner, owner_name, ProjectStatus.DRAFT, ProjectStatus.PENDING, timeline["submitted_at"]))
+    for status, moment_field in [(ProjectStatus.DOCUMENTS_REQUESTED, "documents_requested_at"), (ProjectStatus.VALIDATED, "validated_at"),
+                                 (ProjectStatus.APPROVED, "approved_at"), (ProjectStatus.REJECTED, "rejected_at")]:
+        if moment_field in timeline:
+            events.append((f"Statut changé: {status.value}", official, official_name, events[-1][4], status, timeline[moment_field]))
+
+    for action, actor, actor_name, old_status, new_status, moment in events:
+        await writer.add("project_history", {
+            "id": make_id(history_rng),
+            "project_id": project["id"],
+            "user_id": actor["id"],
+            "user_name": actor_name,
+            "action": action,
+            "details": None,
+            "old_status": old_status.value if old_status else None,
+            "new_status": new_status.value,
+            "created_at": iso(moment),
+        })
+        if new_status in STATUS_NOTIFICATIONS:
+            notification_type, title = STATUS_NOTIFICATIONS[new_status]
+            await write_notification(owner["id"], notification_type, title, f"Votre projet '{project['title']}': {action}",
+                                     project["id"], moment, notification_rng, anchor, writer)
+
+    if "submitted_at" not in timeline:
+        return
+    commenters = [(owner, owner_name)] + ([(official, official_name)] if official else [])
+    for _ in range(min(int(comment_rng.expovariate(1 / config.comments_per_project)), 30) if config.comments_per_project > 0 else 0):
+        author, author_name = comment_rng.choice(commenters)
+        moment = min(timeline["submitted_at"] + timedelta(days=comment_rng.expovariate(1 / 10)), anchor)
+        comment_id = make_id(comment_rng)
+        await writer.add("comments", {
+            "id": comment_id,
+            "project_id": project["id"],
+            "user_id": author["id"],
+            "user_name": author_name,
+            "user_role": author["role"],
+            "content": comment_rng.choice(COMMENT_TEXTS),
+            "created_at": iso(moment),
+        })
+        if author["id"] != owner["id"]:
+            await write_notification(owner["id"], NotificationType.NEW_COMMENT, "Nouveau commentaire",
+                                     f"Un nouveau commentaire a été ajouté à votre projet '{project['title']}'",
+                                     project["id"], moment, notification_rng, anchor, writer, {"comment_id": comment_id})
+
+
+async def write_notification(user_id: str, notification_type: NotificationType, title: str, message: str, project_id: str,
+                             moment: datetime, rng: random.Random, anchor: datetime, writer: BatchWriter, extra: Optional[dict] = None):
+    is_read = anchor - moment > timedelta(days=7) and rng.random() < READ_PROBABILITY
+    read_at = min(moment + timedelta(days=rng.expovariate(1 / 2)), anchor) if is_read else None
+    await writer.add("notifications", {
+        "id": make_id(rng),
+        "user_id": user_id,
+        "type": notification_type.value,
+        "title": title,
+        "message": message,
+        "data": {"project_id": project_id, **(extra or {})},
+        "is_read": is_read,
+        "count": 1,
+        "created_at": iso(moment),
+        "updated_at": iso(read_at or moment),
+        # BSON date like the server writes it, for the read TTL index
+        **({"read_at": read_at} if read_at else {}),
+    })
+
+
+async def generate_dataset(config: DatasetConfig, drop: bool = False) -> dict:
+    """Write the dataset described by config into db and return its manifest"""
+    if drop:
+        for name in COLLECTIONS:
+            await db[name].drop()
+    elif await db.users.estimated_document_count():
+        raise RuntimeError(f"{db.name}.users is not empty, pass --drop to replace it")
+
+    started = time.perf_counter()
+    anchor = datetime.fromisoformat(config.anchor).replace(tzinfo=timezone.utc)
+    password_hash = get_password_hash(PASSWORD)
+    writer = BatchWriter(config.batch_size)
+
+    users = generate_users(config, anchor, password_hash)
+    for user in users:
+        await writer.add("users", user)
+    await generate_projects(config, anchor, users, writer)
+    await writer.close()
+    load_seconds = time.perf_counter() - started
+
+    await ensure_indexes()
+    await rebuild_user_counters()
+    manifest = {
+        "config": asdict(config),
+        "counts": writer.counts,
+        "load_seconds": round(load_seconds, 1),
+        "total_seconds": round(time.perf_counter() - started, 1),
+        "generated_at": datetime.now(timezone.utc),
+    }
+    await db.dataset_manifest.replace_one({"_id": MANIFEST_ID}, manifest, upsert=True)
+    return manifest
+
+
+async def current_manifest() -> Optional[dict]:
+    return await db.dataset_manifest.find_one({"_id": MANIFEST_ID})
+
+
+async def main():
+    defaults = DatasetConfig()
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic dataset")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--projects", type=int, default=defaults.projects)
+    parser.add_argument("--officials", type=float, default=defaults.officials, help="Share of users who are officials")
+    parser.add_argument("--comments-per-project", type=float, default=defaults.comments_per_project)
+    parser.add_argument("--history-days", type=int, default=defaults.history_days)
+    parser.add_argument("--anchor", default=defaults.anchor, help="Date the generated history ends (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--drop", action="store_true", help="Drop the generated collections first")
+    args = parser.parse_args()
+
+    config = DatasetConfig(
+        seed=args.seed, users=args.users, projects=args.projects, officials=args.officials,
+        comments_per_project=args.comments_per_project, history_days=args.history_days,
+        anchor=args.anchor, batch_size=args.batch_size
+    )
+    print(f"Generating {config.users:,} users and {config.projects:,} projects into {db.name} (seed {config.seed})")
+    try:
+        manifest = await generate_dataset(config, drop=args.drop)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    finally:
+        client.close()
+
+    for name, count in sorted(manifest["counts"].items()):
+        print(f"  {name:16} {count:>10,}")
+    docs = sum(manifest["counts"].values())
+    print(f"Loaded {docs:,} documents in {manifest['load_seconds']}s ({docs / max(manifest['load_seconds'], 0.001):,.0f}/s), "
+          f"indexes and counters ready after {manifest['total_seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
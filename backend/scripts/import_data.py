@@ -0,0 +1,38 @@
+"""Bulk import users or projects from a CSV or NDJSON file.
+
+Usage:
+    python scripts/import_data.py users users.csv
+    python scripts/import_data.py projects projects.ndjson --format ndjson
+
+Project rows reference their owner with a user_email or user_id column.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import ImportKind, client, import_records  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Import users or projects in bulk")
+    parser.add_argument("kind", choices=[k.value for k in ImportKind])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    try:
+        with open(args.path, "rb") as f:
+            report = await import_records(ImportKind(args.kind), f, fmt)
+    finally:
+        client.close()
+
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,28 @@
+#!/usr/bin/env bash
+# Start a three-member replica set on this machine for testing read routing.
+#
+#   ./scripts/local_replica_set.sh /tmp/rs
+#   MONGO_URL="mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0" uvicorn server:app
+#
+# GET /api/admin/diagnostics/read-routing then shows which member served
+# each route's commands.
+set -euo pipefail
+
+DATA_DIR="${1:-/tmp/mongo-rs}"
+PORTS=(27017 27018 27019)
+
+for port in "${PORTS[@]}"; do
+    mkdir -p "$DATA_DIR/$port"
+    mongod --replSet rs0 --port "$port" --bind_ip localhost \
+        --dbpath "$DATA_DIR/$port" --logpath "$DATA_DIR/$port.log" --fork
+done
+
+mongosh --port "${PORTS[0]}" --quiet --eval '
+rs.initiate({
+  _id: "rs0",
+  members: [
+    { _id: 0, host: "localhost:27017", priority: 2 },
+    { _id: 1, host: "localhost:27018" },
+    { _id: 2, host: "localhost:27019" }
+  ]
+})'
@@ -0,0 +1,75 @@
+"""Local webhook receiver for testing deliveries end to end.
+
+Usage:
+    python scripts/webhook_receiver.py --secret <subscription secret>
+    python scripts/webhook_receiver.py --secret <secret> --port 9000 --fail-rate 0.3 --delay 0.5
+
+Register http://localhost:<port>/ with POST /api/admin/webhooks, then trigger
+project transitions or POST /api/admin/webhooks/{id}/ping. Each batch is
+checked against its X-Webhook-Signature and printed; --fail-rate answers a
+share of requests with 500 to exercise retries and dead-lettering.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_CLOCK_SKEW_SECONDS = 300
+
+
+def make_handler(secret: str, fail_rate: float, delay: float):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            timestamp = self.headers.get("X-Webhook-Timestamp", "")
+            expected = "sha256=" + hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, self.headers.get("X-Webhook-Signature", "")):
+                print("REJECTED: bad signature")
+                return self._reply(401)
+            if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > MAX_CLOCK_SKEW_SECONDS:
+                print("REJECTED: stale timestamp")
+                return self._reply(401)
+
+            time.sleep(delay)
+            if random.random() < fail_rate:
+                print(f"FAILING batch {self.headers.get('X-Webhook-Id')} on purpose")
+                return self._reply(500)
+
+            events = json.loads(body)["events"]
+            print(f"batch {self.headers.get('X-Webhook-Id')}: {len(events)} events")
+            for event in events:
+                project = event["data"].get("project", {})
+                print(f"  {event['occurred_at']} {event['type']} {project.get('id', '')} {project.get('title', '')}")
+            self._reply(204)
+
+        def _reply(self, status: int):
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return WebhookHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive and verify webhook deliveries locally")
+    parser.add_argument("--secret", required=True)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.secret, args.fail_rate, args.delay))
+    print(f"Listening on http://127.0.0.1:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
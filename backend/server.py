@@ -1,30 +1,272 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, BackgroundTasks, Response, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne, ReplaceOne, DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, SecondaryPreferred
 import os
+import sys
 import logging
+import atexit
+import copy
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, ValidationError, AnyHttpUrl
+from typing import List, Optional, Dict, Any, Tuple, Literal, Annotated
 import uuid
 from datetime import datetime, timezone, timedelta
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import secrets
+import hmac
 from enum import Enum
 import httpx
-from io import BytesIO
+from io import BytesIO, StringIO, TextIOWrapper
 import base64
+import asyncio
+import csv
+import gzip
+import json
+import time
+import random
+import socket
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from starlette.concurrency import run_in_threadpool
+import hashlib
+import struct
+import re
+import unicodedata
+import zlib
+import threading
+import cProfile
+import marshal
+import pstats
+from collections import defaultdict, deque
+from contextvars import ContextVar
+import numpy as np
+import pandas as pd
+from pypdf import PdfReader
+from pypdf.errors import PdfReadError
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Per-request context. Motor copies contextvars into its executor threads,
+# so pymongo listeners see the context of the request that issued a command.
+request_context: ContextVar[Optional[dict]] = ContextVar("request_context", default=None)
+
+def current_route() -> str:
+    context = request_context.get()
+    if context is None:
+        return "background"
+    endpoint = context["scope"].get("endpoint")
+    return endpoint.__name__ if endpoint else context["scope"].get("path", "unknown")
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """Counts commands per route and per server that executed them"""
+
+    # Commands whose shape is tracked by the slow-query log
+    QUERY_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = defaultdict(lambda: {"count": 0, "failures": 0, "total_ms": 0.0})
+        self.pending: Dict[tuple, tuple] = {}
+        self.slow_queries: Dict[str, dict] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.flush_task: Optional[asyncio.Task] = None
+
+    def _record(self, event, failed: bool):
+        context = request_context.get()
+        route = current_route()
+        key = (route, f"{event.connection_id[0]}:{event.connection_id[1]}")
+        duration_ms = event.duration_micros / 1000
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        if started and duration_ms >= SLOW_QUERY_THRESHOLD_MS:
+            self._record_slow_query(started, route, duration_ms)
+        with self.lock:
+            stats = self.commands[key]
+            stats["count"] += 1
+            stats["failures"] += int(failed)
+            stats["total_ms"] += duration_ms
+            if context is not None:
+                # Time this request spent waiting on MongoDB
+                context["mongo_commands"] = context.get("mongo_commands", 0) + 1
+                context["mongo_ms"] = context.get("mongo_ms", 0.0) + duration_ms
+
+    def started(self, event):
+        if event.command_name in self.QUERY_COMMANDS:
+            self.pending[(event.connection_id, event.request_id)] = (
+                event.database_name, event.command_name, event.command
+            )
+
+    def _record_slow_query(self, started: tuple, route: str, duration_ms: float):
+        database, command_name, command = started
+        collection = command.get(command_name)
+        shape = query_shape(command_name, command)
+        shape_key = hashlib.sha1(
+            json.dumps([database, collection, command_name, shape], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self.lock:
+            entry = self.slow_queries.get(shape_key)
+            is_new = entry is None
+            if is_new:
+                entry = self.slow_queries[shape_key] = {
+                    "database": database, "collection": collection, "command": command_name, "shape": shape,
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0, "routes": set()
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_seen"] = datetime.now(timezone.utc)
+            if len(entry["routes"]) < 10:
+                entry["routes"].add(route)
+        if is_new and SLOW_QUERY_EXPLAIN and self.loop and command_name in EXPLAINABLE_COMMANDS:
+            # Explain with the real values, off the request path; only the plan summary is kept
+            self.loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(capture_explain(shape_key, database, command_name, command))
+            )
+
+    def drain_slow_queries(self) -> Dict[str, dict]:
+        with self.lock:
+            drained, self.slow_queries = self.slow_queries, {}
+        return drained
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            items = list(self.commands.items())
+        routes = defaultdict(dict)
+        for (route, server), stats in items:
+            routes[route][server] = {**stats, "total_ms": round(stats["total_ms"], 1)}
+        return routes
+
+def redact(value):
+    """Replace literal values with their type, keeping operators and field names"""
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(value[0])] if value else []
+    return "?" if not isinstance(value, (bool, type(None))) else value
+
+def query_shape(command_name: str, command) -> dict:
+    """Redacted filter, sort and pipeline of a query command"""
+    if command_name == "find":
+        return {"filter": redact(command.get("filter", {})), "sort": dict(command.get("sort") or {})}
+    if command_name == "aggregate":
+        return {"pipeline": [redact(stage) for stage in command.get("pipeline", [])]}
+    if command_name in ("count", "findAndModify"):
+        return {"filter": redact(command.get("query", {}))}
+    if command_name == "distinct":
+        return {"key": command.get("key"), "filter": redact(command.get("query", {}))}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return {"filter": redact(statements[0].get("q", {}))}
+    return {}
+
+class ConnectionPoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks open, checked-out and waiting connections per server"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools = defaultdict(lambda: {"open": 0, "checked_out": 0, "waiting": 0, "checkout_failures": 0, "cleared": 0})
+
+    def _update(self, event, **deltas):
+        with self.lock:
+            pool = self.pools[f"{event.address[0]}:{event.address[1]}"]
+            for field, delta in deltas.items():
+                pool[field] += delta
+
+    def pool_created(self, event):
+        self._update(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event, cleared=1)
+
+    def pool_closed(self, event):
+        with self.lock:
+            self.pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._update(event, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event, waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._update(event, checked_out=-1)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self.lock:
+            return {address: dict(pool) for address, pool in self.pools.items()}
+
+mongo_monitor = MongoCommandMonitor()
+pool_monitor = ConnectionPoolMonitor()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'senegal_projects')]
+DB_NAME = os.environ.get('DB_NAME', 'senegal_projects')
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_monitor, pool_monitor])
+db = client[DB_NAME]
+
+# Read routing: reporting endpoints may read from secondaries, everything
+# else stays on the primary for read-after-write consistency.
+# READ_PREFERENCE_OVERRIDES="admin_get_users=primary,admin_get_stats=secondaryPreferred"
+READ_MAX_STALENESS_SECONDS = max(int(os.environ.get('READ_MAX_STALENESS_SECONDS', '120')), 90)
+READ_ROUTES = {
+    "admin_get_stats": "secondaryPreferred",
+    "admin_export_projects": "secondaryPreferred",
+    "admin_get_users": "secondaryPreferred",
+    "admin_funding_analytics": "secondaryPreferred"
+}
+_read_dbs = {
+    "primary": client.get_database(DB_NAME, read_preference=Primary()),
+    "secondaryPreferred": client.get_database(
+        DB_NAME, read_preference=SecondaryPreferred(max_staleness=READ_MAX_STALENESS_SECONDS)
+    )
+}
+
+def parse_read_preference_overrides(value: str) -> Dict[str, str]:
+    """route=mode entries of READ_PREFERENCE_OVERRIDES; malformed entries and unknown modes are logged and skipped"""
+    overrides = {}
+    for entry in filter(None, (item.strip() for item in value.split(','))):
+        route, sep, mode = (part.strip() for part in entry.partition('='))
+        if not sep or not route:
+            logger.warning(f"READ_PREFERENCE_OVERRIDES entry {entry!r} ignored, expected route=mode")
+        elif mode not in _read_dbs:
+            logger.warning(f"READ_PREFERENCE_OVERRIDES mode {mode!r} for {route} ignored, expected one of {', '.join(_read_dbs)}")
+        else:
+            overrides[route] = mode
+    return overrides
+
+def read_db(route: str):
+    """Database handle with the read preference configured for a route"""
+    return _read_dbs.get(READ_ROUTES.get(route, "primary"), db)
 
 # Supabase configuration
 SUPABASE_URL = os.environ.get('SUPABASE_URL', '')
@@ -35,8 +277,128 @@ SECRET_KEY = os.environ.get('SECRET_KEY', secrets.token_hex(32))
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
-# Password hashing
+# Notification retention
+NOTIFICATION_READ_TTL_DAYS = int(os.environ.get('NOTIFICATION_READ_TTL_DAYS', '30'))
+NOTIFICATION_MAX_PER_USER = int(os.environ.get('NOTIFICATION_MAX_PER_USER', '200'))
+NOTIFICATION_COALESCE_MINUTES = int(os.environ.get('NOTIFICATION_COALESCE_MINUTES', '60'))
+# Only notifications archived by the per-user cap expire; those archived with
+# their project are kept for as long as the project can be restored
+NOTIFICATION_ARCHIVE_TTL_DAYS = int(os.environ.get('NOTIFICATION_ARCHIVE_TTL_DAYS', '365'))
+# Email digests for users who opted in (email_mode "digest"): 0 sends every
+# notification email immediately
+NOTIFICATION_DIGEST_MINUTES = int(os.environ.get('NOTIFICATION_DIGEST_MINUTES', '60'))
+NOTIFICATION_DIGEST_MAX_ITEMS = 20
+ARCHIVE_BATCH_SIZE = 500
+
+# Project archival
+PROJECT_ARCHIVE_AFTER_MONTHS = int(os.environ.get('PROJECT_ARCHIVE_AFTER_MONTHS', '12'))
+PROJECT_ARCHIVE_BATCH_SIZE = 100
+
+# Batch reads
+PROJECT_BATCH_MAX_IDS = 100
+
+# Delta sync
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', '500'))
+SYNC_CLOCK_SKEW_SECONDS = 5
+SYNC_TOMBSTONE_TTL_DAYS = int(os.environ.get('SYNC_TOMBSTONE_TTL_DAYS', '30'))
+
+# Bulk import
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '1000'))
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Funding analytics
+UNKNOWN_REGION = "Non renseignée"
+
+# Geocoding and spatial filters
+GAZETTEER_PATH = Path(os.environ.get('GAZETTEER_PATH', ROOT_DIR / 'data' / 'senegal_localities.csv'))
+GEO_DEFAULT_RADIUS_KM = 50
+GEO_MAX_RADIUS_KM = 1000
+GEO_INDEX = "geo_status_category"
+EARTH_RADIUS_KM = 6378.1
+
+# Near-duplicate detection
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', '0.6'))
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 32
+DUPLICATE_MAX_CANDIDATES = 500
+
+# Background jobs
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+JOB_RUN_HISTORY_DAYS = int(os.environ.get('JOB_RUN_HISTORY_DAYS', '14'))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+# Idempotency keys
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24'))
+IDEMPOTENCY_WAIT_SECONDS = 30
+# An in-progress claim older than this is taken to belong to a crashed worker
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', '120'))
+IDEMPOTENCY_MAX_BODY_BYTES = 1024 * 1024
+
+# Slow-query log
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+SLOW_QUERY_FLUSH_SECONDS = 60
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+
+# Request profiling
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_RETENTION_HOURS = int(os.environ.get('PROFILE_RETENTION_HOURS', '72'))
+PROFILE_MAX_STORED = int(os.environ.get('PROFILE_MAX_STORED', '200'))
+
+# Password hashing: the work factor is calibrated by the first worker to
+# start to take about PASSWORD_HASH_TARGET_MS per hash and shared with the
+# others through app_settings, unless PASSWORD_HASH_COST fixes it
+PASSWORD_SCHEME = os.environ.get('PASSWORD_SCHEME', 'bcrypt')  # bcrypt or argon2
+PASSWORD_HASH_TARGET_MS = float(os.environ.get('PASSWORD_HASH_TARGET_MS', '250'))
+PASSWORD_HASH_COST = int(os.environ.get('PASSWORD_HASH_COST', '0'))
+PASSWORD_COST_RANGES = {"bcrypt": (10, 15), "argon2": (1, 10)}
+ARGON2_MEMORY_KIB = int(os.environ.get('ARGON2_MEMORY_KIB', '65536'))
+PASSWORD_SETTINGS_ID = "password_hashing"
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hash_report: Dict[str, Any] = {}
+
+# bcrypt releases the GIL, so a thread pool hashes passwords in parallel
+PASSWORD_HASH_WORKERS = os.cpu_count() or 4
+password_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
+# Health checks
+HEALTH_CACHE_SECONDS = 1.0
+HEALTH_MONGO_TIMEOUT_SECONDS = float(os.environ.get('HEALTH_MONGO_TIMEOUT_SECONDS', '2'))
+HEALTH_STORAGE_TIMEOUT_SECONDS = 2.0
+HEALTH_MAX_LOOP_LAG_MS = float(os.environ.get('HEALTH_MAX_LOOP_LAG_MS', '500'))
+HEALTH_LOOP_LAG_INTERVAL_SECONDS = 0.5
+# max_lag_ms covers the samples of the last minute
+HEALTH_LOOP_LAG_WINDOW_SECONDS = 60
+
+# Webhooks
+WEBHOOKS_ENABLED = os.environ.get('WEBHOOKS_ENABLED', 'true').lower() == 'true'
+WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get('WEBHOOK_TIMEOUT_SECONDS', '10'))
+WEBHOOK_MAX_CONNECTIONS = int(os.environ.get('WEBHOOK_MAX_CONNECTIONS', '50'))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '8'))
+WEBHOOK_BACKOFF_BASE_SECONDS = 30
+WEBHOOK_BACKOFF_MAX_SECONDS = 6 * 3600
+WEBHOOK_POLL_SECONDS = 2
+WEBHOOK_LEASE_SECONDS = 60
+WEBHOOK_SCAN_LIMIT = 1000
+WEBHOOK_DELIVERED_TTL_DAYS = int(os.environ.get('WEBHOOK_DELIVERED_TTL_DAYS', '7'))
+
+# Public showcase
+PUBLIC_CACHE_MAX_AGE = int(os.environ.get('PUBLIC_CACHE_MAX_AGE', '600'))
+PUBLIC_SNAPSHOT_CHECK_SECONDS = 30
+
+# Upload validation
+UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+DOCUMENT_MAX_PAGES = int(os.environ.get('DOCUMENT_MAX_PAGES', '50'))
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', str(40_000_000)))
+IMAGE_MIN_DIMENSION = 32
+IMAGE_TYPES = ["image/jpeg", "image/png", "image/webp"]
+DOCUMENT_TYPES = ["application/pdf"] + IMAGE_TYPES
+DOCUMENT_VALIDATION_TIMEOUT_SECONDS = float(os.environ.get('DOCUMENT_VALIDATION_TIMEOUT_SECONDS', '10'))
+# Parsing runs in separate processes so a hostile PDF cannot stall the event loop
+document_validation_pool = ProcessPoolExecutor(
+    max_workers=int(os.environ.get('DOCUMENT_VALIDATION_WORKERS', str(min(os.cpu_count() or 2, 4))))
+)
+
+EXECUTOR_POOLS = {"password_hash": password_hash_pool, "document_validation": document_validation_pool}
 
 # Security
 security = HTTPBearer()
@@ -47,12 +409,105 @@ app = FastAPI(title="Plateforme Financement Projets Citoyens - Sénégal")
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: records are queued by the caller and written to stdout
+# by a listener thread, so a slow log sink never blocks the event loop.
+# LOG_LEVELS="httpx=WARNING,server=DEBUG"  LOG_SAMPLING="server.access=0.1"
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # json or text
+LOG_QUEUE_SIZE = 10000
+
+def parse_logger_settings(value: str) -> Dict[str, str]:
+    return dict(item.strip().split("=", 1) for item in value.split(",") if "=" in item)
+
+class RequestContextFilter(logging.Filter):
+    """Tags records with the request id and route of the request that emitted them"""
+
+    def filter(self, record):
+        context = request_context.get()
+        record.request_id = context["request_id"] if context else None
+        record.route = current_route() if context else None
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records of selected loggers; warnings and errors are always kept"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition(".")[0]
+        return True
+
+class LogQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records are dropped and counted when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback here, keep the record's fields for the formatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields become top-level keys"""
+
+    STANDARD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id", "route"}
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+            entry["route"] = record.route
+        entry.update({k: v for k, v in vars(record).items() if k not in self.STANDARD_FIELDS})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+log_sampling = SamplingFilter({name: float(rate) for name, rate in parse_logger_settings(os.environ.get('LOG_SAMPLING', '')).items()})
+log_handler = LogQueueHandler(log_queue)
+log_handler.addFilter(log_sampling)
+log_handler.addFilter(RequestContextFilter())
+_log_output = logging.StreamHandler(sys.stdout)
+_log_output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = QueueListener(log_queue, _log_output)
+logging.root.handlers = [log_handler]
+logging.root.setLevel(LOG_LEVEL)
+for _name, _level in parse_logger_settings(os.environ.get('LOG_LEVELS', 'httpx=WARNING')).items():
+    logging.getLogger(_name).setLevel(_level.upper())
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger(f"{__name__}.access")
+
+# Applied once logging is set up so rejected entries are reported
+READ_ROUTES.update(parse_read_preference_overrides(os.environ.get('READ_PREFERENCE_OVERRIDES', '')))
 
 # ============== ENUMS ==============
 
@@ -79,6 +534,34 @@ class NotificationType(str, Enum):
     ACCOUNT_VERIFIED = "account_verified"
     PASSWORD_RESET = "password_reset"
 
+class EmailDeliveryMode(str, Enum):
+    IMMEDIATE = "immediate"
+    DIGEST = "digest"
+
+# Never held back for the digest
+IMMEDIATE_EMAIL_TYPES = {NotificationType.ACCOUNT_VERIFIED, NotificationType.PASSWORD_RESET}
+
+DIGEST_SECTIONS = {
+    NotificationType.PROJECT_SUBMITTED: "Projets soumis",
+    NotificationType.PROJECT_VALIDATED: "Projets validés",
+    NotificationType.PROJECT_APPROVED: "Projets approuvés",
+    NotificationType.PROJECT_REJECTED: "Projets rejetés",
+    NotificationType.DOCUMENTS_REQUESTED: "Documents demandés",
+    NotificationType.NEW_COMMENT: "Nouveaux commentaires"
+}
+
+class TombstoneKind(str, Enum):
+    PROJECT = "project"
+    DOCUMENT = "document"
+    NOTIFICATIONS = "notifications"
+
+class WebhookEvent(str, Enum):
+    PROJECT_SUBMITTED = "project.submitted"
+    PROJECT_VALIDATED = "project.validated"
+    PROJECT_DOCUMENTS_REQUESTED = "project.documents_requested"
+    PROJECT_APPROVED = "project.approved"
+    PROJECT_REJECTED = "project.rejected"
+
 class DocumentType(str, Enum):
     PASSPORT = "passport"
     CNI = "cni"
@@ -154,6 +637,7 @@ class UserUpdate(BaseModel):
     identity_document: Optional[IdentityDocument] = None
     filiation: Optional[Filiation] = None
     profile_picture: Optional[str] = None
+    email_mode: Optional[EmailDeliveryMode] = None
 
 class User(UserBase):
     model_config = ConfigDict(extra="ignore")
@@ -164,6 +648,7 @@ class User(UserBase):
     identity_document: Optional[IdentityDocument] = None
     filiation: Optional[Filiation] = None
     profile_picture: Optional[str] = None
+    email_mode: Optional[EmailDeliveryMode] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -182,6 +667,7 @@ class UserResponse(BaseModel):
     identity_document: Optional[IdentityDocument] = None
     filiation: Optional[Filiation] = None
     profile_picture: Optional[str] = None
+    email_mode: Optional[EmailDeliveryMode] = None
     created_at: datetime
     updated_at: datetime
 
@@ -191,8 +677,17 @@ class ProjectDocument(BaseModel):
     file_url: str
     file_type: str
     file_size: int
+    sha256: Optional[str] = None
+    page_count: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
     uploaded_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class GeoPoint(BaseModel):
+    """GeoJSON point; coordinates are [longitude, latitude]"""
+    type: Literal["Point"] = "Point"
+    coordinates: Tuple[Annotated[float, Field(ge=-180, le=180)], Annotated[float, Field(ge=-90, le=90)]]
+
 class ProjectCreate(BaseModel):
     title: str
     description: str
@@ -203,6 +698,7 @@ class ProjectCreate(BaseModel):
     objectives: List[str] = []
     budget_breakdown: Optional[Dict[str, float]] = None
     location: Optional[str] = None
+    geo: Optional[GeoPoint] = None
 
 class ProjectUpdate(BaseModel):
     title: Optional[str] = None
@@ -214,7 +710,14 @@ class ProjectUpdate(BaseModel):
     objectives: Optional[List[str]] = None
     budget_breakdown: Optional[Dict[str, float]] = None
     location: Optional[str] = None
+    geo: Optional[GeoPoint] = None
+    status: Optional[ProjectStatus] = None
+
+class DuplicateCandidate(BaseModel):
+    project_id: str
+    title: Optional[str] = None
     status: Optional[ProjectStatus] = None
+    score: float
 
 class Project(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -229,6 +732,8 @@ class Project(BaseModel):
     objectives: List[str] = []
     budget_breakdown: Dict[str, float] = {}
     location: Optional[str] = None
+    geo: Optional[GeoPoint] = None
+    region: Optional[str] = None
     status: ProjectStatus = ProjectStatus.DRAFT
     documents: List[ProjectDocument] = []
     rejection_reason: Optional[str] = None
@@ -239,6 +744,15 @@ class Project(BaseModel):
     submitted_at: Optional[datetime] = None
     validated_at: Optional[datetime] = None
     approved_at: Optional[datetime] = None
+    rejected_at: Optional[datetime] = None
+    duplicate_score: Optional[float] = None
+    duplicate_candidates: List[DuplicateCandidate] = []
+    anomaly_score: Optional[float] = None
+    budget_analysis: Optional[Dict[str, Any]] = None
+    # Only set when listing with sort_by=distance
+    distance_km: Optional[float] = None
+    # Read from projects_archive; restore it to edit or transition it
+    archived: bool = False
 
 class Comment(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -262,7 +776,10 @@ class Notification(BaseModel):
     message: str
     data: Dict[str, Any] = {}
     is_read: bool = False
+    count: int = 1
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None
+    read_at: Optional[datetime] = None
 
 class ProjectHistory(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -295,19 +812,256 @@ class ResetPasswordRequest(BaseModel):
 class VerifyEmailRequest(BaseModel):
     token: str
 
+class UserSummary(BaseModel):
+    id: str
+    email: str
+    first_name: str
+    last_name: str
+    role: UserRole
+
+class Tombstone(BaseModel):
+    """A deletion seen by /sync.
+
+    project: the project left the hot collections with its comments, history
+    and notifications. document: one document was removed from project_id.
+    notifications: the user's notifications created before `before`, or
+    read before `read_before`, are gone.
+    """
+    model_config = ConfigDict(extra="ignore")
+    kind: TombstoneKind
+    id: Optional[str] = None
+    project_id: Optional[str] = None
+    before: Optional[str] = None
+    read_before: Optional[str] = None
+    deleted_at: datetime
+
+class SyncResponse(BaseModel):
+    token: str
+    has_more: bool = False
+    projects: List[Project] = []
+    comments: List[Comment] = []
+    history: List[ProjectHistory] = []
+    notifications: List[Notification] = []
+    deleted: List[Tombstone] = []
+
+class WebhookSubscriptionCreate(BaseModel):
+    url: AnyHttpUrl
+    events: List[WebhookEvent] = Field(..., min_length=1)
+    description: Optional[str] = None
+    max_concurrency: int = Field(2, ge=1, le=10)
+    batch_size: int = Field(20, ge=1, le=100)
+
+class WebhookSubscription(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    url: str
+    events: List[WebhookEvent]
+    description: Optional[str] = None
+    max_concurrency: int = 2
+    batch_size: int = 20
+    active: bool = True
+    # Only returned when the subscription is created
+    secret: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_success_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    consecutive_failures: int = 0
+
+class DashboardSummary(BaseModel):
+    projects_by_status: Dict[str, int] = {}
+    total_projects: int = 0
+    documents_requested: int = 0
+    # Officials and admins only
+    pending_reviews: Optional[int] = None
+    review_queue: Optional[Dict[str, int]] = None
+
+class LoggingSettingsUpdate(BaseModel):
+    levels: Dict[str, str] = {}
+    sampling: Dict[str, float] = {}
+
+class ProjectFull(BaseModel):
+    project: Project
+    owner: Optional[UserSummary] = None
+    comments: List[Comment] = []
+    history: List[ProjectHistory] = []
+    unread_notifications: int = 0
+
 class AdminUserUpdate(BaseModel):
     role: Optional[UserRole] = None
     is_active: Optional[bool] = None
     is_verified: Optional[bool] = None
 
-# ============== HELPERS ==============
+class BulkTransitionAction(str, Enum):
+    VALIDATE = "validate"
+    APPROVE = "approve"
+    REJECT = "reject"
+    REQUEST_DOCUMENTS = "request_documents"
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+class BulkProjectTransition(BaseModel):
+    project_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    action: BulkTransitionAction
+    reason: Optional[str] = None
+
+class BulkUserUpdateItem(AdminUserUpdate):
+    user_id: str
+
+class BulkUserUpdate(BaseModel):
+    updates: List[BulkUserUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+class AnalyticsDimension(str, Enum):
+    REGION = "region"
+    CATEGORY = "category"
+    MONTH = "month"
+
+class ProjectSortField(str, Enum):
+    CREATED_AT = "created_at"
+    SUBMITTED_AT = "submitted_at"
+    FUNDING_REQUESTED = "funding_requested"
+    ANOMALY_SCORE = "anomaly_score"
+    DUPLICATE_SCORE = "duplicate_score"
+    # Nearest first, requires near
+    DISTANCE = "distance"
+
+class ImportKind(str, Enum):
+    USERS = "users"
+    PROJECTS = "projects"
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportReport(BaseModel):
+    kind: ImportKind
+    processed: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+    duration_seconds: float = 0
+    rows_per_second: float = 0
+
+class BulkItemResult(BaseModel):
+    id: str
+    success: bool
+    error: Optional[str] = None
+
+class BulkOperationResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+# ============== HELPERS ==============
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def password_context_settings(scheme: str, cost: int) -> dict:
+    """CryptContext settings hashing with scheme at the given cost.
+
+    Other available schemes stay verifiable and are marked deprecated, so
+    their hashes are upgraded on the next login.
+    """
+    schemes = [scheme] + [s for s in PASSWORD_COST_RANGES if s != scheme and CryptContext(schemes=[s]).handler().has_backend()]
+    if scheme == "argon2":
+        return {"schemes": schemes, "deprecated": "auto", "argon2__time_cost": cost,
+                "argon2__memory_cost": ARGON2_MEMORY_KIB, "argon2__parallelism": 1}
+    return {"schemes": schemes, "deprecated": "auto", "bcrypt__rounds": cost}
+
+def time_password_hash(settings: dict, samples: int) -> float:
+    """Median milliseconds per hash with the given CryptContext settings"""
+    context = CryptContext(**settings)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration-password")
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[samples // 2]
+
+def password_scheme() -> str:
+    """PASSWORD_SCHEME, or bcrypt when it is unknown or its backend is missing"""
+    if PASSWORD_SCHEME not in PASSWORD_COST_RANGES or not CryptContext(schemes=[PASSWORD_SCHEME]).handler().has_backend():
+        logger.warning(f"Password scheme {PASSWORD_SCHEME} unavailable (argon2 needs argon2-cffi), using bcrypt")
+        return "bcrypt"
+    return PASSWORD_SCHEME
+
+def calibrate_password_hashing(cost: Optional[int] = None) -> dict:
+    """Apply cost, or the work factor closest to PASSWORD_HASH_TARGET_MS, to pwd_context.
+
+    The cheapest cost is timed and extrapolated: bcrypt doubles per round,
+    argon2 grows linearly with time_cost. The chosen cost is then timed
+    again for the capacity report.
+    """
+    scheme = password_scheme()
+    low, high = PASSWORD_COST_RANGES[scheme]
+
+    calibrated = not cost
+    if cost:
+        handler = CryptContext(schemes=[scheme]).handler()
+        if not handler.min_rounds <= cost <= handler.max_rounds:
+            logger.warning(f"{scheme} cost {cost} out of range {handler.min_rounds}-{handler.max_rounds}, clamped")
+            cost = min(max(cost, handler.min_rounds), handler.max_rounds)
+    else:
+        base_ms = time_password_hash(password_context_settings(scheme, low), samples=3)
+        if scheme == "bcrypt":
+            cost = low + round(np.log2(max(PASSWORD_HASH_TARGET_MS / base_ms, 1e-9)))
+        else:
+            cost = round(low * PASSWORD_HASH_TARGET_MS / base_ms)
+        cost = min(max(cost, low), high)
+
+    settings = password_context_settings(scheme, cost)
+    hash_ms = time_password_hash(settings, samples=2)
+    pwd_context.update(**settings)
+
+    cores = os.cpu_count() or 1
+    password_hash_report.clear()
+    password_hash_report.update({
+        "scheme": scheme,
+        "cost": cost,
+        "calibrated": calibrated,
+        "target_ms": PASSWORD_HASH_TARGET_MS,
+        "hash_ms": round(hash_ms, 1),
+        "cores": cores,
+        "hash_workers": PASSWORD_HASH_WORKERS,
+        "logins_per_second_per_core": round(1000 / hash_ms, 1),
+        # bcrypt and argon2 release the GIL, so hashing scales up to the core count
+        "max_logins_per_second": round(1000 / hash_ms * min(cores, PASSWORD_HASH_WORKERS), 1),
+        "calibrated_at": datetime.now(timezone.utc).isoformat()
+    })
+    logger.info(f"Password hashing: {scheme} cost {cost}, {hash_ms:.0f}ms per hash, ~{password_hash_report['max_logins_per_second']} logins/s")
+    return password_hash_report
+
+async def configure_password_hashing() -> dict:
+    """Apply the work factor shared by every worker.
+
+    Workers hashing with different costs would rehash a password on every
+    login served by another worker, so the first one to start calibrates and
+    stores its cost in app_settings and the others apply it as is. Deleting
+    the document makes the next worker to start calibrate again.
+    """
+    if PASSWORD_HASH_COST:
+        return await run_in_pool("password_hash", calibrate_password_hashing, PASSWORD_HASH_COST)
+    stored = await db.app_settings.find_one({"_id": PASSWORD_SETTINGS_ID})
+    if stored and stored.get("scheme") == password_scheme():
+        return await run_in_pool("password_hash", calibrate_password_hashing, stored["cost"])
+
+    report = await run_in_pool("password_hash", calibrate_password_hashing)
+    settings = {"scheme": report["scheme"], "cost": report["cost"], "calibrated_at": report["calibrated_at"], "worker": WORKER_ID}
+    if stored:
+        # PASSWORD_SCHEME changed since the cost was stored
+        await db.app_settings.replace_one({"_id": PASSWORD_SETTINGS_ID, "scheme": stored.get("scheme")}, settings)
+    else:
+        try:
+            await db.app_settings.insert_one({"_id": PASSWORD_SETTINGS_ID, **settings})
+        except DuplicateKeyError:
+            pass
+    stored = await db.app_settings.find_one({"_id": PASSWORD_SETTINGS_ID})
+    if stored and (stored["scheme"], stored["cost"]) != (report["scheme"], report["cost"]):
+        # Another worker stored its calibration first
+        return await run_in_pool("password_hash", calibrate_password_hashing, stored["cost"])
+    return report
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -367,17 +1121,42 @@ def deserialize_datetime(obj, fields):
                 pass
     return obj
 
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def user_search_keys(user: dict) -> List[str]:
+    """Normalised prefixes searched by the admin user directory"""
+    first_name = normalize_text(user.get("first_name")).strip()
+    last_name = normalize_text(user.get("last_name")).strip()
+    keys = [normalize_text(user.get("email")), first_name, last_name,
+            f"{first_name} {last_name}", f"{last_name} {first_name}"]
+    keys += first_name.split() + last_name.split()
+    return list(dict.fromkeys(k for k in keys if k))
+
+def user_search_query(search: str) -> dict:
+    """Anchored prefix match served by the search_keys index"""
+    return {"search_keys": {"$regex": f"^{re.escape(normalize_text(search).strip())}"}}
+
+# Tasks submitted to each executor pool and not finished yet, reported by /health/ready
+pool_queue_depth: Dict[str, int] = defaultdict(int)
+
+async def run_in_pool(name: str, func, *args):
+    """run_in_executor on one of EXECUTOR_POOLS, keeping pool_queue_depth up to date"""
+    pool_queue_depth[name] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(EXECUTOR_POOLS[name], func, *args)
+    finally:
+        pool_queue_depth[name] -= 1
+
 # ============== EMAIL SERVICE (SIMULATION) ==============
 
 async def send_email(to_email: str, subject: str, body: str):
     """Simulated email sending - logs to console"""
-    logger.info(f"""
-    ========== EMAIL SIMULÉ ==========
-    À: {to_email}
-    Sujet: {subject}
-    Corps: {body}
-    ==================================
-    """)
+    logger.info("Email simulé", extra={"to": to_email, "subject": subject, "body_chars": len(body)})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Email simulé (corps)", extra={"to": to_email, "body": body})
     return True
 
 async def send_verification_email(email: str, token: str):
@@ -453,8 +1232,310 @@ async def upload_to_supabase(file_content: bytes, filename: str, content_type: s
         base64_content = base64.b64encode(file_content).decode('utf-8')
         return f"data:{content_type};base64,{base64_content}"
 
+# ============== DOCUMENT VALIDATION ==============
+
+class DocumentRejected(ValueError):
+    """Raised by the validation workers with the message shown to the user"""
+
+def sniff_content_type(content: bytes) -> Optional[str]:
+    """Content type from the file's magic bytes, ignoring what the client declared"""
+    if content.startswith(b"%PDF-"):
+        return "application/pdf"
+    if content.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if content.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def image_dimensions(content: bytes, content_type: str) -> Optional[tuple]:
+    """(width, height) read from the image header, without decoding pixels"""
+    try:
+        if content_type == "image/png":
+            if content[12:16] == b"IHDR":
+                return struct.unpack(">II", content[16:24])
+        elif content_type == "image/jpeg":
+            i = 2
+            while i + 9 < len(content):
+                if content[i] != 0xFF:
+                    return None
+                marker = content[i + 1]
+                if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                    i += 2
+                    continue
+                length = struct.unpack(">H", content[i + 2:i + 4])[0]
+                # Start-of-frame markers, excluding DHT, JPG and DAC
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack(">HH", content[i + 5:i + 9])
+                    return width, height
+                i += 2 + length
+        elif content_type == "image/webp":
+            chunk = content[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", content[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(content[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return int.from_bytes(content[24:27], "little") + 1, int.from_bytes(content[27:30], "little") + 1
+    except struct.error:
+        return None
+    return None
+
+def inspect_pdf(content: bytes) -> dict:
+    """Page count of a PDF, rejecting encrypted or unreadable files"""
+    try:
+        reader = PdfReader(BytesIO(content), strict=False)
+        encrypted = reader.is_encrypted
+        page_count = 0 if encrypted else len(reader.pages)
+    except (PdfReadError, ValueError, KeyError, TypeError, struct.error):
+        raise DocumentRejected("PDF illisible ou corrompu")
+    if encrypted:
+        raise DocumentRejected("Les PDF protégés par mot de passe ne sont pas acceptés")
+    if page_count == 0:
+        raise DocumentRejected("Le PDF ne contient aucune page")
+    if page_count > DOCUMENT_MAX_PAGES:
+        raise DocumentRejected(f"Document trop long (max {DOCUMENT_MAX_PAGES} pages)")
+    return {"page_count": page_count}
+
+def inspect_document(content: bytes, declared_type: Optional[str], allowed_types: List[str]) -> dict:
+    """Validate an upload and extract its metadata; runs in document_validation_pool"""
+    content_type = sniff_content_type(content)
+    if content_type not in allowed_types:
+        raise DocumentRejected("Format non accepté (" + ", ".join(t.split("/")[1].upper() for t in allowed_types) + " uniquement)")
+    if declared_type and declared_type.replace("image/jpg", "image/jpeg") != content_type:
+        raise DocumentRejected("Le contenu du fichier ne correspond pas à son type déclaré")
+    metadata = {"file_type": content_type, "file_size": len(content), "sha256": hashlib.sha256(content).hexdigest()}
+    if content_type == "application/pdf":
+        metadata.update(inspect_pdf(content))
+    else:
+        dimensions = image_dimensions(content, content_type)
+        if not dimensions:
+            raise DocumentRejected("Image illisible ou corrompue")
+        width, height = dimensions
+        if min(width, height) < IMAGE_MIN_DIMENSION:
+            raise DocumentRejected(f"Image trop petite (min {IMAGE_MIN_DIMENSION}px)")
+        if width * height > IMAGE_MAX_PIXELS:
+            raise DocumentRejected("Image trop grande")
+        metadata.update({"width": width, "height": height})
+    return metadata
+
+async def validate_upload(file: UploadFile, allowed_types: List[str]) -> tuple:
+    """Read an upload and validate it off the event loop.
+
+    Returns the content with its extracted metadata; the client-supplied
+    size and content type are only used to reject early.
+    """
+    if file.size and file.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=400, detail="Fichier trop volumineux (max 5Mo)")
+    content = await file.read(UPLOAD_MAX_BYTES + 1)
+    if len(content) > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=400, detail="Fichier trop volumineux (max 5Mo)")
+    try:
+        metadata = await asyncio.wait_for(
+            run_in_pool("document_validation", inspect_document, content, file.content_type, allowed_types),
+            DOCUMENT_VALIDATION_TIMEOUT_SECONDS
+        )
+    except DocumentRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning("Document validation timed out", extra={"content_type": file.content_type, "size": len(content)})
+        raise HTTPException(status_code=422, detail="Le document n'a pas pu être analysé à temps")
+    return content, metadata
+
+# ============== ARCHIVE SERVICE ==============
+
+async def copy_documents(source, target, query: dict) -> int:
+    """Copy documents matching query into an archive collection, keeping their _id"""
+    copied = 0
+    archived_at = datetime.now(timezone.utc)
+    cursor = source.find(query).batch_size(ARCHIVE_BATCH_SIZE)
+    batch = []
+    async for doc in cursor:
+        doc["archived_at"] = archived_at
+        batch.append(doc)
+        if len(batch) >= ARCHIVE_BATCH_SIZE:
+            copied += await _insert_archive_batch(target, batch)
+            batch = []
+    if batch:
+        copied += await _insert_archive_batch(target, batch)
+    return copied
+
+async def _insert_archive_batch(target, batch: list) -> int:
+    try:
+        await target.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        # Documents already archived by a previous interrupted run
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    return len(batch)
+
+async def move_documents(source, target, query: dict, stamp: str = "archived_at") -> int:
+    """Move documents matching query into an archive collection, in batches, stamping the time in stamp"""
+    moved = 0
+    while True:
+        batch = await source.find(query).limit(ARCHIVE_BATCH_SIZE).to_list(ARCHIVE_BATCH_SIZE)
+        if not batch:
+            return moved
+
+        archived_at = datetime.now(timezone.utc)
+        for doc in batch:
+            doc[stamp] = archived_at
+        await _insert_archive_batch(target, batch)
+
+        await source.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        moved += len(batch)
+
+async def find_project(project_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+    """Find a project, reading through to the archive for archived projects"""
+    projection = projection or {"_id": 0}
+    project = await db.projects.find_one({"id": project_id}, projection)
+    if project is None:
+        project = await db.projects_archive.find_one({"id": project_id}, projection)
+        if project is not None:
+            project["archived"] = True
+    return project
+
+async def find_projects(project_ids: List[str], query: Optional[dict] = None) -> List[dict]:
+    """Find several projects by id in one query per collection, archived ones included"""
+    query = query or {}
+    projects = await db.projects.find({**query, "id": {"$in": project_ids}}, {"_id": 0}).to_list(None)
+    missing = set(project_ids) - {p["id"] for p in projects}
+    if missing:
+        archived = await db.projects_archive.find({**query, "id": {"$in": list(missing)}}, {"_id": 0}).to_list(None)
+        for project in archived:
+            project["archived"] = True
+        projects += archived
+    return projects
+
+def closed_projects_query(months: int) -> dict:
+    """Rejected or approved projects closed for more than the given number of months"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=30 * months)).isoformat()
+    return {"$and": [
+        {"$or": [
+            {"status": ProjectStatus.REJECTED, "updated_at": {"$lt": cutoff}},
+            {"status": ProjectStatus.APPROVED, "approved_at": {"$lt": cutoff}}
+        ]},
+        {"$or": [
+            {"restored_at": {"$exists": False}},
+            {"restored_at": {"$lt": cutoff}}
+        ]}
+    ]}
+
+async def archive_closed_projects(months: int = PROJECT_ARCHIVE_AFTER_MONTHS) -> dict:
+    """Move closed projects and their history, comments and notifications to archive collections.
+
+    Each batch is copied in full before anything is deleted, and projects are
+    deleted before their dependents, so readers going through find_project
+    always see either the hot or the archived copy of a project with all its
+    dependents. Interrupted runs are safe to repeat.
+    """
+    query = closed_projects_query(months)
+    stats = {"projects": 0, "history": 0, "comments": 0, "notifications": 0}
+
+    while True:
+        batch = await db.projects.find(query, {"_id": 0, "id": 1, "user_id": 1}).limit(PROJECT_ARCHIVE_BATCH_SIZE).to_list(PROJECT_ARCHIVE_BATCH_SIZE)
+        if not batch:
+            break
+        ids = [p["id"] for p in batch]
+        dependents = [
+            ("history", db.project_history, db.project_history_archive, {"project_id": {"$in": ids}}),
+            ("comments", db.comments, db.comments_archive, {"project_id": {"$in": ids}}),
+            ("notifications", db.notifications, db.notifications_archive, {"data.project_id": {"$in": ids}})
+        ]
+
+        for _, source, target, dep_query in dependents:
+            await copy_documents(source, target, dep_query)
+        await copy_documents(db.projects, db.projects_archive, {"id": {"$in": ids}})
+
+        await db.projects.delete_many({"id": {"$in": ids}})
+        await db.project_signatures.delete_many({"_id": {"$in": ids}})
+        await record_tombstones([
+            {"kind": TombstoneKind.PROJECT, "id": p["id"], "project_id": p["id"], "user_id": p["user_id"]} for p in batch
+        ])
+        for key, source, target, dep_query in dependents:
+            # Catch dependents written between the first copy and the project delete
+            stats[key] += await move_documents(source, target, dep_query)
+        stats["projects"] += len(ids)
+
+    logger.info(f"Project archival: {stats}")
+    return stats
+
+async def restore_archived_project(project_id: str) -> bool:
+    """Move an archived project with its history, comments and notifications back to the hot collections"""
+    project = await db.projects_archive.find_one({"id": project_id}, {"_id": 0})
+    if project is None:
+        return False
+
+    now = datetime.now(timezone.utc).isoformat()
+    notified_users = set()
+    # Notifications sync on updated_at, so it is bumped to send them to clients again
+    for source, target, query, touch in [
+        (db.project_history_archive, db.project_history, {"project_id": project_id}, False),
+        (db.comments_archive, db.comments, {"project_id": project_id}, False),
+        (db.notifications_archive, db.notifications, {"data.project_id": project_id}, True)
+    ]:
+        docs = await source.find(query).to_list(None)
+        for doc in docs:
+            doc.pop("archived_at", None)
+            doc.pop("capped_at", None)
+            if touch:
+                doc["updated_at"] = now
+                notified_users.add(doc["user_id"])
+        if docs:
+            await _insert_archive_batch(target, docs)
+            await source.delete_many(query)
+
+    project.pop("archived_at", None)
+    project["restored_at"] = project["updated_at"] = now
+    await db.projects.replace_one({"id": project_id}, project, upsert=True)
+    await db.projects_archive.delete_one({"id": project_id})
+    await index_project_signature(project)
+    # Otherwise a client syncing from before the archival would drop the project again
+    await db.sync_tombstones.delete_many({"kind": TombstoneKind.PROJECT, "project_id": project_id})
+    for user_id in notified_users:
+        await enforce_notification_cap(user_id)
+    return True
+
 # ============== NOTIFICATION SERVICE ==============
 
+def coalescing_window_start() -> Optional[datetime]:
+    if NOTIFICATION_COALESCE_MINUTES <= 0:
+        return None
+    return datetime.now(timezone.utc) - timedelta(minutes=NOTIFICATION_COALESCE_MINUTES)
+
+async def coalesce_notification(notification: Notification) -> Optional[Notification]:
+    """Fold notification into a recent unread one of the same type for the same project.
+
+    The window is anchored at the first notification's created_at, so a
+    steady stream of events cannot keep one notification open forever.
+    """
+    project_id = notification.data.get("project_id")
+    window_start = coalescing_window_start()
+    if not project_id or window_start is None:
+        return None
+    now = datetime.now(timezone.utc).isoformat()
+    existing = await db.notifications.find_one_and_update(
+        {
+            "user_id": notification.user_id,
+            "type": notification.type,
+            "data.project_id": project_id,
+            "is_read": False,
+            "created_at": {"$gte": window_start.isoformat()}
+        },
+        {
+            "$set": {"title": notification.title, "message": notification.message, "data": notification.data, "updated_at": now},
+            "$inc": {"count": 1}
+        },
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if existing is None:
+        return None
+    return Notification(**deserialize_datetime(existing, ["created_at", "updated_at"]))
+
 async def create_notification(user_id: str, notif_type: NotificationType, title: str, message: str, data: dict = {}):
     """Create in-app notification and send email"""
     notification = Notification(
@@ -464,17 +1545,1814 @@ async def create_notification(user_id: str, notif_type: NotificationType, title:
         message=message,
         data=data
     )
-    
-    doc = serialize_datetime(notification.model_dump())
-    await db.notifications.insert_one(doc)
-    
+    coalesced = await coalesce_notification(notification)
+    if coalesced:
+        notification = coalesced
+    else:
+        await db.notifications.insert_one(notification_doc(notification))
+        await enforce_notification_cap(user_id)
+
     # Send email notification
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "id": 1, "email": 1, "email_mode": 1})
     if user:
-        await send_notification_email(user["email"], title, message)
-    
+        await deliver_notification_emails([notification], {user_id: user})
+
     return notification
 
+def notification_doc(notification: Notification) -> dict:
+    doc = serialize_datetime(notification.model_dump(exclude={"read_at"}))
+    doc["updated_at"] = doc["created_at"]
+    return doc
+
+async def create_notifications_bulk(notifications: List[Notification]) -> List[Notification]:
+    """Store a batch of in-app notifications, coalesced and capped like create_notification.
+
+    One query finds the notifications that may coalesce, so a batch with
+    nothing to coalesce costs a single insert_many. Returns the notifications
+    as stored.
+    """
+    if not notifications:
+        return []
+
+    coalescable = set()
+    window_start = coalescing_window_start()
+    project_ids = {n.data.get("project_id") for n in notifications} - {None}
+    if window_start and project_ids:
+        recent = await db.notifications.find(
+            {
+                "user_id": {"$in": list({n.user_id for n in notifications})},
+                "data.project_id": {"$in": list(project_ids)},
+                "is_read": False,
+                "created_at": {"$gte": window_start.isoformat()}
+            },
+            {"_id": 0, "user_id": 1, "type": 1, "data.project_id": 1}
+        ).to_list(None)
+        coalescable = {(n["user_id"], n["type"], n["data"]["project_id"]) for n in recent}
+
+    stored = []
+    inserts = []
+    for notification in notifications:
+        key = (notification.user_id, NotificationType(notification.type).value, notification.data.get("project_id"))
+        # The candidate may have been read since the lookup: insert then
+        coalesced = await coalesce_notification(notification) if key in coalescable else None
+        if coalesced:
+            stored.append(coalesced)
+        else:
+            inserts.append(notification)
+            stored.append(notification)
+
+    if inserts:
+        await db.notifications.insert_many([notification_doc(n) for n in inserts], ordered=False)
+        for user_id in {n.user_id for n in inserts}:
+            await enforce_notification_cap(user_id)
+    return stored
+
+async def send_notification_emails(notifications: List[Notification]):
+    """Send the emails for a batch of notifications, resolving recipients in one query"""
+    user_ids = list({n.user_id for n in notifications})
+    users = await db.users.find({"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "email": 1, "email_mode": 1}).to_list(None)
+    await deliver_notification_emails(notifications, {u["id"]: u for u in users})
+
+def uses_email_digest(user: dict, notif_type: NotificationType) -> bool:
+    if NOTIFICATION_DIGEST_MINUTES <= 0 or notif_type in IMMEDIATE_EMAIL_TYPES:
+        return False
+    # Opt-in: users who never chose a mode keep immediate emails
+    return user.get("email_mode") == EmailDeliveryMode.DIGEST
+
+async def deliver_notification_emails(notifications: List[Notification], users: Dict[str, dict]):
+    """Email critical notifications right away and buffer the rest for the user's digest"""
+    buffered = []
+    for n in notifications:
+        user = users.get(n.user_id)
+        if not user:
+            continue
+        if uses_email_digest(user, n.type):
+            buffered.append({
+                "user_id": n.user_id,
+                "email": user["email"],
+                "type": n.type,
+                "title": n.title,
+                "message": n.message,
+                "project_id": n.data.get("project_id"),
+                "created_at": datetime.now(timezone.utc).isoformat()
+            })
+        else:
+            await send_notification_email(user["email"], n.title, n.message)
+    if buffered:
+        await db.email_digest_buffer.insert_many(buffered, ordered=False)
+
+def render_email_digest(items: List[dict]) -> tuple:
+    """Subject and body of one digest email, grouped by notification type then project"""
+    sections = defaultdict(dict)
+    for item in items:
+        key = item.get("project_id") or item["message"]
+        entry = sections[item["type"]].setdefault(key, {"message": item["message"], "count": 0})
+        entry["message"] = item["message"]
+        entry["count"] += 1
+
+    lines = ["Voici le résumé de votre activité sur la Plateforme Projets Citoyens.", ""]
+    for notif_type, label in DIGEST_SECTIONS.items():
+        entries = list(sections.get(notif_type, {}).values())
+        if not entries:
+            continue
+        lines.append(f"{label} ({sum(e['count'] for e in entries)})")
+        for entry in entries[-NOTIFICATION_DIGEST_MAX_ITEMS:]:
+            suffix = f" (x{entry['count']})" if entry["count"] > 1 else ""
+            lines.append(f"  - {entry['message']}{suffix}")
+        if len(entries) > NOTIFICATION_DIGEST_MAX_ITEMS:
+            lines.append(f"  ... et {len(entries) - NOTIFICATION_DIGEST_MAX_ITEMS} autres")
+        lines.append("")
+    lines.append("Retrouvez le détail dans vos notifications sur la plateforme.")
+    return f"Résumé de vos notifications ({len(items)})", "\n".join(lines)
+
+async def flush_email_digests() -> dict:
+    """Send one digest per user whose oldest buffered notification has waited a full window"""
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=NOTIFICATION_DIGEST_MINUTES)
+    due = await db.email_digest_buffer.aggregate([
+        {"$group": {"_id": "$user_id", "first": {"$min": "$created_at"}}},
+        {"$match": {"first": {"$lte": cutoff.isoformat()}}}
+    ]).to_list(None)
+
+    sent = 0
+    for user in due:
+        items = await db.email_digest_buffer.find({"user_id": user["_id"]}).sort("created_at", 1).to_list(None)
+        if not items:
+            continue
+        subject, body = render_email_digest(items)
+        await send_email(items[-1]["email"], subject, body)
+        # Only the rendered items: anything buffered meanwhile goes into the next digest
+        await db.email_digest_buffer.delete_many({"_id": {"$in": [item["_id"] for item in items]}})
+        sent += len(items)
+
+    if due:
+        logger.info(f"Email digests: {len(due)} emails for {sent} notifications")
+    return {"emails": len(due), "notifications": sent}
+
+async def enforce_notification_cap(user_id: str) -> int:
+    """Archive the oldest notifications of a user beyond NOTIFICATION_MAX_PER_USER"""
+    if NOTIFICATION_MAX_PER_USER <= 0:
+        return 0
+
+    overflow = await db.notifications.find(
+        {"user_id": user_id}, {"_id": 0, "created_at": 1}
+    ).sort("created_at", -1).skip(NOTIFICATION_MAX_PER_USER).limit(1).to_list(1)
+    if not overflow:
+        return 0
+
+    archived = await move_documents(
+        db.notifications, db.notifications_archive,
+        {"user_id": user_id, "created_at": {"$lte": overflow[0]["created_at"]}},
+        stamp="capped_at"
+    )
+    if archived:
+        await record_tombstones([{"kind": TombstoneKind.NOTIFICATIONS, "user_id": user_id, "before": overflow[0]["created_at"]}])
+    return archived
+
+async def compact_notifications() -> dict:
+    """Enforce the per-user notification cap across all users"""
+    if NOTIFICATION_MAX_PER_USER <= 0:
+        return {"users": 0, "archived": 0}
+
+    pipeline = [
+        {"$group": {"_id": "$user_id", "total": {"$sum": 1}}},
+        {"$match": {"total": {"$gt": NOTIFICATION_MAX_PER_USER}}}
+    ]
+    users = await db.notifications.aggregate(pipeline).to_list(None)
+
+    archived = 0
+    for item in users:
+        archived += await enforce_notification_cap(item["_id"])
+
+    logger.info(f"Notification compaction: {archived} archived for {len(users)} users")
+    return {"users": len(users), "archived": archived}
+
+# ============== IMPORT SERVICE ==============
+
+def iter_import_rows(fileobj, fmt: str):
+    """Yield (row_number, row) pairs from a binary CSV or NDJSON stream, one line at a time"""
+    text = TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            parsed = {}
+            for key, value in row.items():
+                if key is None or value is None:
+                    continue
+                value = value.strip()
+                if not value:
+                    continue
+                # Nested fields (objectives, budget_breakdown, identity_document...) are JSON cells
+                if value[0] in "[{":
+                    try:
+                        value = json.loads(value)
+                    except ValueError:
+                        pass
+                parsed[key.strip()] = value
+            yield row_number, parsed
+    else:
+        for row_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row_number, row if isinstance(row, dict) else ValueError("JSON invalide")
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    return await asyncio.gather(*(
+        run_in_pool("password_hash", get_password_hash, password) for password in passwords
+    ))
+
+async def insert_import_batch(collection, docs: List[dict], rows: List[int], report: ImportReport, duplicate_error: str):
+    """insert_many with ordered=False, reporting failed rows by their position in the batch"""
+    if not docs:
+        return []
+    failed_positions = set()
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get("writeErrors", []):
+            failed_positions.add(err["index"])
+            message = duplicate_error if err.get("code") == 11000 else err.get("errmsg", "Erreur d'écriture")
+            add_import_error(report, rows[err["index"]], message)
+    inserted = [doc for i, doc in enumerate(docs) if i not in failed_positions]
+    report.inserted += len(inserted)
+    return inserted
+
+def add_import_error(report: ImportReport, row: int, error: str):
+    report.failed += 1
+    if len(report.errors) < IMPORT_MAX_REPORTED_ERRORS:
+        report.errors.append(ImportRowError(row=row, error=error))
+    else:
+        report.errors_truncated = True
+
+async def import_users_batch(batch: list, report: ImportReport):
+    valid = []
+    for row_number, row in batch:
+        if isinstance(row, Exception):
+            add_import_error(report, row_number, str(row))
+            continue
+        try:
+            valid.append((row_number, UserCreate(**row)))
+        except ValidationError as e:
+            add_import_error(report, row_number, format_validation_error(e))
+
+    # Duplicates inside the batch or already registered
+    emails = [user.email for _, user in valid]
+    existing = await db.users.find({"email": {"$in": emails}}, {"_id": 0, "email": 1}).to_list(None)
+    taken = {u["email"] for u in existing}
+    unique = []
+    for row_number, user_data in valid:
+        if user_data.email in taken:
+            add_import_error(report, row_number, "Cet email est déjà utilisé")
+        else:
+            taken.add(user_data.email)
+            unique.append((row_number, user_data))
+
+    hashes = await hash_passwords([user_data.password for _, user_data in unique])
+    docs = []
+    for (row_number, user_data), hashed_password in zip(unique, hashes):
+        user = User(**user_data.model_dump(exclude={"password"}))
+        user_doc = serialize_datetime(user.model_dump())
+        user_doc["password_hash"] = hashed_password
+        user_doc["search_keys"] = user_search_keys(user_doc)
+        docs.append(user_doc)
+
+    await insert_import_batch(db.users, docs, [r for r, _ in unique], report, "Cet email est déjà utilisé")
+
+async def import_projects_batch(batch: list, report: ImportReport, actor: Optional[User]):
+    # Resolve owners by email or id in one query per batch
+    emails = {row.get("user_email") for _, row in batch if isinstance(row, dict) and row.get("user_email")}
+    ids = {row.get("user_id") for _, row in batch if isinstance(row, dict) and row.get("user_id")}
+    owners = await db.users.find(
+        {"$or": [{"email": {"$in": list(emails)}}, {"id": {"$in": list(ids)}}]},
+        {"_id": 0, "id": 1, "email": 1, "region": 1}
+    ).to_list(None)
+    owner_by_email = {u["email"]: u["id"] for u in owners}
+    owner_regions = {u["id"]: u.get("region") for u in owners}
+
+    docs = []
+    rows = []
+    for row_number, row in batch:
+        if isinstance(row, Exception):
+            add_import_error(report, row_number, str(row))
+            continue
+        owner_id = row.pop("user_id", None)
+        owner_email = row.pop("user_email", None)
+        if owner_email:
+            owner_id = owner_by_email.get(owner_email)
+        if not owner_id or owner_id not in owner_regions:
+            add_import_error(report, row_number, "Propriétaire du projet non trouvé")
+            continue
+        try:
+            project_data = ProjectCreate(**row)
+        except ValidationError as e:
+            add_import_error(report, row_number, format_validation_error(e))
+            continue
+        project = Project(user_id=owner_id, region=owner_regions[owner_id], **project_data.model_dump(exclude_none=True))
+        locate_project(project)
+        docs.append(serialize_datetime(project.model_dump()))
+        rows.append(row_number)
+
+    inserted = await insert_import_batch(db.projects, docs, rows, report, "Projet déjà existant")
+    if inserted:
+        await update_user_counters([(doc["user_id"], None, doc["status"]) for doc in inserted])
+        await index_project_signatures(inserted)
+        history = [
+            serialize_datetime(ProjectHistory(
+                project_id=doc["id"],
+                user_id=actor.id if actor else "system",
+                user_name=f"{actor.first_name} {actor.last_name}" if actor else "Import",
+                action="Projet importé",
+                new_status=ProjectStatus.DRAFT
+            ).model_dump())
+            for doc in inserted
+        ]
+        await db.project_history.insert_many(history, ordered=False)
+
+async def import_records(kind: ImportKind, fileobj, fmt: str, actor: Optional[User] = None) -> ImportReport:
+    """Stream a CSV/NDJSON file into users or projects in batches of IMPORT_BATCH_SIZE rows"""
+    report = ImportReport(kind=kind)
+    started = time.perf_counter()
+    rows = iter_import_rows(fileobj, fmt)
+
+    while True:
+        # File reading and CSV parsing stay off the event loop
+        batch = await run_in_threadpool(lambda: list(islice(rows, IMPORT_BATCH_SIZE)))
+        if not batch:
+            break
+        report.processed += len(batch)
+        if kind == ImportKind.USERS:
+            await import_users_batch(batch, report)
+        else:
+            await import_projects_batch(batch, report, actor)
+
+    report.duration_seconds = round(time.perf_counter() - started, 3)
+    if report.duration_seconds:
+        report.rows_per_second = round(report.processed / report.duration_seconds, 1)
+    logger.info(f"Import {kind.value}: {report.inserted}/{report.processed} rows in {report.duration_seconds}s")
+    return report
+
+# ============== GEOCODING ==============
+
+def place_key(name: str) -> str:
+    return " ".join(re.findall(r"\w+", normalize_text(name)))
+
+class Gazetteer:
+    """Locality names to coordinates, from a local CSV (name, region, latitude, longitude, aliases).
+
+    Lookups try the whole text first, then the first known locality
+    mentioned in it, so "Quartier Médina, Kaolack" resolves to Kaolack.
+    """
+
+    def __init__(self, path: Path):
+        self.places: Dict[str, dict] = {}
+        if path.exists():
+            with open(path, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    place = {"name": row["name"], "region": row["region"],
+                             "latitude": float(row["latitude"]), "longitude": float(row["longitude"])}
+                    for name in [row["name"], *filter(None, (row.get("aliases") or "").split("|"))]:
+                        self.places.setdefault(place_key(name), place)
+        else:
+            logger.warning(f"Gazetteer not found at {path}, geocoding disabled")
+        # Longest names first so "Nioro du Rip" wins over a shorter name it contains
+        names = sorted(self.places, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(map(re.escape, names)) + r")\b") if names else None
+
+    def lookup(self, text: Optional[str]) -> Optional[dict]:
+        key = place_key(text or "")
+        if not key or self.pattern is None:
+            return None
+        if key in self.places:
+            return self.places[key]
+        match = self.pattern.search(key)
+        return self.places[match.group(1)] if match else None
+
+gazetteer = Gazetteer(GAZETTEER_PATH)
+
+def geocode(text: Optional[str]) -> Optional[GeoPoint]:
+    place = gazetteer.lookup(text)
+    return GeoPoint(coordinates=(place["longitude"], place["latitude"])) if place else None
+
+def locate_project(project: Project):
+    """Fill in coordinates from the project's location unless the client sent them"""
+    if project.geo is None and project.location:
+        project.geo = geocode(project.location)
+
+def parse_near(near: str) -> GeoPoint:
+    """A "latitude,longitude" pair or a locality name from the gazetteer"""
+    match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*", near)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if abs(latitude) > 90 or abs(longitude) > 180:
+            raise HTTPException(status_code=400, detail="Coordonnées invalides")
+        return GeoPoint(coordinates=(longitude, latitude))
+    point = geocode(near)
+    if point is None:
+        raise HTTPException(status_code=400, detail=f"Localité inconnue: {near}")
+    return point
+
+def spatial_filter(near: Optional[str], radius_km: float, within: Optional[str]) -> dict:
+    """$geoWithin condition on geo for a circle around near or a min_lon,min_lat,max_lon,max_lat box"""
+    if near and within:
+        raise HTTPException(status_code=400, detail="Utilisez near ou within, pas les deux")
+    if near:
+        point = parse_near(near)
+        return {"geo": {"$geoWithin": {"$centerSphere": [list(point.coordinates), radius_km / EARTH_RADIUS_KM]}}}
+    if within:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in within.split(","))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="within attend min_lon,min_lat,max_lon,max_lat")
+        if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise HTTPException(status_code=400, detail="Coordonnées invalides")
+        ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+        return {"geo": {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}}
+    return {}
+
+def geo_hint(query: dict) -> dict:
+    """Pin spatial queries to the geo index, which the planner may pass over for a
+    status or created_at index. A citizen's own projects are few enough that
+    their user_id index stays the better choice."""
+    return {"hint": GEO_INDEX} if "geo" in query and "user_id" not in query else {}
+
+async def geocode_projects(retry_unmatched: bool = False) -> dict:
+    """Geocode projects saved before coordinates existed, or whose location did not match"""
+    query = {"location": {"$nin": [None, ""]}, "geo": None if retry_unmatched else {"$exists": False}}
+    located = unmatched = 0
+    operations = []
+    now = datetime.now(timezone.utc).isoformat()
+    async for project in db.projects.find(query, {"_id": 0, "id": 1, "location": 1}):
+        point = geocode(project["location"])
+        if point:
+            located += 1
+        else:
+            unmatched += 1
+            if retry_unmatched:
+                # Still null: nothing to write or to sync
+                continue
+        operations.append(UpdateOne(
+            {"id": project["id"]},
+            {"$set": {"geo": point.model_dump() if point else None, "updated_at": now}}
+        ))
+        if len(operations) >= 1000:
+            await db.projects.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.projects.bulk_write(operations, ordered=False)
+    logger.info(f"Projects geocoded: {located} located, {unmatched} unmatched")
+    return {"located": located, "unmatched": unmatched}
+
+# ============== ANALYTICS SERVICE ==============
+
+ROLLUP_COUNTERS = [
+    "submitted_count", "submitted_funding",
+    "approved_count", "approved_funding",
+    "rejected_count", "decision_count", "decision_days_sum"
+]
+
+def parse_timestamp(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value)
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+    return None
+
+def rollup_key(region: Optional[str], category: str, month: str) -> str:
+    return f"{region or UNKNOWN_REGION}|{category}|{month}"
+
+async def update_funding_rollups(projects: List[dict], new_status: ProjectStatus, at: datetime):
+    """Apply the rollup increments for projects that just moved to new_status"""
+    month = at.strftime("%Y-%m")
+    increments = {}
+    for project in projects:
+        category = project.get("category")
+        funding = float(project.get("funding_requested") or 0)
+        if new_status == ProjectStatus.PENDING:
+            # Resubmissions after a documents request are not new submissions
+            if project.get("status") != ProjectStatus.DRAFT:
+                continue
+            inc = {"submitted_count": 1, "submitted_funding": funding}
+        elif new_status == ProjectStatus.APPROVED:
+            inc = {"approved_count": 1, "approved_funding": funding}
+            submitted_at = parse_timestamp(project.get("submitted_at"))
+            if submitted_at:
+                inc["decision_count"] = 1
+                inc["decision_days_sum"] = (at - submitted_at).total_seconds() / 86400
+        elif new_status == ProjectStatus.REJECTED:
+            inc = {"rejected_count": 1}
+        else:
+            continue
+
+        key = rollup_key(project.get("region"), category, month)
+        entry = increments.setdefault(key, {
+            "dims": {"region": project.get("region") or UNKNOWN_REGION, "category": category, "month": month},
+            "inc": {}
+        })
+        for field, value in inc.items():
+            entry["inc"][field] = entry["inc"].get(field, 0) + value
+
+    if increments:
+        await db.funding_rollups.bulk_write([
+            UpdateOne({"_id": key}, {"$setOnInsert": entry["dims"], "$inc": entry["inc"]}, upsert=True)
+            for key, entry in increments.items()
+        ], ordered=False)
+
+async def load_funding_frame(query: dict, route: Optional[str] = None) -> pd.DataFrame:
+    """Load the fields the rollups need, column-wise, for the submitted projects matching query.
+
+    Reads go through read_db(route) when a route is given, the primary otherwise.
+    """
+    fields = ["region", "category", "funding_requested", "status",
+              "submitted_at", "approved_at", "rejected_at", "updated_at"]
+    columns = {field: [] for field in fields}
+    source = read_db(route) if route else db
+    cursor = source.projects.find(
+        {**query, "status": {"$ne": ProjectStatus.DRAFT}},
+        {"_id": 0, **{field: 1 for field in fields}},
+        **geo_hint(query)
+    ).batch_size(10000)
+    async for project in cursor:
+        for field in fields:
+            columns[field].append(project.get(field))
+    return pd.DataFrame(columns)
+
+def compute_funding_rollups(frame: pd.DataFrame) -> pd.DataFrame:
+    """Rollup counters per region, category and month from a load_funding_frame result"""
+    frame["region"] = frame["region"].fillna(UNKNOWN_REGION)
+    frame["funding_requested"] = pd.to_numeric(frame["funding_requested"], errors="coerce").fillna(0.0)
+    for field in ["submitted_at", "approved_at", "rejected_at", "updated_at"]:
+        frame[field] = pd.to_datetime(frame[field], utc=True, errors="coerce", format="ISO8601")
+
+    keys = ["region", "category", "month"]
+    parts = []
+
+    submitted = frame[frame["submitted_at"].notna()].assign(
+        month=lambda f: f["submitted_at"].dt.strftime("%Y-%m"))
+    parts.append(submitted.groupby(keys).agg(
+        submitted_count=("funding_requested", "size"),
+        submitted_funding=("funding_requested", "sum")))
+
+    approved = frame[(frame["status"] == ProjectStatus.APPROVED.value) & frame["approved_at"].notna()].assign(
+        month=lambda f: f["approved_at"].dt.strftime("%Y-%m"),
+        decision_days=lambda f: (f["approved_at"] - f["submitted_at"]).dt.total_seconds() / 86400)
+    parts.append(approved.groupby(keys).agg(
+        approved_count=("funding_requested", "size"),
+        approved_funding=("funding_requested", "sum"),
+        decision_count=("decision_days", "count"),
+        decision_days_sum=("decision_days", "sum")))
+
+    # Projects rejected before rejected_at existed fall back to their last update
+    rejected = frame[frame["status"] == ProjectStatus.REJECTED.value]
+    rejected = rejected.assign(
+        month=rejected["rejected_at"].fillna(rejected["updated_at"]).dt.strftime("%Y-%m")).dropna(subset=["month"])
+    parts.append(rejected.groupby(keys).agg(rejected_count=("funding_requested", "size")))
+
+    rollups = pd.concat(parts, axis=1).fillna(0).reset_index()
+    for field in ROLLUP_COUNTERS:
+        if field not in rollups:
+            rollups[field] = 0
+    return rollups
+
+async def rebuild_funding_rollups() -> dict:
+    """Recompute all rollup documents from the projects collection.
+
+    Projects are loaded column-wise into a DataFrame and grouped with pandas,
+    then the result is written to a staging collection and swapped in with
+    a rename so readers never see a partial rollup.
+    """
+    started = time.perf_counter()
+    frame = await load_funding_frame({})
+    rollups = compute_funding_rollups(frame)
+    keys = ["region", "category", "month"]
+
+    docs = [
+        {"_id": rollup_key(row["region"], row["category"], row["month"]),
+         **{key: row[key] for key in keys},
+         **{field: int(row[field]) if field.endswith("_count") else float(row[field]) for field in ROLLUP_COUNTERS}}
+        for row in rollups.to_dict("records")
+    ]
+
+    await db.funding_rollups_staging.drop()
+    if docs:
+        await db.funding_rollups_staging.insert_many(docs, ordered=False)
+        await db.funding_rollups_staging.create_index([("month", 1), ("region", 1), ("category", 1)])
+        await db.funding_rollups_staging.rename("funding_rollups", dropTarget=True)
+    else:
+        await db.funding_rollups.delete_many({})
+
+    duration = round(time.perf_counter() - started, 3)
+    logger.info(f"Funding rollups rebuilt: {len(docs)} documents from {len(frame)} projects in {duration}s")
+    return {"projects": len(frame), "rollups": len(docs), "duration_seconds": duration}
+
+async def query_funding_rollups(
+    group_by: List[AnalyticsDimension],
+    region: Optional[str] = None,
+    category: Optional[ProjectCategory] = None,
+    month_from: Optional[str] = None,
+    month_to: Optional[str] = None
+) -> List[dict]:
+    match = {}
+    if region:
+        match["region"] = region
+    if category:
+        match["category"] = category
+    if month_from or month_to:
+        match["month"] = {}
+        if month_from:
+            match["month"]["$gte"] = month_from
+        if month_to:
+            match["month"]["$lte"] = month_to
+
+    dims = list(dict.fromkeys(d.value for d in group_by))
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {dim: f"${dim}" for dim in dims} or None,
+            **{field: {"$sum": f"${field}"} for field in ROLLUP_COUNTERS}
+        }},
+        {"$sort": {f"_id.{dim}": 1 for dim in dims} or {"_id": 1}}
+    ]
+    groups = await read_db("admin_funding_analytics").funding_rollups.aggregate(pipeline).to_list(None)
+
+    return [funding_row(group["_id"] or {}, group) for group in groups]
+
+def funding_row(dims: dict, totals: dict) -> dict:
+    row = dict(dims)
+    row.update({field: int(totals[field]) if field.endswith("_count") else float(totals[field]) for field in ROLLUP_COUNTERS})
+    decided = row["approved_count"] + row["rejected_count"]
+    row["approval_rate"] = round(row["approved_count"] / decided, 4) if decided else None
+    row["avg_days_to_decision"] = (
+        round(row["decision_days_sum"] / row["decision_count"], 2) if row["decision_count"] else None
+    )
+    del row["decision_days_sum"]
+    return row
+
+async def query_project_funding(
+    group_by: List[AnalyticsDimension],
+    scope: dict,
+    region: Optional[str] = None,
+    category: Optional[ProjectCategory] = None,
+    month_from: Optional[str] = None,
+    month_to: Optional[str] = None
+) -> List[dict]:
+    """Same figures as query_funding_rollups, computed from the projects in scope.
+
+    Rollups are kept per region only, so spatial filters read the matching
+    projects through the geo index and group them on the fly.
+    """
+    query = dict(scope)
+    if region:
+        query["region"] = region
+    if category:
+        query["category"] = category
+    frame = await load_funding_frame(query, route="admin_funding_analytics")
+    if frame.empty:
+        return []
+    rollups = compute_funding_rollups(frame)
+    if month_from:
+        rollups = rollups[rollups["month"] >= month_from]
+    if month_to:
+        rollups = rollups[rollups["month"] <= month_to]
+    if rollups.empty:
+        return []
+
+    dims = list(dict.fromkeys(d.value for d in group_by))
+    if not dims:
+        return [funding_row({}, rollups[ROLLUP_COUNTERS].sum().to_dict())]
+    groups = rollups.groupby(dims)[ROLLUP_COUNTERS].sum().reset_index().sort_values(dims)
+    return [funding_row({dim: group[dim] for dim in dims}, group) for group in groups.to_dict("records")]
+
+# ============== DUPLICATE DETECTION ==============
+
+# MinHash over word 3-gram shingles, banded for LSH lookups. The permutation
+# coefficients come from a fixed seed so signatures agree across workers.
+# With a prime below 2**32, a * x + b stays below 2**64 and wraps modulo the
+# prime on every permutation, which keeps the permutations independent.
+_MINHASH_PRIME = np.uint64(4294967291)
+_minhash_rng = np.random.default_rng(20240101)
+_MINHASH_A = _minhash_rng.integers(1, int(_MINHASH_PRIME), size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _minhash_rng.integers(0, int(_MINHASH_PRIME), size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+MINHASH_ROWS_PER_BAND = MINHASH_PERMUTATIONS // MINHASH_BANDS
+
+def project_shingles(project: dict) -> set:
+    text = " ".join([project.get("title") or "", project.get("description") or "", *(project.get("objectives") or [])])
+    words = re.findall(r"\w+", normalize_text(text))
+    if len(words) < 3:
+        return set(words)
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+def minhash_signature(shingles: set) -> Optional[np.ndarray]:
+    if not shingles:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)) % _MINHASH_PRIME
+    return ((np.outer(hashes, _MINHASH_A) + _MINHASH_B) % _MINHASH_PRIME).min(axis=0)
+
+def lsh_bands(signature: np.ndarray) -> List[int]:
+    bands = []
+    for band in range(MINHASH_BANDS):
+        rows = signature[band * MINHASH_ROWS_PER_BAND:(band + 1) * MINHASH_ROWS_PER_BAND]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        bands.append(int.from_bytes(digest, "big", signed=True))
+    return bands
+
+def project_signature_doc(project: dict) -> Optional[dict]:
+    signature = minhash_signature(project_shingles(project))
+    if signature is None:
+        return None
+    return {
+        "_id": project["id"],
+        "user_id": project.get("user_id"),
+        "signature": signature.astype(np.int64).tolist(),
+        "bands": lsh_bands(signature),
+        "updated_at": datetime.now(timezone.utc)
+    }
+
+async def index_project_signature(project: dict):
+    """Insert or refresh the similarity signature of a project"""
+    doc = project_signature_doc(project)
+    if doc is None:
+        await db.project_signatures.delete_one({"_id": project["id"]})
+    else:
+        await db.project_signatures.replace_one({"_id": project["id"]}, doc, upsert=True)
+
+async def index_project_signatures(projects: List[dict]):
+    """index_project_signature for a batch of new projects, in one bulk write"""
+    docs = [doc for doc in map(project_signature_doc, projects) if doc is not None]
+    if docs:
+        await db.project_signatures.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False
+        )
+
+async def find_duplicate_projects(project: dict, limit: int = 5) -> List[DuplicateCandidate]:
+    """Projects whose estimated Jaccard similarity with project reaches DUPLICATE_THRESHOLD"""
+    doc = project_signature_doc(project)
+    if doc is None:
+        return []
+
+    # Projects sharing the most bands first, so the cap drops the least similar ones
+    ranked = await db.project_signatures.aggregate([
+        {"$match": {"bands": {"$in": doc["bands"]}, "_id": {"$ne": project["id"]}}},
+        {"$project": {"bands": 1}},
+        {"$unwind": "$bands"},
+        {"$match": {"bands": {"$in": doc["bands"]}}},
+        {"$group": {"_id": "$_id", "matched": {"$sum": 1}}},
+        {"$sort": {"matched": -1, "_id": 1}},
+        {"$limit": DUPLICATE_MAX_CANDIDATES}
+    ]).to_list(DUPLICATE_MAX_CANDIDATES)
+    if not ranked:
+        return []
+    candidates = await db.project_signatures.find(
+        {"_id": {"$in": [r["_id"] for r in ranked]}}, {"signature": 1}
+    ).to_list(None)
+
+    matrix = np.array([c["signature"] for c in candidates], dtype=np.int64)
+    scores = (matrix == np.array(doc["signature"], dtype=np.int64)).mean(axis=1)
+    order = np.argsort(-scores)[:limit]
+    matches = {candidates[i]["_id"]: round(float(scores[i]), 3) for i in order if scores[i] >= DUPLICATE_THRESHOLD}
+    if not matches:
+        return []
+
+    projects = await db.projects.find(
+        {"id": {"$in": list(matches)}}, {"_id": 0, "id": 1, "title": 1, "status": 1}
+    ).to_list(None)
+    info = {p["id"]: p for p in projects}
+    return [
+        DuplicateCandidate(project_id=pid, title=info.get(pid, {}).get("title"),
+                           status=info.get(pid, {}).get("status"), score=score)
+        for pid, score in matches.items()
+    ]
+
+async def rebuild_project_signatures() -> dict:
+    """Recompute the similarity index for every project from scratch"""
+    started = time.perf_counter()
+    rebuilt_at = datetime.now(timezone.utc)
+    indexed = 0
+    operations = []
+    cursor = db.projects.find(
+        {}, {"_id": 0, "id": 1, "user_id": 1, "title": 1, "description": 1, "objectives": 1}
+    ).batch_size(1000)
+    async for project in cursor:
+        doc = project_signature_doc(project)
+        if doc is None:
+            continue
+        doc["updated_at"] = rebuilt_at
+        operations.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+        if len(operations) >= 1000:
+            await db.project_signatures.bulk_write(operations, ordered=False)
+            indexed += len(operations)
+            operations = []
+    if operations:
+        await db.project_signatures.bulk_write(operations, ordered=False)
+        indexed += len(operations)
+
+    removed = await db.project_signatures.delete_many({"updated_at": {"$lt": rebuilt_at}})
+    duration = round(time.perf_counter() - started, 3)
+    logger.info(f"Project signatures rebuilt: {indexed} indexed in {duration}s")
+    return {"indexed": indexed, "removed": removed.deleted_count, "duration_seconds": duration}
+
+# ============== BUDGET ANALYSIS ==============
+
+REVIEW_STATUSES = [ProjectStatus.PENDING, ProjectStatus.DOCUMENTS_REQUESTED, ProjectStatus.VALIDATED]
+# Project fields the budget score is computed from
+BUDGET_SCORED_FIELDS = ["category", "funding_requested", "duration_months", "budget_breakdown"]
+
+def robust_zscores(values: pd.Series, groups: pd.Series) -> pd.Series:
+    """Median/MAD z-scores within each group, falling back to the standard deviation"""
+    grouped = values.groupby(groups)
+    median = grouped.transform("median")
+    mad = (values - median).abs().groupby(groups).transform("median") * 1.4826
+    scale = mad.where(mad > 0, grouped.transform("std"))
+    return ((values - median) / scale).replace([np.inf, -np.inf], np.nan).fillna(0.0)
+
+def score_budgets(frame: pd.DataFrame) -> pd.DataFrame:
+    """Vectorised budget consistency and outlier scoring for a portfolio of projects"""
+    funding = frame["funding_requested"].clip(lower=1.0)
+    months = frame["duration_months"].clip(lower=1)
+    has_breakdown = frame["budget_lines"] > 0
+
+    mismatch = ((frame["budget_total"] - funding).abs() / funding).where(has_breakdown)
+    per_month = funding / months
+    z_funding = robust_zscores(np.log(funding), frame["category"])
+    z_per_month = robust_zscores(np.log(per_month), frame["category"])
+
+    # 0-100: half for an inconsistent breakdown, the rest for category outliers
+    score = (
+        mismatch.clip(upper=1.0).fillna(0.2) * 50
+        + z_funding.abs().clip(upper=5.0) * 5
+        + z_per_month.abs().clip(upper=5.0) * 5
+    )
+    return pd.DataFrame({
+        "id": frame["id"],
+        "budget_total": frame["budget_total"].round(2),
+        "budget_mismatch_ratio": mismatch.round(4),
+        "funding_per_month": per_month.round(2),
+        "funding_zscore": z_funding.round(3),
+        "funding_per_month_zscore": z_per_month.round(3),
+        "anomaly_score": score.round(1)
+    })
+
+async def score_project_budgets() -> dict:
+    """Score the budgets of every project under review and store the analyses that changed"""
+    started = time.perf_counter()
+    pipeline = [
+        {"$match": {"status": {"$in": REVIEW_STATUSES}}},
+        {"$project": {
+            "_id": 0, "id": 1, "category": 1, "funding_requested": 1, "duration_months": 1,
+            "anomaly_score": 1, "budget_analysis": 1,
+            # Sum the breakdown server-side so only scalars cross the wire
+            "budget_total": {"$sum": {"$map": {
+                "input": {"$objectToArray": {"$ifNull": ["$budget_breakdown", {}]}},
+                "as": "line",
+                "in": "$$line.v"
+            }}},
+            "budget_lines": {"$size": {"$objectToArray": {"$ifNull": ["$budget_breakdown", {}]}}}
+        }}
+    ]
+    fields = ["id", "category", "funding_requested", "duration_months", "budget_total", "budget_lines"]
+    columns = {field: [] for field in fields}
+    stored = {}
+    async for project in db.projects.aggregate(pipeline, batchSize=10000):
+        for field in fields:
+            columns[field].append(project.get(field))
+        stored[project["id"]] = (project.get("anomaly_score"), project.get("budget_analysis"))
+
+    if not columns["id"]:
+        return {"scored": 0, "updated": 0, "duration_seconds": 0}
+
+    frame = pd.DataFrame(columns)
+    for field in ["funding_requested", "duration_months", "budget_total", "budget_lines"]:
+        frame[field] = pd.to_numeric(frame[field], errors="coerce")
+    frame[["funding_requested", "duration_months", "budget_total", "budget_lines"]] = \
+        frame[["funding_requested", "duration_months", "budget_total", "budget_lines"]].fillna(0)
+
+    scores = score_budgets(frame)
+
+    scored_at = datetime.now(timezone.utc).isoformat()
+    operations = []
+    updated = 0
+    for row in scores.to_dict("records"):
+        analysis = {k: (None if pd.isna(v) else float(v)) for k, v in row.items() if k not in ["id", "anomaly_score"]}
+        previous_score, previous = stored[row["id"]]
+        if previous is not None and previous_score == row["anomaly_score"] and \
+                analysis == {k: v for k, v in previous.items() if k != "scored_at"}:
+            continue
+        analysis["scored_at"] = scored_at
+        operations.append(UpdateOne(
+            {"id": row["id"]},
+            {"$set": {"anomaly_score": float(row["anomaly_score"]), "budget_analysis": analysis, "updated_at": scored_at}}
+        ))
+        if len(operations) >= 1000:
+            await db.projects.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await db.projects.bulk_write(operations, ordered=False)
+        updated += len(operations)
+
+    duration = round(time.perf_counter() - started, 3)
+    logger.info(f"Budget scoring: {len(frame)} projects scored, {updated} updated in {duration}s")
+    return {"scored": len(frame), "updated": updated, "duration_seconds": duration}
+
+# ============== DELTA SYNC ==============
+
+def encode_sync_token(at: datetime) -> str:
+    return base64.urlsafe_b64encode(at.isoformat().encode()).decode().rstrip("=")
+
+def decode_sync_token(token: str) -> datetime:
+    try:
+        at = datetime.fromisoformat(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Jeton de synchronisation invalide")
+    if at.tzinfo is None:
+        raise HTTPException(status_code=400, detail="Jeton de synchronisation invalide")
+    return at
+
+async def record_tombstones(tombstones: List[dict]):
+    """Remember deletions for /sync until SYNC_TOMBSTONE_TTL_DAYS"""
+    if tombstones:
+        deleted_at = datetime.now(timezone.utc)
+        await db.sync_tombstones.insert_many([{**t, "deleted_at": deleted_at} for t in tombstones], ordered=False)
+
+async def fetch_changes(collection, query: dict, field: str, since) -> tuple:
+    """Documents changed after since, oldest first, and whether the page was truncated"""
+    if since is not None:
+        query = {**query, field: {"$gt": since}}
+    docs = await collection.find(query, {"_id": 0}).sort(field, 1).limit(SYNC_PAGE_SIZE + 1).to_list(SYNC_PAGE_SIZE + 1)
+    if len(docs) <= SYNC_PAGE_SIZE:
+        return docs, False
+    # Complete the last timestamp (bulk writes share one) so the next page can start strictly after it
+    page, last = docs[:SYNC_PAGE_SIZE], docs[SYNC_PAGE_SIZE - 1][field]
+    if docs[SYNC_PAGE_SIZE][field] == last:
+        seen = {doc["id"] for doc in page if "id" in doc}
+        ties = await collection.find({**query, field: last}, {"_id": 0}).to_list(None)
+        page += [doc for doc in ties if doc.get("id") not in seen]
+    return page, True
+
+# ============== PUBLIC SHOWCASE ==============
+
+# Everything else (owner, documents, budget lines, review data) stays private
+PUBLIC_PROJECT_FIELDS = {
+    "_id": 0, "id": 1, "title": 1, "description": 1, "category": 1, "region": 1, "location": 1,
+    "funding_requested": 1, "start_date": 1, "duration_months": 1, "objectives": 1, "approved_at": 1
+}
+
+class PublicShowcase:
+    """Precomputed JSON snapshot of approved projects, served without touching Mongo.
+
+    The snapshot is stored gzipped in public_snapshots so every worker serves
+    the same version; workers only poll its version every
+    PUBLIC_SNAPSHOT_CHECK_SECONDS.
+    """
+
+    SNAPSHOT_ID = "projects"
+
+    def __init__(self):
+        self.snapshot: Optional[dict] = None
+        self.checked_at = 0.0
+        self.rebuild_task: Optional[asyncio.Task] = None
+        self.dirty = False
+
+    async def rebuild(self) -> dict:
+        projects = []
+        for collection in [db.projects, db.projects_archive]:
+            projects += await collection.find({"status": ProjectStatus.APPROVED}, PUBLIC_PROJECT_FIELDS).to_list(None)
+        projects.sort(key=lambda p: p.get("approved_at") or "", reverse=True)
+
+        payload = json.dumps(projects, ensure_ascii=False, sort_keys=True, default=str)
+        version = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        current = await db.public_snapshots.find_one({"_id": self.SNAPSHOT_ID})
+        if current and current["version"] == version:
+            # Same content: keep the stored bytes so the ETag stays valid everywhere
+            self._load(current)
+            return {"version": version, "projects": len(projects)}
+
+        generated_at = datetime.now(timezone.utc).isoformat()
+        body = f'{{"version": "{version}", "generated_at": "{generated_at}", "count": {len(projects)}, "projects": {payload}}}'
+        snapshot = {
+            "_id": self.SNAPSHOT_ID,
+            "version": version,
+            "generated_at": generated_at,
+            "count": len(projects),
+            "gzip": gzip.compress(body.encode(), compresslevel=9)
+        }
+        await db.public_snapshots.replace_one({"_id": self.SNAPSHOT_ID}, snapshot, upsert=True)
+        self._load(snapshot)
+        logger.info(f"Public snapshot {version}: {len(projects)} projects")
+        return {"version": version, "projects": len(projects)}
+
+    def _load(self, snapshot: dict):
+        self.snapshot = {
+            "version": snapshot["version"],
+            "etag": f'"{snapshot["version"]}"',
+            "gzip": bytes(snapshot["gzip"]),
+            "body": gzip.decompress(snapshot["gzip"])
+        }
+        self.checked_at = time.monotonic()
+
+    async def current(self) -> dict:
+        if self.snapshot and time.monotonic() - self.checked_at < PUBLIC_SNAPSHOT_CHECK_SECONDS:
+            return self.snapshot
+        stored = await db.public_snapshots.find_one({"_id": self.SNAPSHOT_ID}, {"version": 1})
+        if stored is None:
+            await self.rebuild()
+        elif not self.snapshot or stored["version"] != self.snapshot["version"]:
+            self._load(await db.public_snapshots.find_one({"_id": self.SNAPSHOT_ID}))
+        self.checked_at = time.monotonic()
+        return self.snapshot
+
+    def request_rebuild(self):
+        """Rebuild in the background; approvals arriving during a rebuild trigger one more pass"""
+        if self.rebuild_task and not self.rebuild_task.done():
+            self.dirty = True
+            return
+        self.rebuild_task = asyncio.create_task(self._rebuild_until_clean())
+
+    async def _rebuild_until_clean(self):
+        self.dirty = True
+        while self.dirty:
+            self.dirty = False
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Public snapshot rebuild failed: {e}")
+                return
+
+public_showcase = PublicShowcase()
+
+async def rebuild_public_snapshot() -> dict:
+    return await public_showcase.rebuild()
+
+# ============== DASHBOARD COUNTERS ==============
+
+# Counts across every owner, used for the review queues
+GLOBAL_COUNTERS_ID = "__all__"
+
+async def update_user_counters(changes: List[tuple]):
+    """Apply (user_id, old_status, new_status) changes to user_counters with $inc.
+
+    old_status is None for new projects. Each owner's document and the
+    global one are updated in a single bulk write.
+    """
+    increments = defaultdict(lambda: defaultdict(int))
+    for user_id, old_status, new_status in changes:
+        for counter_id in (user_id, GLOBAL_COUNTERS_ID):
+            if old_status:
+                increments[counter_id][f"projects.{ProjectStatus(old_status).value}"] -= 1
+            increments[counter_id][f"projects.{ProjectStatus(new_status).value}"] += 1
+
+    now = datetime.now(timezone.utc)
+    operations = []
+    for counter_id, inc in increments.items():
+        inc = {field: value for field, value in inc.items() if value}
+        if inc:
+            operations.append(UpdateOne({"_id": counter_id}, {"$inc": inc, "$set": {"updated_at": now}}, upsert=True))
+    if operations:
+        await db.user_counters.bulk_write(operations, ordered=False)
+
+async def rebuild_user_counters() -> dict:
+    """Recount projects per owner and status, archived ones included, and fix drifted counters"""
+    pipeline = [{"$group": {"_id": {"user_id": "$user_id", "status": "$status"}, "count": {"$sum": 1}}}]
+    expected = defaultdict(dict)
+    for collection in [db.projects, db.projects_archive]:
+        async for row in collection.aggregate(pipeline):
+            for counter_id in (row["_id"]["user_id"], GLOBAL_COUNTERS_ID):
+                status = row["_id"]["status"]
+                expected[counter_id][status] = expected[counter_id].get(status, 0) + row["count"]
+
+    now = datetime.now(timezone.utc)
+    operations = []
+    seen = set()
+    async for doc in db.user_counters.find({}, {"projects": 1}):
+        seen.add(doc["_id"])
+        current = {status: count for status, count in (doc.get("projects") or {}).items() if count}
+        if doc["_id"] not in expected:
+            operations.append(DeleteOne({"_id": doc["_id"]}))
+        elif current != expected[doc["_id"]]:
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"projects": expected[doc["_id"]], "updated_at": now}}))
+    for counter_id in expected.keys() - seen:
+        operations.append(UpdateOne({"_id": counter_id}, {"$set": {"projects": expected[counter_id], "updated_at": now}}, upsert=True))
+
+    if operations:
+        await db.user_counters.bulk_write(operations, ordered=False)
+    logger.info(f"User counters reconciled: {len(operations)} of {len(expected)} documents corrected")
+    return {"counters": len(expected), "corrected": len(operations)}
+
+# ============== WEBHOOKS ==============
+
+WEBHOOK_STATUS_EVENTS = {
+    ProjectStatus.PENDING: WebhookEvent.PROJECT_SUBMITTED,
+    ProjectStatus.VALIDATED: WebhookEvent.PROJECT_VALIDATED,
+    ProjectStatus.DOCUMENTS_REQUESTED: WebhookEvent.PROJECT_DOCUMENTS_REQUESTED,
+    ProjectStatus.APPROVED: WebhookEvent.PROJECT_APPROVED,
+    ProjectStatus.REJECTED: WebhookEvent.PROJECT_REJECTED
+}
+
+def webhook_payload(event_type: str, data: dict, at: datetime) -> dict:
+    return {"id": str(uuid.uuid4()), "type": event_type, "occurred_at": at.isoformat(), "data": data}
+
+def sign_webhook(secret: str, timestamp: str, body: bytes) -> str:
+    """HMAC-SHA256 of "<timestamp>.<body>", sent as X-Webhook-Signature"""
+    return "sha256=" + hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+
+def webhook_backoff(attempts: int) -> float:
+    delay = min(WEBHOOK_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), WEBHOOK_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+class WebhookDispatcher:
+    """Delivers queued webhook events to subscribers.
+
+    Events are written to webhook_deliveries, one document per subscription,
+    by the request that triggers them, so an event is queued durably before
+    the request returns.
+    Every worker polls the queue and claims due deliveries with a lease, so a
+    crashed worker's deliveries are picked up again once the lease expires.
+    Deliveries to one endpoint are POSTed in batches through a shared httpx
+    client, with at most max_concurrency batches in flight per worker.
+    Failures are retried with exponential backoff and dead-lettered after
+    WEBHOOK_MAX_ATTEMPTS.
+    """
+
+    def __init__(self):
+        self.http: Optional[httpx.AsyncClient] = None
+        self.task: Optional[asyncio.Task] = None
+        self.wake: Optional[asyncio.Event] = None
+        self.limits: Dict[str, asyncio.Semaphore] = {}
+        self.background: set = set()
+
+    async def start(self):
+        self.http = httpx.AsyncClient(
+            timeout=WEBHOOK_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=WEBHOOK_MAX_CONNECTIONS, max_keepalive_connections=WEBHOOK_MAX_CONNECTIONS)
+        )
+        self.wake = asyncio.Event()
+        self.task = asyncio.create_task(self._run(), name="webhooks")
+
+    async def stop(self):
+        # Let in-flight batches finish; any cut off are retried after their lease
+        if self.background:
+            await asyncio.wait(self.background, timeout=5)
+        for task in [self.task, *self.background]:
+            if task:
+                task.cancel()
+        await asyncio.gather(*[t for t in [self.task, *self.background] if t], return_exceptions=True)
+        if self.http:
+            await self.http.aclose()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    async def enqueue(self, event_type: str, items: List[dict], at: datetime, subscription_ids: Optional[List[str]] = None) -> int:
+        """Queue one delivery per subscription and item in a single insert"""
+        if not items:
+            return 0
+        query = {"active": True, "events": event_type}
+        if subscription_ids is not None:
+            query = {"active": True, "id": {"$in": subscription_ids}}
+        subscriptions = await db.webhook_subscriptions.find(query, {"_id": 0, "id": 1}).to_list(None)
+        payloads = [webhook_payload(event_type, item, at) for item in items]
+        now = datetime.now(timezone.utc)
+        deliveries = [
+            {
+                "_id": str(uuid.uuid4()),
+                "subscription_id": sub["id"],
+                "event_type": event_type,
+                "payload": payload,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now
+            }
+            for sub in subscriptions for payload in payloads
+        ]
+        if deliveries:
+            await db.webhook_deliveries.insert_many(deliveries, ordered=False)
+            if self.wake:
+                self.wake.set()
+        return len(deliveries)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.dispatch_due()
+            except Exception:
+                logger.exception("Webhook dispatch failed")
+            try:
+                await asyncio.wait_for(self.wake.wait(), WEBHOOK_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+    def _due_query(self, now: datetime) -> dict:
+        return {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "delivering", "lease_until": {"$lt": now}}
+        ]}
+
+    async def dispatch_due(self) -> int:
+        now = datetime.now(timezone.utc)
+        due = await db.webhook_deliveries.find(
+            self._due_query(now), {"_id": 1, "subscription_id": 1}
+        ).sort("next_attempt_at", 1).limit(WEBHOOK_SCAN_LIMIT).to_list(WEBHOOK_SCAN_LIMIT)
+        by_subscription = defaultdict(list)
+        for delivery in due:
+            by_subscription[delivery["subscription_id"]].append(delivery["_id"])
+        subscriptions = await db.webhook_subscriptions.find(
+            {"id": {"$in": list(by_subscription)}, "active": True}, {"_id": 0}
+        ).to_list(None)
+
+        started = 0
+        for sub in subscriptions:
+            limit = self.limits.setdefault(sub["id"], asyncio.Semaphore(sub.get("max_concurrency", 2)))
+            ids = by_subscription[sub["id"]]
+            for i in range(0, len(ids), sub.get("batch_size", 20)):
+                if limit.locked():
+                    break
+                await limit.acquire()
+                claimed = await self._claim(ids[i:i + sub.get("batch_size", 20)])
+                if not claimed:
+                    limit.release()
+                    continue
+                self._spawn(self._deliver(sub, claimed, limit))
+                started += 1
+        return started
+
+    async def _claim(self, ids: List[str]) -> List[dict]:
+        now = datetime.now(timezone.utc)
+        lease_until = now + timedelta(seconds=WEBHOOK_LEASE_SECONDS)
+        await db.webhook_deliveries.update_many(
+            {"_id": {"$in": ids}, **self._due_query(now)},
+            {"$set": {"status": "delivering", "lease_until": lease_until, "owner": WORKER_ID}}
+        )
+        claimed = await db.webhook_deliveries.find(
+            {"_id": {"$in": ids}, "status": "delivering", "owner": WORKER_ID, "lease_until": lease_until}
+        ).to_list(None)
+        claimed.sort(key=lambda d: d["created_at"])
+        return claimed
+
+    async def _deliver(self, sub: dict, deliveries: List[dict], limit: asyncio.Semaphore):
+        try:
+            body = json.dumps({"events": [d["payload"] for d in deliveries]}, separators=(",", ":"), default=str).encode()
+            timestamp = str(int(time.time()))
+            error = None
+            try:
+                response = await self.http.post(sub["url"], content=body, headers={
+                    "Content-Type": "application/json",
+                    "User-Agent": "PlateformeProjetsCitoyens-Webhooks/1.0",
+                    "X-Webhook-Id": deliveries[0]["_id"],
+                    "X-Webhook-Timestamp": timestamp,
+                    "X-Webhook-Signature": sign_webhook(sub["secret"], timestamp, body)
+                })
+                if not 200 <= response.status_code < 300:
+                    error = f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+            await self._record(sub, deliveries, error)
+        finally:
+            limit.release()
+
+    async def _record(self, sub: dict, deliveries: List[dict], error: Optional[str]):
+        now = datetime.now(timezone.utc)
+        if error is None:
+            await db.webhook_deliveries.update_many(
+                {"_id": {"$in": [d["_id"] for d in deliveries]}},
+                {"$set": {"status": "delivered", "delivered_at": now}, "$inc": {"attempts": 1}, "$unset": {"lease_until": "", "owner": ""}}
+            )
+            await db.webhook_subscriptions.update_one(
+                {"id": sub["id"]}, {"$set": {"last_success_at": now, "consecutive_failures": 0}}
+            )
+            return
+
+        operations = []
+        dead = 0
+        for delivery in deliveries:
+            attempts = delivery.get("attempts", 0) + 1
+            if attempts >= WEBHOOK_MAX_ATTEMPTS:
+                update = {"status": "dead", "dead_at": now}
+                dead += 1
+            else:
+                update = {"status": "pending", "next_attempt_at": now + timedelta(seconds=webhook_backoff(attempts))}
+            operations.append(UpdateOne(
+                {"_id": delivery["_id"]},
+                {"$set": {**update, "attempts": attempts, "last_error": error}, "$unset": {"lease_until": "", "owner": ""}}
+            ))
+        await db.webhook_deliveries.bulk_write(operations, ordered=False)
+        await db.webhook_subscriptions.update_one(
+            {"id": sub["id"]},
+            {"$set": {"last_failure_at": now, "last_error": error}, "$inc": {"consecutive_failures": 1}}
+        )
+        logger.warning(f"Webhook delivery to {sub['url']} failed ({error}): {len(deliveries) - dead} retried, {dead} dead-lettered")
+
+webhook_dispatcher = WebhookDispatcher()
+
+async def emit_project_webhooks(projects: List[dict], new_status: ProjectStatus, at: datetime, changes: Optional[dict] = None):
+    event_type = WEBHOOK_STATUS_EVENTS.get(new_status)
+    if not event_type:
+        return
+    items = []
+    for p in projects:
+        # The payload describes the project after the transition
+        current = {**p, **(changes or {})}
+        items.append({"project": {
+            **{field: current.get(field) for field in PUBLIC_PROJECT_FIELDS if field != "_id"},
+            "status": ProjectStatus(new_status).value,
+            "previous_status": p.get("status")
+        }})
+    await webhook_dispatcher.enqueue(event_type.value, items, at)
+
+# ============== PROJECT LIFECYCLE ==============
+
+async def update_project_in_status(project: dict, changes: dict):
+    """$set changes on a project unless its status changed since it was loaded.
+
+    Raises 409 otherwise, so a double submit or two concurrent reviews run
+    the transition side effects once.
+    """
+    result = await db.projects.update_one({"id": project["id"], "status": project["status"]}, {"$set": changes})
+    if result.modified_count == 0:
+        raise HTTPException(status_code=409, detail="Le statut du projet a changé entre-temps, veuillez recharger")
+
+# Field stamped when a project enters a status
+STATUS_TIMESTAMPS = {
+    ProjectStatus.PENDING: "submitted_at",
+    ProjectStatus.VALIDATED: "validated_at",
+    ProjectStatus.APPROVED: "approved_at",
+    ProjectStatus.REJECTED: "rejected_at"
+}
+
+async def after_project_transition(projects: List[dict], new_status: ProjectStatus, at: datetime, changes: Optional[dict] = None):
+    """Side effects shared by every project status transition.
+
+    projects are the documents as loaded before the transition and changes
+    the fields it $set on each of them.
+    """
+    await update_funding_rollups(projects, new_status, at)
+    await update_user_counters([(p["user_id"], p["status"], new_status) for p in projects])
+    await emit_project_webhooks(projects, new_status, at, changes)
+    if new_status == ProjectStatus.APPROVED:
+        public_showcase.request_rebuild()
+
+# ============== BACKGROUND JOBS ==============
+
+class CronSchedule:
+    """Minimal five-field cron expression (minute hour day month weekday), evaluated in UTC"""
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression: {expression}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)
+        )
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/")
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(v) for v in part.split("-"))
+            else:
+                start = int(part)
+                # "5/15" runs from 5 to the end of the range, as in standard cron
+                end = high if step > 1 else start
+            if start < low or end > high or step < 1:
+                raise ValueError(f"Invalid cron field: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        weekday = (dt.weekday() + 1) % 7  # cron counts from Sunday
+        if self.any_day or self.any_weekday:
+            return dt.day in self.days and weekday in self.weekdays
+        return dt.day in self.days or weekday in self.weekdays
+
+    def next_after(self, dt: datetime) -> datetime:
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(
+                    year=candidate.year + (candidate.month == 12), month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never fires: {self.expression}")
+
+class ScheduledJob:
+    def __init__(self, name: str, func, interval: Optional[int] = None, cron: Optional[str] = None,
+                 timeout: int = 300, jitter: int = 30):
+        if (interval is None) == (cron is None):
+            raise ValueError("A job needs exactly one of interval or cron")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cron = CronSchedule(cron) if cron else None
+        self.timeout = timeout
+        self.jitter = jitter
+        self.metrics = {
+            "runs": 0, "failures": 0, "timeouts": 0, "skipped": 0,
+            "last_started_at": None, "last_duration_ms": None, "last_status": None, "last_error": None
+        }
+
+    def next_run(self, after: datetime) -> datetime:
+        if self.cron:
+            return self.cron.next_after(after)
+        return after + timedelta(seconds=self.interval)
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "schedule": self.cron.expression if self.cron else f"every {self.interval}s",
+            "timeout": self.timeout,
+            "metrics": self.metrics
+        }
+
+class JobScheduler:
+    """Runs registered periodic jobs on the event loop.
+
+    Every worker runs the same schedule, but a job only executes where its
+    lease document in scheduler_leases could be taken: the lease must have
+    expired and the job's next_run_at must be due, so each run happens once
+    across the deployment.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.running: set = set()
+
+    def register(self, name: str, func, **kwargs) -> ScheduledJob:
+        job = ScheduledJob(name, func, **kwargs)
+        self.jobs[name] = job
+        return job
+
+    async def start(self):
+        for job in self.jobs.values():
+            self.tasks.append(asyncio.create_task(self._run_loop(job), name=f"job:{job.name}"))
+        logger.info(f"Scheduler started on {WORKER_ID} with {len(self.jobs)} jobs")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await db.scheduler_leases.update_many(
+            {"owner": WORKER_ID}, {"$set": {"lease_until": datetime.now(timezone.utc)}}
+        )
+
+    async def _run_loop(self, job: ScheduledJob):
+        lease = await db.scheduler_leases.find_one({"_id": job.name})
+        next_run = parse_timestamp(lease.get("next_run_at")) if lease else None
+        next_run = next_run or job.next_run(datetime.now(timezone.utc))
+        while True:
+            delay = (next_run - datetime.now(timezone.utc)).total_seconds()
+            await asyncio.sleep(max(delay, 0) + random.uniform(0, job.jitter))
+            try:
+                await self.run_job(job)
+                lease = await db.scheduler_leases.find_one({"_id": job.name})
+                next_run = parse_timestamp(lease.get("next_run_at")) if lease else None
+            except Exception as e:
+                logger.error(f"Scheduler error for job {job.name}: {e}")
+                next_run = None
+            now = datetime.now(timezone.utc)
+            if not next_run or next_run <= now:
+                next_run = job.next_run(now)
+
+    async def _acquire_lease(self, job: ScheduledJob, force: bool) -> bool:
+        now = datetime.now(timezone.utc)
+        query = {"_id": job.name, "lease_until": {"$lt": now}}
+        if not force:
+            query["next_run_at"] = {"$lte": now}
+        try:
+            # A held or not-yet-due lease makes the upsert collide with the existing _id
+            await db.scheduler_leases.update_one(
+                query,
+                {"$set": {
+                    "owner": WORKER_ID,
+                    "lease_until": now + timedelta(seconds=job.timeout + 60),
+                    "started_at": now
+                }},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def run_job(self, job: ScheduledJob, force: bool = False) -> dict:
+        if not await self._acquire_lease(job, force):
+            job.metrics["skipped"] += 1
+            return {"job": job.name, "status": "skipped"}
+
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        job.metrics["last_started_at"] = started_at.isoformat()
+        result = None
+        error = None
+        self.running.add(job.name)
+        try:
+            result = await asyncio.wait_for(job.func(), timeout=job.timeout)
+            status = "success"
+        except asyncio.TimeoutError:
+            status = "timeout"
+            error = f"Timed out after {job.timeout}s"
+            job.metrics["timeouts"] += 1
+        except Exception as e:
+            status = "failed"
+            error = str(e)
+            job.metrics["failures"] += 1
+            logger.exception(f"Job {job.name} failed")
+        finally:
+            self.running.discard(job.name)
+
+        finished_at = datetime.now(timezone.utc)
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        job.metrics["runs"] += 1
+        job.metrics["last_duration_ms"] = duration_ms
+        job.metrics["last_status"] = status
+        job.metrics["last_error"] = error
+
+        await db.scheduler_leases.update_one(
+            {"_id": job.name, "owner": WORKER_ID},
+            {"$set": {
+                "lease_until": finished_at,
+                "next_run_at": job.next_run(finished_at),
+                "last_status": status,
+                "last_finished_at": finished_at
+            }}
+        )
+        run = {
+            "job": job.name,
+            "worker": WORKER_ID,
+            "status": status,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "duration_ms": duration_ms,
+            "result": result if isinstance(result, dict) else None,
+            "error": error
+        }
+        await db.job_runs.insert_one(dict(run))
+        return serialize_datetime(run)
+
+scheduler = JobScheduler()
+
+async def backfill_user_search_keys() -> dict:
+    """Compute search_keys for users created before they existed"""
+    updated = 0
+    while True:
+        users = await db.users.find(
+            {"search_keys": {"$exists": False}}, {"_id": 0, "id": 1, "email": 1, "first_name": 1, "last_name": 1}
+        ).limit(1000).to_list(1000)
+        if not users:
+            return {"updated": updated}
+        await db.users.bulk_write([
+            UpdateOne({"id": u["id"]}, {"$set": {"search_keys": user_search_keys(u)}}) for u in users
+        ], ordered=False)
+        updated += len(users)
+
+async def cleanup_expired_tokens() -> dict:
+    """Drop expired email verification and password reset tokens"""
+    now = datetime.now(timezone.utc).isoformat()
+    verification = await db.users.update_many(
+        {"verification_token_expires": {"$lt": now}},
+        {"$unset": {"verification_token": "", "verification_token_expires": ""}}
+    )
+    reset = await db.users.update_many(
+        {"reset_token_expires": {"$lt": now}},
+        {"$unset": {"reset_token": "", "reset_token_expires": ""}}
+    )
+    return {"verification_tokens": verification.modified_count, "reset_tokens": reset.modified_count}
+
+# ============== QUERY DIAGNOSTICS ==============
+
+def summarize_plan(explain: dict) -> dict:
+    """Stages, indexes and examined counts of an executionStats explain"""
+    stats = explain.get("executionStats", {})
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # Aggregations nest the query planner inside the $cursor stage, $geoNear ones in $geoNearCursor
+        for stage in explain.get("stages", []):
+            cursor = stage.get("$cursor") or stage.get("$geoNearCursor")
+            if cursor:
+                planner = cursor.get("queryPlanner")
+                stats = cursor.get("executionStats", stats)
+                break
+    stages = []
+    indexes = []
+    plan = (planner or {}).get("winningPlan", {})
+    # Depth-first over every branch, so a scan under one $or branch is not missed
+    pending = [plan.get("queryPlan", plan)]
+    while pending:
+        plan = pending.pop()
+        if not plan:
+            continue
+        stages.append(plan.get("stage"))
+        if plan.get("indexName"):
+            indexes.append(plan["indexName"])
+        pending += reversed([plan.get("inputStage")] + plan.get("inputStages", []))
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis")
+    }
+
+async def explain_command(database: str, command_name: str, command) -> dict:
+    """executionStats explain of a captured find, aggregate, count or distinct command"""
+    explained = {command_name: command[command_name]}
+    for field in ["filter", "sort", "projection", "limit", "skip", "hint", "pipeline", "query", "key", "collation"]:
+        if field in command:
+            explained[field] = command[field]
+    if command_name == "aggregate":
+        explained["cursor"] = {}
+    return await client[database].command({"explain": explained, "verbosity": "executionStats"})
+
+async def capture_explain(shape_key: str, database: str, command_name: str, command):
+    """Store the executionStats plan summary for a newly seen slow query shape"""
+    if await db.slow_queries.count_documents({"_id": shape_key, "plan": {"$exists": True}}, limit=1):
+        return
+    try:
+        explain = await explain_command(database, command_name, command)
+    except Exception as e:
+        logger.warning(f"Explain failed for slow query {shape_key}: {e}")
+        return
+    await db.slow_queries.update_one(
+        {"_id": shape_key},
+        {"$set": {"plan": summarize_plan(explain), "explained_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+async def flush_slow_queries() -> dict:
+    """Merge this worker's slow-query aggregates into the shared slow_queries collection"""
+    drained = mongo_monitor.drain_slow_queries()
+    if drained:
+        await db.slow_queries.bulk_write([
+            UpdateOne(
+                {"_id": shape_key},
+                {
+                    # $set rather than $setOnInsert: capture_explain may have created the document
+                    "$set": {
+                        **{k: entry[k] for k in ["database", "collection", "command"]},
+                        "shape": json.dumps(entry["shape"], sort_keys=True, default=str),
+                        "last_seen": entry["last_seen"]
+                    },
+                    "$inc": {"count": entry["count"], "total_ms": entry["total_ms"]},
+                    "$max": {"max_ms": entry["max_ms"]},
+                    "$addToSet": {"routes": {"$each": sorted(entry["routes"])}}
+                },
+                upsert=True
+            )
+            for shape_key, entry in drained.items()
+        ], ordered=False)
+    return {"shapes": len(drained)}
+
+async def flush_slow_queries_periodically():
+    """Runs on every worker: each one holds its own aggregates in memory"""
+    while True:
+        await asyncio.sleep(SLOW_QUERY_FLUSH_SECONDS * random.uniform(0.9, 1.1))
+        try:
+            await flush_slow_queries()
+        except Exception:
+            logger.exception("Slow-query flush failed")
+
+# ============== HEALTH CHECKS ==============
+
+class HealthMonitor:
+    """Dependency checks behind /health/ready.
+
+    The result is cached for HEALTH_CACHE_SECONDS and concurrent probes share
+    a single check, so load balancer polling cannot pile up Mongo pings.
+    Storage probes reuse one httpx client for the life of the worker.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.cached: Optional[dict] = None
+        self.cached_at = 0.0
+        self.loop_lag_ms = 0.0
+        self.lag_samples = deque(maxlen=int(HEALTH_LOOP_LAG_WINDOW_SECONDS / HEALTH_LOOP_LAG_INTERVAL_SECONDS))
+        self.lag_task: Optional[asyncio.Task] = None
+        self.http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def max_loop_lag_ms(self) -> float:
+        return max(self.lag_samples, default=0.0)
+
+    async def _sample_loop_lag(self, interval: float = HEALTH_LOOP_LAG_INTERVAL_SECONDS):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag_ms = max((time.perf_counter() - started - interval) * 1000, 0.0)
+            self.lag_samples.append(self.loop_lag_ms)
+
+    def start(self):
+        self.http = httpx.AsyncClient(timeout=HEALTH_STORAGE_TIMEOUT_SECONDS)
+        self.lag_task = asyncio.create_task(self._sample_loop_lag())
+
+    async def stop(self):
+        if self.lag_task:
+            self.lag_task.cancel()
+            await asyncio.gather(self.lag_task, return_exceptions=True)
+        if self.http:
+            await self.http.aclose()
+
+    async def check_mongo(self) -> dict:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(db.command("ping"), HEALTH_MONGO_TIMEOUT_SECONDS)
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+        max_pool_size = client.options.pool_options.max_pool_size
+        pools = {
+            address: {**pool, "available": max(max_pool_size - pool["checked_out"], 0), "max_size": max_pool_size}
+            for address, pool in pool_monitor.snapshot().items()
+        }
+        # Every connection checked out with requests queuing behind them
+        exhausted = any(p["checked_out"] >= max_pool_size and p["waiting"] > 0 for p in pools.values())
+        return {"ok": not exhausted, "latency_ms": round((time.perf_counter() - started) * 1000, 2), "pools": pools}
+
+    async def check_storage(self) -> dict:
+        if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+            return {"ok": True, "backend": "inline"}
+        started = time.perf_counter()
+        try:
+            response = await self.http.get(
+                f"{SUPABASE_URL}/storage/v1/bucket",
+                headers={"Authorization": f"Bearer {SUPABASE_ANON_KEY}", "apikey": SUPABASE_ANON_KEY}
+            )
+        except httpx.HTTPError as e:
+            return {"ok": False, "backend": "supabase", "error": str(e) or type(e).__name__}
+        return {
+            "ok": response.status_code < 500,
+            "backend": "supabase",
+            "status_code": response.status_code,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    async def check(self) -> dict:
+        async with self.lock:
+            if self.cached and time.monotonic() - self.cached_at < HEALTH_CACHE_SECONDS:
+                return self.cached
+            mongo, storage = await asyncio.gather(self.check_mongo(), self.check_storage())
+            loop_ok = self.loop_lag_ms < HEALTH_MAX_LOOP_LAG_MS
+            queues = {
+                **{f"{name}_pool": pool_queue_depth[name] for name in EXECUTOR_POOLS},
+                "running_jobs": sorted(scheduler.running),
+                "public_snapshot_rebuilding": bool(public_showcase.rebuild_task and not public_showcase.rebuild_task.done())
+            }
+            if "latency_ms" in mongo:
+                queues["email_digest_buffer"] = await db.email_digest_buffer.estimated_document_count()
+            self.cached = {
+                # Uploads fall back to inline storage, so storage alone only degrades
+                "status": "ready" if mongo["ok"] and loop_ok else "unavailable",
+                "degraded": not storage["ok"],
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "worker": WORKER_ID,
+                "checks": {
+                    "mongo": mongo,
+                    "storage": storage,
+                    "event_loop": {"ok": loop_ok, "lag_ms": round(self.loop_lag_ms, 2), "max_lag_ms": round(self.max_loop_lag_ms, 2)},
+                    "queues": queues
+                }
+            }
+            self.cached_at = time.monotonic()
+            return self.cached
+
+health_monitor = HealthMonitor()
+
 # ============== AUTH ROUTES ==============
 
 @api_router.post("/auth/register", response_model=UserResponse)
@@ -486,13 +3364,14 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=400, detail="Cet email est déjà utilisé")
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_in_pool("password_hash", get_password_hash, user_data.password)
     user_dict = user_data.model_dump()
     user_dict.pop("password")
     
     user = User(**user_dict)
     user_doc = serialize_datetime(user.model_dump())
     user_doc["password_hash"] = hashed_password
+    user_doc["search_keys"] = user_search_keys(user_doc)
     
     # Create verification token
     verification_token = create_verification_token()
@@ -504,7 +3383,7 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
     # Send verification email
     background_tasks.add_task(send_verification_email, user.email, verification_token)
     
-    logger.info(f"New user registered: {user.email} with role {user.role}")
+    logger.debug("New user registered", extra={"user_id": user.id, "role": user.role.value})
     
     return UserResponse(**user.model_dump())
 
@@ -515,12 +3394,26 @@ async def login(login_data: LoginRequest):
     if not user_doc:
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     
-    if not verify_password(login_data.password, user_doc.get("password_hash", "")):
+    try:
+        verified, new_hash = await run_in_pool(
+            "password_hash", pwd_context.verify_and_update, login_data.password, user_doc.get("password_hash", "")
+        )
+    except ValueError:
+        # No password set, or a hash in a scheme this server cannot verify
+        verified = False
+    if not verified:
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     
     if not user_doc.get("is_active", True):
         raise HTTPException(status_code=401, detail="Votre compte a été désactivé")
     
+    # Upgrade hashes made with an older scheme or cost
+    if new_hash:
+        await db.users.update_one(
+            {"id": user_doc["id"], "password_hash": user_doc["password_hash"]},
+            {"$set": {"password_hash": new_hash}}
+        )
+    
     # Create access token
     access_token = create_access_token(data={"sub": user_doc["id"]})
     
@@ -600,7 +3493,7 @@ async def reset_password(data: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail="Token de réinitialisation expiré")
     
     # Update password
-    hashed_password = get_password_hash(data.new_password)
+    hashed_password = await run_in_pool("password_hash", get_password_hash, data.new_password)
     await db.users.update_one(
         {"id": user_doc["id"]},
         {
@@ -631,6 +3524,8 @@ async def update_profile(update_data: UserUpdate, current_user: User = Depends(g
     """Update current user profile"""
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    if "first_name" in update_dict or "last_name" in update_dict:
+        update_dict["search_keys"] = user_search_keys({**current_user.model_dump(), **update_dict})
     
     await db.users.update_one(
         {"id": current_user.id},
@@ -640,20 +3535,36 @@ async def update_profile(update_data: UserUpdate, current_user: User = Depends(g
     updated_user = await db.users.find_one({"id": current_user.id})
     return UserResponse(**deserialize_datetime(updated_user, ["created_at", "updated_at"]))
 
+@api_router.get("/users/me/summary", response_model=DashboardSummary)
+async def get_my_summary(current_user: User = Depends(get_current_user)):
+    """Dashboard counters of the current user, read from user_counters"""
+    counter_ids = [current_user.id]
+    if current_user.role != UserRole.CITIZEN:
+        counter_ids.append(GLOBAL_COUNTERS_ID)
+    counters = {doc["_id"]: doc.get("projects") or {} for doc in await db.user_counters.find({"_id": {"$in": counter_ids}}).to_list(2)}
+
+    own = {status: count for status, count in counters.get(current_user.id, {}).items() if count}
+    summary = DashboardSummary(
+        projects_by_status=own,
+        total_projects=sum(own.values()),
+        documents_requested=own.get(ProjectStatus.DOCUMENTS_REQUESTED.value, 0)
+    )
+    if current_user.role != UserRole.CITIZEN:
+        queue = {status: count for status, count in counters.get(GLOBAL_COUNTERS_ID, {}).items() if count}
+        summary.review_queue = queue
+        # Officials validate pending projects, admins also approve validated ones
+        awaiting = [ProjectStatus.PENDING] if current_user.role == UserRole.OFFICIAL else [ProjectStatus.PENDING, ProjectStatus.VALIDATED]
+        summary.pending_reviews = sum(queue.get(status.value, 0) for status in awaiting)
+    return summary
+
 @api_router.post("/users/upload-avatar")
 async def upload_avatar(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
     """Upload user avatar"""
-    if file.size > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Fichier trop volumineux (max 5Mo)")
-    
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Seules les images sont acceptées")
-    
-    content = await file.read()
-    file_url = await upload_to_supabase(content, file.filename, file.content_type)
+    content, metadata = await validate_upload(file, IMAGE_TYPES)
+    file_url = await upload_to_supabase(content, file.filename, metadata["file_type"])
     
     await db.users.update_one(
         {"id": current_user.id},
@@ -672,15 +3583,8 @@ async def upload_identity_document(
     current_user: User = Depends(get_current_user)
 ):
     """Upload identity document"""
-    if file.size > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Fichier trop volumineux (max 5Mo)")
-    
-    allowed_types = ["application/pdf", "image/jpeg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Format non accepté (PDF ou images uniquement)")
-    
-    content = await file.read()
-    file_url = await upload_to_supabase(content, file.filename, file.content_type)
+    content, metadata = await validate_upload(file, DOCUMENT_TYPES)
+    file_url = await upload_to_supabase(content, file.filename, metadata["file_type"])
     
     identity_doc = IdentityDocument(
         type=doc_type,
@@ -710,11 +3614,15 @@ async def create_project(project_data: ProjectCreate, current_user: User = Depen
     
     project = Project(
         user_id=current_user.id,
+        region=current_user.region,
         **project_data.model_dump()
     )
+    locate_project(project)
     
     doc = serialize_datetime(project.model_dump())
     await db.projects.insert_one(doc)
+    await update_user_counters([(project.user_id, None, ProjectStatus.DRAFT)])
+    await index_project_signature(doc)
     
     # Create history entry
     history = ProjectHistory(
@@ -733,15 +3641,24 @@ async def get_projects(
     status: Optional[ProjectStatus] = None,
     category: Optional[ProjectCategory] = None,
     search: Optional[str] = None,
+    sort_by: ProjectSortField = ProjectSortField.CREATED_AT,
+    sort_order: str = Query("desc", enum=["asc", "desc"]),
+    ids: Optional[str] = Query(None, description="Comma-separated project ids"),
+    near: Optional[str] = Query(None, description="latitude,longitude or a locality name"),
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM),
+    within: Optional[str] = Query(None, description="Bounding box min_lon,min_lat,max_lon,max_lat"),
     current_user: User = Depends(get_current_user)
 ):
     """Get projects based on user role"""
     query = {}
+    if sort_by == ProjectSortField.DISTANCE and not near:
+        raise HTTPException(status_code=400, detail="Le tri par distance nécessite near")
+    area = spatial_filter(near, radius_km, within)
     
     # Filter based on role
     if current_user.role == UserRole.CITIZEN:
         query["user_id"] = current_user.id
-    elif current_user.role == UserRole.OFFICIAL:
+    elif current_user.role == UserRole.OFFICIAL and not ids:
         # Officials see pending and assigned projects
         query["$or"] = [
             {"status": {"$in": [ProjectStatus.PENDING, ProjectStatus.DOCUMENTS_REQUESTED, ProjectStatus.VALIDATED]}},
@@ -759,17 +3676,48 @@ async def get_projects(
             {"description": {"$regex": search, "$options": "i"}}
         ]
     
-    projects = await db.projects.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
+    direction = 1 if sort_order == "asc" else -1
+    if ids:
+        # Batch lookup for dashboards: same access rules as GET /projects/{id}, within the area if any
+        project_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+        if len(project_ids) > PROJECT_BATCH_MAX_IDS:
+            raise HTTPException(status_code=400, detail=f"Trop d'identifiants (max {PROJECT_BATCH_MAX_IDS})")
+        projects = await find_projects(project_ids, {**query, **area})
+        # Returned in the order the ids were requested
+        projects.sort(key=lambda p: project_ids.index(p["id"]))
+    elif sort_by == ProjectSortField.DISTANCE:
+        # $geoNear walks the 2dsphere index outwards from the point, nearest first
+        point = parse_near(near)
+        projects = await db.projects.aggregate([
+            {"$geoNear": {
+                "near": point.model_dump(),
+                "key": "geo",
+                "distanceField": "distance_km",
+                "distanceMultiplier": 0.001,
+                "maxDistance": radius_km * 1000,
+                "query": query,
+                "spherical": True
+            }},
+            {"$limit": 1000},
+            {"$project": {"_id": 0}}
+        ]).to_list(1000)
+        for p in projects:
+            p["distance_km"] = round(p["distance_km"], 2)
+    else:
+        query.update(area)
+        projects = await db.projects.find(query, {"_id": 0}, **geo_hint(query)).sort(
+            [(sort_by.value, direction), ("created_at", -1)]
+        ).to_list(1000)
     
     for p in projects:
-        deserialize_datetime(p, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at"])
+        deserialize_datetime(p, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at", "rejected_at"])
     
     return projects
 
 @api_router.get("/projects/{project_id}", response_model=Project)
 async def get_project(project_id: str, current_user: User = Depends(get_current_user)):
     """Get project details"""
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+    project = await find_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
     
@@ -777,9 +3725,29 @@ async def get_project(project_id: str, current_user: User = Depends(get_current_
     if current_user.role == UserRole.CITIZEN and project["user_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
     
-    deserialize_datetime(project, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at"])
+    deserialize_datetime(project, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at", "rejected_at"])
     return Project(**project)
 
+@api_router.get("/projects/{project_id}/full", response_model=ProjectFull)
+async def get_project_full(project_id: str, current_user: User = Depends(get_current_user)):
+    """Project with its owner, comments, history and the caller's unread count in one call"""
+    project = await find_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+    
+    if current_user.role == UserRole.CITIZEN and project["user_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Accès non autorisé")
+    
+    owner, comments, history, unread = await asyncio.gather(
+        db.users.find_one({"id": project["user_id"]}, {"_id": 0, "id": 1, "email": 1, "first_name": 1, "last_name": 1, "role": 1}),
+        load_project_comments(project),
+        load_project_history(project),
+        db.notifications.count_documents({"user_id": current_user.id, "is_read": False})
+    )
+    
+    deserialize_datetime(project, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at", "rejected_at"])
+    return ProjectFull(project=Project(**project), owner=owner, comments=comments, history=history, unread_notifications=unread)
+
 @api_router.put("/projects/{project_id}", response_model=Project)
 async def update_project(
     project_id: str,
@@ -798,20 +3766,29 @@ async def update_project(
         if project["status"] not in [ProjectStatus.DRAFT, ProjectStatus.DOCUMENTS_REQUESTED]:
             raise HTTPException(status_code=400, detail="Ce projet ne peut plus être modifié")
     
+    now = datetime.now(timezone.utc)
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict["updated_at"] = now.isoformat()
+    if "location" in update_dict and "geo" not in update_dict:
+        point = geocode(update_dict["location"])
+        update_dict["geo"] = point.model_dump() if point else None
+    if any(field in update_dict for field in BUDGET_SCORED_FIELDS):
+        # Stale until the next scoring run recomputes it
+        update_dict["anomaly_score"] = None
+        update_dict["budget_analysis"] = None
     
     # Track status change
     old_status = project.get("status")
     new_status = update_dict.get("status", old_status)
+    if old_status != new_status and new_status in STATUS_TIMESTAMPS:
+        update_dict[STATUS_TIMESTAMPS[new_status]] = now.isoformat()
     
-    await db.projects.update_one(
-        {"id": project_id},
-        {"$set": serialize_datetime(update_dict)}
-    )
+    changes = serialize_datetime(update_dict)
+    await update_project_in_status(project, changes)
     
     # Create history entry if status changed
     if old_status != new_status:
+        await after_project_transition([project], new_status, now, changes)
         history = ProjectHistory(
             project_id=project_id,
             user_id=current_user.id,
@@ -823,7 +3800,9 @@ async def update_project(
         await db.project_history.insert_one(serialize_datetime(history.model_dump()))
     
     updated_project = await db.projects.find_one({"id": project_id}, {"_id": 0})
-    deserialize_datetime(updated_project, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at"])
+    if any(field in update_dict for field in ["title", "description", "objectives"]):
+        await index_project_signature(updated_project)
+    deserialize_datetime(updated_project, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at", "rejected_at"])
     return Project(**updated_project)
 
 @api_router.post("/projects/{project_id}/submit")
@@ -839,14 +3818,19 @@ async def submit_project(project_id: str, current_user: User = Depends(get_curre
     if project["status"] not in [ProjectStatus.DRAFT, ProjectStatus.DOCUMENTS_REQUESTED]:
         raise HTTPException(status_code=400, detail="Ce projet ne peut pas être soumis")
     
-    await db.projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "status": ProjectStatus.PENDING,
-            "submitted_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    # Flag likely duplicates for reviewers
+    duplicates = await find_duplicate_projects(project)
+    
+    now = datetime.now(timezone.utc)
+    changes = {
+        "status": ProjectStatus.PENDING,
+        "submitted_at": now.isoformat(),
+        "updated_at": now.isoformat(),
+        "duplicate_score": max((d.score for d in duplicates), default=None),
+        "duplicate_candidates": [d.model_dump() for d in duplicates]
+    }
+    await update_project_in_status(project, changes)
+    await after_project_transition([project], ProjectStatus.PENDING, now, changes)
     
     # Create history entry
     history = ProjectHistory(
@@ -870,7 +3854,7 @@ async def submit_project(project_id: str, current_user: User = Depends(get_curre
             {"project_id": project_id}
         )
     
-    return {"message": "Projet soumis avec succès"}
+    return {"message": "Projet soumis avec succès", "duplicates": [d.model_dump() for d in duplicates]}
 
 @api_router.post("/projects/{project_id}/validate")
 async def validate_project(project_id: str, current_user: User = Depends(get_official_or_admin)):
@@ -882,15 +3866,15 @@ async def validate_project(project_id: str, current_user: User = Depends(get_off
     if project["status"] != ProjectStatus.PENDING:
         raise HTTPException(status_code=400, detail="Ce projet ne peut pas être validé")
     
-    await db.projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "status": ProjectStatus.VALIDATED,
-            "validated_at": datetime.now(timezone.utc).isoformat(),
-            "assigned_official_id": current_user.id,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    now = datetime.now(timezone.utc)
+    changes = {
+        "status": ProjectStatus.VALIDATED,
+        "validated_at": now.isoformat(),
+        "assigned_official_id": current_user.id,
+        "updated_at": now.isoformat()
+    }
+    await update_project_in_status(project, changes)
+    await after_project_transition([project], ProjectStatus.VALIDATED, now, changes)
     
     # Create history
     history = ProjectHistory(
@@ -924,14 +3908,14 @@ async def approve_project(project_id: str, current_user: User = Depends(get_admi
     if project["status"] != ProjectStatus.VALIDATED:
         raise HTTPException(status_code=400, detail="Ce projet doit d'abord être validé")
     
-    await db.projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "status": ProjectStatus.APPROVED,
-            "approved_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    now = datetime.now(timezone.utc)
+    changes = {
+        "status": ProjectStatus.APPROVED,
+        "approved_at": now.isoformat(),
+        "updated_at": now.isoformat()
+    }
+    await update_project_in_status(project, changes)
+    await after_project_transition([project], ProjectStatus.APPROVED, now, changes)
     
     # Create history
     history = ProjectHistory(
@@ -971,14 +3955,15 @@ async def reject_project(
     
     old_status = project["status"]
     
-    await db.projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "status": ProjectStatus.REJECTED,
-            "rejection_reason": reason,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    now = datetime.now(timezone.utc)
+    changes = {
+        "status": ProjectStatus.REJECTED,
+        "rejection_reason": reason,
+        "rejected_at": now.isoformat(),
+        "updated_at": now.isoformat()
+    }
+    await update_project_in_status(project, changes)
+    await after_project_transition([project], ProjectStatus.REJECTED, now, changes)
     
     # Create history
     history = ProjectHistory(
@@ -1016,15 +4001,15 @@ async def request_documents(
     if project["status"] != ProjectStatus.PENDING:
         raise HTTPException(status_code=400, detail="Documents ne peuvent être demandés qu'en attente de validation")
     
-    await db.projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "status": ProjectStatus.DOCUMENTS_REQUESTED,
-            "documents_request_reason": reason,
-            "assigned_official_id": current_user.id,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    now = datetime.now(timezone.utc)
+    changes = {
+        "status": ProjectStatus.DOCUMENTS_REQUESTED,
+        "documents_request_reason": reason,
+        "assigned_official_id": current_user.id,
+        "updated_at": now.isoformat()
+    }
+    await update_project_in_status(project, changes)
+    await after_project_transition([project], ProjectStatus.DOCUMENTS_REQUESTED, now, changes)
     
     # Create history
     history = ProjectHistory(
@@ -1062,22 +4047,10 @@ async def upload_project_document(
     if project["user_id"] != current_user.id and current_user.role not in [UserRole.OFFICIAL, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
     
-    if file.size > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Fichier trop volumineux (max 5Mo)")
-    
-    allowed_types = ["application/pdf", "image/jpeg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Format non accepté (PDF ou images uniquement)")
-    
-    content = await file.read()
-    file_url = await upload_to_supabase(content, file.filename, file.content_type)
+    content, metadata = await validate_upload(file, DOCUMENT_TYPES)
+    file_url = await upload_to_supabase(content, file.filename, metadata["file_type"])
     
-    doc = ProjectDocument(
-        name=file.filename,
-        file_url=file_url,
-        file_type=file.content_type,
-        file_size=file.size
-    )
+    doc = ProjectDocument(name=file.filename, file_url=file_url, **metadata)
     
     await db.projects.update_one(
         {"id": project_id},
@@ -1112,31 +4085,37 @@ async def delete_project_document(
     if project["user_id"] != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
     
-    await db.projects.update_one(
+    result = await db.projects.update_one(
         {"id": project_id},
         {
             "$pull": {"documents": {"id": document_id}},
             "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
         }
     )
+    if result.modified_count:
+        await record_tombstones([
+            {"kind": TombstoneKind.DOCUMENT, "id": document_id, "project_id": project_id, "user_id": project["user_id"]}
+        ])
     
     return {"message": "Document supprimé"}
 
 @api_router.get("/projects/{project_id}/history", response_model=List[ProjectHistory])
 async def get_project_history(project_id: str, current_user: User = Depends(get_current_user)):
     """Get project history"""
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+    project = await find_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
     
     if current_user.role == UserRole.CITIZEN and project["user_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
     
-    history = await db.project_history.find({"project_id": project_id}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    
+    return await load_project_history(project)
+
+async def load_project_history(project: dict) -> List[dict]:
+    collection = db.project_history_archive if project.get("archived") else db.project_history
+    history = await collection.find({"project_id": project["id"]}, {"_id": 0}).sort("created_at", -1).to_list(100)
     for h in history:
         deserialize_datetime(h, ["created_at"])
-    
     return history
 
 # ============== COMMENTS ROUTES ==============
@@ -1180,18 +4159,20 @@ async def add_comment(
 @api_router.get("/projects/{project_id}/comments", response_model=List[Comment])
 async def get_comments(project_id: str, current_user: User = Depends(get_current_user)):
     """Get project comments"""
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+    project = await find_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
     
     if current_user.role == UserRole.CITIZEN and project["user_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
     
-    comments = await db.comments.find({"project_id": project_id}, {"_id": 0}).sort("created_at", 1).to_list(100)
-    
+    return await load_project_comments(project)
+
+async def load_project_comments(project: dict) -> List[dict]:
+    collection = db.comments_archive if project.get("archived") else db.comments
+    comments = await collection.find({"project_id": project["id"]}, {"_id": 0}).sort("created_at", 1).to_list(100)
     for c in comments:
         deserialize_datetime(c, ["created_at"])
-    
     return comments
 
 # ============== NOTIFICATIONS ROUTES ==============
@@ -1222,31 +4203,111 @@ async def get_unread_count(current_user: User = Depends(get_current_user)):
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, current_user: User = Depends(get_current_user)):
     """Mark notification as read"""
+    now = datetime.now(timezone.utc)
     result = await db.notifications.update_one(
-        {"id": notification_id, "user_id": current_user.id},
-        {"$set": {"is_read": True}}
+        {"id": notification_id, "user_id": current_user.id, "is_read": False},
+        # read_at is stored as a BSON date so the TTL index can expire it
+        {"$set": {"is_read": True, "read_at": now, "updated_at": now.isoformat()}}
     )
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Notification non trouvée")
+    if result.matched_count == 0:
+        exists = await db.notifications.count_documents({"id": notification_id, "user_id": current_user.id}, limit=1)
+        if not exists:
+            raise HTTPException(status_code=404, detail="Notification non trouvée")
     
     return {"message": "Notification marquée comme lue"}
 
 @api_router.put("/notifications/read-all")
 async def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
     """Mark all notifications as read"""
+    now = datetime.now(timezone.utc)
     await db.notifications.update_many(
         {"user_id": current_user.id, "is_read": False},
-        {"$set": {"is_read": True}}
+        {"$set": {"is_read": True, "read_at": now, "updated_at": now.isoformat()}}
     )
     return {"message": "Toutes les notifications marquées comme lues"}
 
+# ============== SYNC ROUTES ==============
+
+@api_router.get("/sync", response_model=SyncResponse)
+async def sync_changes(
+    since: Optional[str] = Query(None, description="Token returned by the previous sync"),
+    current_user: User = Depends(get_current_user)
+):
+    """Projects, comments, history, notifications and deletions changed since the last sync.
+
+    Without a token everything visible is returned. Changes close to the
+    token may be sent twice; clients apply them by id. When has_more is set,
+    call again with the returned token right away.
+    """
+    started = datetime.now(timezone.utc)
+    since_at = decode_sync_token(since) if since else None
+    if since_at and since_at < started - timedelta(days=SYNC_TOMBSTONE_TTL_DAYS):
+        raise HTTPException(status_code=410, detail="Jeton expiré, synchronisation complète nécessaire")
+    since_iso = since_at.isoformat() if since_at else None
+
+    # Same visibility as GET /projects/{id} and its comments and history
+    project_scope, related_scope, tombstone_scope = {}, {}, {"$or": [{"user_id": current_user.id}, {"kind": {"$ne": TombstoneKind.NOTIFICATIONS}}]}
+    if current_user.role == UserRole.CITIZEN:
+        project_scope = {"user_id": current_user.id}
+        own_ids = await db.projects.distinct("id", project_scope)
+        related_scope = {"project_id": {"$in": own_ids}}
+        tombstone_scope = {"user_id": current_user.id}
+
+    (projects, more_projects), (comments, more_comments), (history, more_history), (notifications, more_notifications), (deleted, more_deleted) = await asyncio.gather(
+        fetch_changes(db.projects, project_scope, "updated_at", since_iso),
+        fetch_changes(db.comments, related_scope, "created_at", since_iso),
+        fetch_changes(db.project_history, related_scope, "created_at", since_iso),
+        fetch_changes(db.notifications, {"user_id": current_user.id}, "updated_at", since_iso),
+        fetch_changes(db.sync_tombstones, tombstone_scope, "deleted_at", since_at)
+    )
+
+    # Resume from the oldest truncated stream, otherwise from now minus clock skew
+    watermarks = [
+        parse_timestamp(docs[-1][field])
+        for docs, more, field in [
+            (projects, more_projects, "updated_at"), (comments, more_comments, "created_at"),
+            (history, more_history, "created_at"), (notifications, more_notifications, "updated_at"),
+            (deleted, more_deleted, "deleted_at")
+        ]
+        if more
+    ]
+    token_at = min(watermarks) if watermarks else started - timedelta(seconds=SYNC_CLOCK_SKEW_SECONDS)
+    if since_at:
+        token_at = max(token_at, since_at)
+
+    for p in projects:
+        deserialize_datetime(p, ["created_at", "updated_at", "submitted_at", "validated_at", "approved_at", "rejected_at"])
+    for doc in comments + history:
+        deserialize_datetime(doc, ["created_at"])
+    for n in notifications:
+        deserialize_datetime(n, ["created_at", "updated_at"])
+    if since_at and NOTIFICATION_READ_TTL_DAYS > 0:
+        # The read_at TTL index deletes without leaving tombstones: send its watermark instead
+        deleted.append({
+            "kind": TombstoneKind.NOTIFICATIONS,
+            "read_before": (started - timedelta(days=NOTIFICATION_READ_TTL_DAYS)).isoformat(),
+            "deleted_at": started
+        })
+
+    return SyncResponse(
+        token=encode_sync_token(token_at),
+        has_more=bool(watermarks),
+        projects=projects,
+        comments=comments,
+        history=history,
+        notifications=notifications,
+        deleted=deleted
+    )
+
 # ============== ADMIN ROUTES ==============
 
 @api_router.get("/admin/users", response_model=List[UserResponse])
 async def admin_get_users(
     role: Optional[UserRole] = None,
     search: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
     current_user: User = Depends(get_admin_user)
 ):
     """Get all users (Admin only)"""
@@ -1254,19 +4315,32 @@ async def admin_get_users(
     if role:
         query["role"] = role
     if search:
-        query["$or"] = [
-            {"email": {"$regex": search, "$options": "i"}},
-            {"first_name": {"$regex": search, "$options": "i"}},
-            {"last_name": {"$regex": search, "$options": "i"}}
-        ]
+        query.update(user_search_query(search))
     
-    users = await db.users.find(query, {"_id": 0, "password_hash": 0}).to_list(1000)
+    users = await read_db("admin_get_users").users.find(
+        query, {"_id": 0, "password_hash": 0, "search_keys": 0}
+    ).skip(skip).limit(limit).to_list(limit)
     
     for u in users:
         deserialize_datetime(u, ["created_at", "updated_at"])
     
     return users
 
+@api_router.get("/admin/users/autocomplete", response_model=List[UserSummary])
+async def admin_autocomplete_users(
+    q: str = Query(..., min_length=1),
+    role: Optional[UserRole] = None,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_admin_user)
+):
+    """Prefix search over names and emails for autocompletion (Admin only)"""
+    query = user_search_query(q)
+    if role:
+        query["role"] = role
+    return await db.users.find(
+        query, {"_id": 0, "id": 1, "email": 1, "first_name": 1, "last_name": 1, "role": 1}
+    ).limit(limit).to_list(limit)
+
 @api_router.put("/admin/users/{user_id}", response_model=UserResponse)
 async def admin_update_user(
     user_id: str,
@@ -1291,46 +4365,405 @@ async def admin_update_user(
     
     return UserResponse(**updated_user)
 
+# Workflow transitions available to bulk operations, mirroring the single-project endpoints
+PROJECT_TRANSITIONS = {
+    BulkTransitionAction.VALIDATE: {
+        "from": [ProjectStatus.PENDING],
+        "to": ProjectStatus.VALIDATED,
+        "error": "Ce projet ne peut pas être validé",
+        "timestamp": "validated_at",
+        "assign": True,
+        "action": "Projet validé",
+        "notification": (NotificationType.PROJECT_VALIDATED, "Projet validé",
+                         "Votre projet '{title}' a été validé par un fonctionnaire.")
+    },
+    BulkTransitionAction.APPROVE: {
+        "from": [ProjectStatus.VALIDATED],
+        "to": ProjectStatus.APPROVED,
+        "error": "Ce projet doit d'abord être validé",
+        "timestamp": "approved_at",
+        "action": "Projet approuvé pour financement",
+        "notification": (NotificationType.PROJECT_APPROVED, "Projet approuvé !",
+                         "Félicitations ! Votre projet '{title}' a été approuvé pour financement.")
+    },
+    BulkTransitionAction.REJECT: {
+        "from": [ProjectStatus.PENDING, ProjectStatus.VALIDATED],
+        "to": ProjectStatus.REJECTED,
+        "error": "Ce projet ne peut pas être rejeté",
+        "timestamp": "rejected_at",
+        "reason_field": "rejection_reason",
+        "action": "Projet rejeté: {reason}",
+        "notification": (NotificationType.PROJECT_REJECTED, "Projet rejeté",
+                         "Votre projet '{title}' a été rejeté. Raison: {reason}")
+    },
+    BulkTransitionAction.REQUEST_DOCUMENTS: {
+        "from": [ProjectStatus.PENDING],
+        "to": ProjectStatus.DOCUMENTS_REQUESTED,
+        "error": "Documents ne peuvent être demandés qu'en attente de validation",
+        "reason_field": "documents_request_reason",
+        "assign": True,
+        "action": "Documents supplémentaires demandés: {reason}",
+        "notification": (NotificationType.DOCUMENTS_REQUESTED, "Documents supplémentaires requis",
+                         "Des documents supplémentaires sont nécessaires pour votre projet '{title}': {reason}")
+    }
+}
+
+@api_router.post("/admin/projects/bulk-transition", response_model=BulkOperationResponse)
+async def admin_bulk_transition_projects(
+    data: BulkProjectTransition,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_admin_user)
+):
+    """Apply the same workflow transition to many projects (Admin only)"""
+    transition = PROJECT_TRANSITIONS[data.action]
+    if "reason_field" in transition and not data.reason:
+        raise HTTPException(status_code=400, detail="Une raison est requise pour cette action")
+
+    project_ids = list(dict.fromkeys(data.project_ids))
+    projects = await db.projects.find(
+        {"id": {"$in": project_ids}},
+        {**PUBLIC_PROJECT_FIELDS, "user_id": 1, "status": 1, "submitted_at": 1}
+    ).to_list(None)
+    projects_by_id = {p["id"]: p for p in projects}
+
+    transitioned_at = datetime.now(timezone.utc)
+    now = transitioned_at.isoformat()
+    update = {"status": transition["to"], "updated_at": now}
+    if "timestamp" in transition:
+        update[transition["timestamp"]] = now
+    if "reason_field" in transition:
+        update[transition["reason_field"]] = data.reason
+    if transition.get("assign"):
+        update["assigned_official_id"] = current_user.id
+
+    errors = {}
+    candidates = []
+    operations = []
+    for project_id in project_ids:
+        project = projects_by_id.get(project_id)
+        if project is None:
+            errors[project_id] = "Projet non trouvé"
+        elif project["status"] not in transition["from"]:
+            errors[project_id] = transition["error"]
+        else:
+            # The status precondition is repeated in the filter to lose races safely
+            candidates.append(project_id)
+            operations.append(UpdateOne(
+                {"id": project_id, "status": {"$in": transition["from"]}},
+                {"$set": update}
+            ))
+
+    applied = []
+    if operations:
+        result = await db.projects.bulk_write(operations, ordered=False)
+        if result.modified_count == len(operations):
+            applied = candidates
+        else:
+            updated = await db.projects.find(
+                {"id": {"$in": candidates}, "status": transition["to"], "updated_at": now},
+                {"_id": 0, "id": 1}
+            ).to_list(None)
+            applied_ids = {p["id"] for p in updated}
+            applied = [pid for pid in candidates if pid in applied_ids]
+            for pid in candidates:
+                if pid not in applied_ids:
+                    errors[pid] = transition["error"]
+
+    if applied:
+        user_name = f"{current_user.first_name} {current_user.last_name}"
+        notif_type, notif_title, notif_message = transition["notification"]
+        history = []
+        notifications = []
+        for project_id in applied:
+            project = projects_by_id[project_id]
+            history.append(serialize_datetime(ProjectHistory(
+                project_id=project_id,
+                user_id=current_user.id,
+                user_name=user_name,
+                action=transition["action"].format(reason=data.reason),
+                old_status=project["status"],
+                new_status=transition["to"]
+            ).model_dump()))
+            notif_data = {"project_id": project_id}
+            if "reason_field" in transition:
+                notif_data["reason"] = data.reason
+            notifications.append(Notification(
+                user_id=project["user_id"],
+                type=notif_type,
+                title=notif_title,
+                message=notif_message.format(title=project["title"], reason=data.reason),
+                data=notif_data
+            ))
+
+        await db.project_history.insert_many(history, ordered=False)
+        await after_project_transition([projects_by_id[pid] for pid in applied], transition["to"], transitioned_at, update)
+        notifications = await create_notifications_bulk(notifications)
+        background_tasks.add_task(send_notification_emails, notifications)
+
+    results = [
+        BulkItemResult(id=pid, success=pid not in errors, error=errors.get(pid))
+        for pid in project_ids
+    ]
+    logger.info(f"Bulk {data.action.value}: {len(applied)} applied, {len(errors)} failed")
+    return BulkOperationResponse(succeeded=len(applied), failed=len(errors), results=results)
+
+@api_router.post("/admin/users/bulk-update", response_model=BulkOperationResponse)
+async def admin_bulk_update_users(data: BulkUserUpdate, current_user: User = Depends(get_admin_user)):
+    """Update role and status of many users (Admin only)"""
+    updates = {item.user_id: item for item in data.updates}
+    existing = await db.users.find({"id": {"$in": list(updates)}}, {"_id": 0, "id": 1}).to_list(None)
+    existing_ids = {u["id"] for u in existing}
+
+    now = datetime.now(timezone.utc).isoformat()
+    errors = {}
+    operations = []
+    for user_id, item in updates.items():
+        if user_id not in existing_ids:
+            errors[user_id] = "Utilisateur non trouvé"
+            continue
+        update_dict = {k: v for k, v in item.model_dump(exclude={"user_id"}).items() if v is not None}
+        update_dict["updated_at"] = now
+        operations.append(UpdateOne({"id": user_id}, {"$set": update_dict}))
+
+    if operations:
+        await db.users.bulk_write(operations, ordered=False)
+
+    results = [
+        BulkItemResult(id=uid, success=uid not in errors, error=errors.get(uid))
+        for uid in updates
+    ]
+    return BulkOperationResponse(succeeded=len(operations), failed=len(errors), results=results)
+
+@api_router.post("/admin/import/{kind}", response_model=ImportReport)
+async def admin_import(
+    kind: ImportKind,
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    current_user: User = Depends(get_admin_user)
+):
+    """Bulk import users or projects from a CSV or NDJSON file (Admin only)"""
+    fmt = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+    if fmt not in ["csv", "ndjson"]:
+        raise HTTPException(status_code=400, detail="Format non accepté (csv ou ndjson)")
+    return await import_records(kind, file.file, fmt, current_user)
+
+@api_router.get("/admin/analytics/funding")
+async def admin_funding_analytics(
+    group_by: List[AnalyticsDimension] = Query([AnalyticsDimension.REGION]),
+    region: Optional[str] = None,
+    category: Optional[ProjectCategory] = None,
+    month_from: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    month_to: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    near: Optional[str] = Query(None, description="latitude,longitude or a locality name"),
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM),
+    within: Optional[str] = Query(None, description="Bounding box min_lon,min_lat,max_lon,max_lat"),
+    current_user: User = Depends(get_admin_user)
+):
+    """Funding, approval rate and time-to-decision breakdowns (Admin only).
+
+    Served from the rollups, or computed from the matching projects when
+    near or within restrict the figures to an area.
+    """
+    area = spatial_filter(near, radius_km, within)
+    if area:
+        rows = await query_project_funding(group_by, area, region, category, month_from, month_to)
+    else:
+        rows = await query_funding_rollups(group_by, region, category, month_from, month_to)
+    return {"group_by": [d.value for d in group_by], "rows": rows}
+
+@api_router.post("/admin/analytics/rebuild")
+async def admin_rebuild_analytics(current_user: User = Depends(get_admin_user)):
+    """Rebuild the funding rollups from all projects (Admin only)"""
+    return await rebuild_funding_rollups()
+
+@api_router.post("/admin/projects/budget-scores")
+async def admin_score_budgets(current_user: User = Depends(get_admin_user)):
+    """Recompute budget anomaly scores for projects under review (Admin only)"""
+    return await score_project_budgets()
+
+@api_router.post("/admin/projects/geocode")
+async def admin_geocode_projects(retry_unmatched: bool = False, current_user: User = Depends(get_admin_user)):
+    """Geocode projects without coordinates from their location (Admin only)"""
+    return await geocode_projects(retry_unmatched)
+
+@api_router.post("/admin/projects/duplicates/rebuild")
+async def admin_rebuild_duplicate_index(current_user: User = Depends(get_admin_user)):
+    """Rebuild the near-duplicate similarity index (Admin only)"""
+    return await rebuild_project_signatures()
+
+@api_router.get("/admin/diagnostics/read-routing")
+async def admin_read_routing(current_user: User = Depends(get_admin_user)):
+    """Read preference per route and the servers that served each route's commands (Admin only)"""
+    primary = f"{client.primary[0]}:{client.primary[1]}" if client.primary else None
+    secondaries = {f"{host}:{port}" for host, port in client.secondaries}
+    commands = mongo_monitor.snapshot()
+    for servers in commands.values():
+        for server, stats in servers.items():
+            stats["role"] = "primary" if server == primary else "secondary" if server in secondaries else "unknown"
+    return {
+        "routes": READ_ROUTES,
+        "max_staleness_seconds": READ_MAX_STALENESS_SECONDS,
+        "topology": {"primary": primary, "secondaries": sorted(secondaries)},
+        "commands": commands
+    }
+
+@api_router.get("/admin/diagnostics/password-hashing")
+async def admin_password_hashing(current_user: User = Depends(get_admin_user)):
+    """Password hashing policy and login capacity of this worker (Admin only)"""
+    return password_hash_report
+
+def logging_settings() -> dict:
+    loggers = {"root": logging.root, **{
+        name: item for name, item in logging.root.manager.loggerDict.items()
+        if isinstance(item, logging.Logger) and item.level != logging.NOTSET
+    }}
+    return {
+        "levels": {name: logging.getLevelName(item.level) for name, item in sorted(loggers.items())},
+        "sampling": log_sampling.rates,
+        "queued": log_queue.qsize(),
+        "dropped": log_handler.dropped
+    }
+
+@api_router.get("/admin/diagnostics/logging")
+async def admin_get_logging(current_user: User = Depends(get_admin_user)):
+    """Log levels, sampling rates and queue state of this worker (Admin only)"""
+    return logging_settings()
+
+@api_router.put("/admin/diagnostics/logging")
+async def admin_update_logging(data: LoggingSettingsUpdate, current_user: User = Depends(get_admin_user)):
+    """Change log levels and sampling rates of this worker until restart (Admin only)"""
+    for name, level in data.levels.items():
+        if not isinstance(logging.getLevelName(level.upper()), int):
+            raise HTTPException(status_code=400, detail=f"Niveau de log inconnu: {level}")
+    if any(not 0 <= rate <= 1 for rate in data.sampling.values()):
+        raise HTTPException(status_code=400, detail="Taux d'échantillonnage entre 0 et 1")
+    for name, level in data.levels.items():
+        (logging.root if name == "root" else logging.getLogger(name)).setLevel(level.upper())
+    for name, rate in data.sampling.items():
+        if rate >= 1:
+            log_sampling.rates.pop(name, None)
+        else:
+            log_sampling.rates[name] = rate
+    logger.warning("Logging settings changed", extra={"levels": data.levels, "sampling": data.sampling, "by": current_user.id})
+    return logging_settings()
+
+@api_router.get("/admin/diagnostics/slow-queries")
+async def admin_slow_queries(
+    sort_by: str = Query("total_ms", enum=["total_ms", "max_ms", "count"]),
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_admin_user)
+):
+    """Top slow query shapes with their explain plans (Admin only)"""
+    await flush_slow_queries()
+    queries = await db.slow_queries.find({}).sort(sort_by, -1).limit(limit).to_list(limit)
+    for query in queries:
+        query["shape_id"] = query.pop("_id")
+        query["shape"] = json.loads(query.get("shape") or "{}")
+        query["avg_ms"] = round(query["total_ms"] / query["count"], 1) if query.get("count") else None
+    return {"threshold_ms": SLOW_QUERY_THRESHOLD_MS, "queries": serialize_datetime(queries)}
+
+@api_router.get("/admin/diagnostics/profiles")
+async def admin_list_profiles(
+    route: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_admin_user)
+):
+    """List captured request profiles, newest first (Admin only)"""
+    query = {"route": route} if route else {}
+    profiles = await db.request_profiles.find(
+        query, {"_id": 0, "summary": 0, "stats": 0}
+    ).sort("created_at", -1).limit(limit).to_list(limit)
+    return serialize_datetime(profiles)
+
+@api_router.get("/admin/diagnostics/profiles/{profile_id}")
+async def admin_get_profile(profile_id: str, current_user: User = Depends(get_admin_user)):
+    """Get a request profile with its top functions by cumulative time (Admin only)"""
+    profile = await db.request_profiles.find_one({"id": profile_id}, {"_id": 0, "stats": 0})
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    return serialize_datetime(profile)
+
+@api_router.get("/admin/diagnostics/profiles/{profile_id}/download")
+async def admin_download_profile(profile_id: str, current_user: User = Depends(get_admin_user)):
+    """Download the raw pstats file of a request profile (Admin only)"""
+    profile = await db.request_profiles.find_one({"id": profile_id}, {"_id": 0, "stats": 1})
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    return Response(
+        content=bytes(profile["stats"]),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+    )
+
+@api_router.get("/admin/jobs")
+async def admin_get_jobs(current_user: User = Depends(get_admin_user)):
+    """List background jobs with their lease state and recent runs (Admin only)"""
+    leases = await db.scheduler_leases.find({}).to_list(None)
+    leases_by_job = {lease.pop("_id"): serialize_datetime(lease) for lease in leases}
+    runs = await db.job_runs.find({}, {"_id": 0}).sort("started_at", -1).limit(50).to_list(50)
+    return {
+        "worker": WORKER_ID,
+        "enabled": SCHEDULER_ENABLED,
+        "jobs": [{**job.describe(), "lease": leases_by_job.get(name)} for name, job in scheduler.jobs.items()],
+        "recent_runs": serialize_datetime(runs)
+    }
+
+@api_router.post("/admin/jobs/{job_name}/run")
+async def admin_run_job(job_name: str, current_user: User = Depends(get_admin_user)):
+    """Run a background job now, unless another worker is running it (Admin only)"""
+    job = scheduler.jobs.get(job_name)
+    if not job:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    return await scheduler.run_job(job, force=True)
+
 @api_router.get("/admin/stats")
-async def admin_get_stats(current_user: User = Depends(get_admin_user)):
-    """Get dashboard statistics (Admin only)"""
+async def admin_get_stats(
+    near: Optional[str] = Query(None, description="latitude,longitude or a locality name"),
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM),
+    within: Optional[str] = Query(None, description="Bounding box min_lon,min_lat,max_lon,max_lat"),
+    current_user: User = Depends(get_admin_user)
+):
+    """Get dashboard statistics; near/within restrict the project figures to an area (Admin only)"""
+    reporting_db = read_db("admin_get_stats")
+    scope = spatial_filter(near, radius_km, within)
     # User stats
-    total_users = await db.users.count_documents({})
-    citizens = await db.users.count_documents({"role": UserRole.CITIZEN})
-    officials = await db.users.count_documents({"role": UserRole.OFFICIAL})
-    verified_users = await db.users.count_documents({"is_verified": True})
+    total_users = await reporting_db.users.count_documents({})
+    citizens = await reporting_db.users.count_documents({"role": UserRole.CITIZEN})
+    officials = await reporting_db.users.count_documents({"role": UserRole.OFFICIAL})
+    verified_users = await reporting_db.users.count_documents({"is_verified": True})
     
     # Project stats
-    total_projects = await db.projects.count_documents({})
+    total_projects = await reporting_db.projects.count_documents(scope, **geo_hint(scope))
     projects_by_status = {}
     for status in ProjectStatus:
-        count = await db.projects.count_documents({"status": status})
+        count = await reporting_db.projects.count_documents({**scope, "status": status}, **geo_hint(scope))
         projects_by_status[status.value] = count
     
     # Funding stats
     pipeline = [
-        {"$match": {"status": ProjectStatus.APPROVED}},
+        {"$match": {**scope, "status": ProjectStatus.APPROVED}},
         {"$group": {"_id": None, "total": {"$sum": "$funding_requested"}}}
     ]
-    result = await db.projects.aggregate(pipeline).to_list(1)
+    result = await reporting_db.projects.aggregate(pipeline, **geo_hint(scope)).to_list(1)
     total_funding_approved = result[0]["total"] if result else 0
     
     pipeline = [
-        {"$match": {"status": ProjectStatus.PENDING}},
+        {"$match": {**scope, "status": ProjectStatus.PENDING}},
         {"$group": {"_id": None, "total": {"$sum": "$funding_requested"}}}
     ]
-    result = await db.projects.aggregate(pipeline).to_list(1)
+    result = await reporting_db.projects.aggregate(pipeline, **geo_hint(scope)).to_list(1)
     total_funding_pending = result[0]["total"] if result else 0
     
     # Projects by category
     pipeline = [
+        {"$match": scope},
         {"$group": {"_id": "$category", "count": {"$sum": 1}}}
     ]
-    category_stats = await db.projects.aggregate(pipeline).to_list(100)
+    category_stats = await reporting_db.projects.aggregate(pipeline, **geo_hint(scope)).to_list(100)
     projects_by_category = {item["_id"]: item["count"] for item in category_stats}
     
     # Recent activity
-    recent_projects = await db.projects.find({}, {"_id": 0}).sort("created_at", -1).limit(5).to_list(5)
+    recent_projects = await reporting_db.projects.find(scope, {"_id": 0}, **geo_hint(scope)).sort("created_at", -1).limit(5).to_list(5)
     
     return {
         "users": {
@@ -1357,7 +4790,7 @@ async def admin_export_projects(
     current_user: User = Depends(get_admin_user)
 ):
     """Export projects data"""
-    projects = await db.projects.find({}, {"_id": 0}).to_list(10000)
+    projects = await read_db("admin_export_projects").projects.find({}, {"_id": 0}).to_list(10000)
     
     if format == "csv":
         import csv
@@ -1381,6 +4814,89 @@ async def admin_export_projects(
     
     return {"data": projects, "filename": "projects_export.json"}
 
+@api_router.post("/admin/maintenance/notifications/compact")
+async def admin_compact_notifications(current_user: User = Depends(get_admin_user)):
+    """Archive notifications beyond the per-user cap (Admin only)"""
+    return await compact_notifications()
+
+@api_router.post("/admin/projects/archive")
+async def admin_archive_projects(
+    months: int = Query(PROJECT_ARCHIVE_AFTER_MONTHS, ge=1),
+    current_user: User = Depends(get_admin_user)
+):
+    """Archive projects closed for more than the given number of months (Admin only)"""
+    return await archive_closed_projects(months)
+
+@api_router.post("/admin/projects/{project_id}/restore")
+async def admin_restore_project(project_id: str, current_user: User = Depends(get_admin_user)):
+    """Restore an archived project (Admin only)"""
+    if not await restore_archived_project(project_id):
+        raise HTTPException(status_code=404, detail="Projet archivé non trouvé")
+    return {"message": "Projet restauré"}
+
+@api_router.post("/admin/webhooks", response_model=WebhookSubscription)
+async def admin_create_webhook(data: WebhookSubscriptionCreate, current_user: User = Depends(get_admin_user)):
+    """Subscribe an endpoint to project events; the signing secret is only shown here (Admin only)"""
+    subscription = WebhookSubscription(
+        url=str(data.url),
+        events=data.events,
+        description=data.description,
+        max_concurrency=data.max_concurrency,
+        batch_size=data.batch_size,
+        secret=secrets.token_urlsafe(32),
+        created_by=current_user.id
+    )
+    await db.webhook_subscriptions.insert_one(serialize_datetime(subscription.model_dump()))
+    return subscription
+
+@api_router.get("/admin/webhooks", response_model=List[WebhookSubscription])
+async def admin_list_webhooks(current_user: User = Depends(get_admin_user)):
+    """List webhook subscriptions (Admin only)"""
+    subscriptions = await db.webhook_subscriptions.find({}, {"_id": 0, "secret": 0}).sort("created_at", -1).to_list(None)
+    return [deserialize_datetime(s, ["created_at"]) for s in subscriptions]
+
+@api_router.delete("/admin/webhooks/{subscription_id}")
+async def admin_delete_webhook(subscription_id: str, current_user: User = Depends(get_admin_user)):
+    """Delete a subscription and drop its undelivered events (Admin only)"""
+    result = await db.webhook_subscriptions.delete_one({"id": subscription_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Abonnement non trouvé")
+    await db.webhook_deliveries.delete_many({"subscription_id": subscription_id, "status": {"$ne": "delivered"}})
+    return {"message": "Abonnement supprimé"}
+
+@api_router.get("/admin/webhooks/{subscription_id}/deliveries")
+async def admin_webhook_deliveries(
+    subscription_id: str,
+    status: Optional[str] = Query(None, enum=["pending", "delivering", "delivered", "dead"]),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_admin_user)
+):
+    """Recent deliveries of a subscription, e.g. its dead letters (Admin only)"""
+    query = {"subscription_id": subscription_id}
+    if status:
+        query["status"] = status
+    deliveries = await db.webhook_deliveries.find(query).sort("created_at", -1).limit(limit).to_list(limit)
+    for delivery in deliveries:
+        delivery["id"] = delivery.pop("_id")
+    return serialize_datetime(deliveries)
+
+@api_router.post("/admin/webhooks/{subscription_id}/replay")
+async def admin_replay_webhooks(subscription_id: str, current_user: User = Depends(get_admin_user)):
+    """Requeue the dead-lettered deliveries of a subscription (Admin only)"""
+    result = await db.webhook_deliveries.update_many(
+        {"subscription_id": subscription_id, "status": "dead"},
+        {"$set": {"status": "pending", "attempts": 0, "next_attempt_at": datetime.now(timezone.utc)}, "$unset": {"dead_at": ""}}
+    )
+    return {"requeued": result.modified_count}
+
+@api_router.post("/admin/webhooks/{subscription_id}/ping")
+async def admin_ping_webhook(subscription_id: str, current_user: User = Depends(get_admin_user)):
+    """Queue a ping event to check an endpoint and its signature verification (Admin only)"""
+    if not await db.webhook_subscriptions.count_documents({"id": subscription_id}, limit=1):
+        raise HTTPException(status_code=404, detail="Abonnement non trouvé")
+    queued = await webhook_dispatcher.enqueue("ping", [{}], datetime.now(timezone.utc), [subscription_id])
+    return {"queued": queued}
+
 # ============== PUBLIC ROUTES ==============
 
 @api_router.get("/")
@@ -1392,10 +4908,384 @@ async def get_categories():
     """Get all project categories"""
     return [{"value": cat.value, "label": cat.value} for cat in ProjectCategory]
 
+@api_router.get("/public/projects")
+async def public_projects(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Approved projects for the public showcase, served from the cached snapshot"""
+    snapshot = await public_showcase.current()
+    headers = {
+        "ETag": snapshot["etag"],
+        "Cache-Control": f"public, max-age={PUBLIC_CACHE_MAX_AGE}, stale-while-revalidate={PUBLIC_CACHE_MAX_AGE * 6}",
+        "Vary": "Accept-Encoding"
+    }
+    if if_none_match and snapshot["etag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    if accept_encoding and "gzip" in accept_encoding:
+        return Response(content=snapshot["gzip"], media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=snapshot["body"], media_type="application/json", headers=headers)
+
 @api_router.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
+@api_router.get("/health/live")
+async def health_live():
+    """Liveness: the worker's event loop is answering, no dependency is touched"""
+    return {"status": "alive", "uptime_s": round(time.monotonic() - health_monitor.started_at)}
+
+@api_router.get("/health/ready")
+async def health_ready(response: Response):
+    """Readiness: Mongo, connection pool, storage, event loop and queue depths"""
+    result = await health_monitor.check()
+    if result["status"] != "ready":
+        response.status_code = 503
+    return result
+
+# ============== MIDDLEWARE ==============
+
+class RequestContextMiddleware:
+    """Exposes the current request to code running below it through request_context"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode() or uuid.uuid4().hex
+        started = time.perf_counter()
+        context = {"scope": scope, "request_id": request_id, "started": started}
+        token = request_context.set(context)
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if access_logger.isEnabledFor(logging.INFO):
+                access_logger.info("request", extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "mongo_commands": context.get("mongo_commands", 0),
+                    "mongo_ms": round(context.get("mongo_ms", 0.0), 2)
+                })
+            request_context.reset(token)
+
+class IdempotencyMiddleware:
+    """Replays the stored response of mutating requests retried with the same Idempotency-Key.
+
+    Keys are scoped to the authenticated user and bound to the method, path
+    and body hash of the first request (multipart bodies are hashed without
+    their boundary); reusing a key for a different request
+    is rejected with 422. The first request claims the key in idempotency_keys
+    for IDEMPOTENCY_LEASE_SECONDS and stores its response if it succeeded;
+    retries return it, and concurrent duplicates wait for the in-flight
+    request instead of running the handler again. Other responses release the
+    key so a corrected retry runs, and an expired claim can be taken over.
+    """
+
+    METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(self, app):
+        self.app = app
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        key = headers.get(b"idempotency-key", b"").decode()
+        user_id = self._user_id(headers.get(b"authorization", b"").decode())
+        if not key or not user_id:
+            await self.app(scope, receive, send)
+            return
+
+        key_id = hashlib.sha256(f"{user_id}:{key}".encode()).hexdigest()
+        body = await self._read_body(receive)
+        fingerprint = f"{scope['method']} {scope['path']} {self._body_digest(headers.get(b'content-type', b'').decode('latin-1'), body)}"
+        receive = self._replay_body(body, receive)
+
+        record = await db.idempotency_keys.find_one({"_id": key_id})
+        if record is None:
+            try:
+                await db.idempotency_keys.insert_one({
+                    "_id": key_id,
+                    "user_id": user_id,
+                    "request": fingerprint,
+                    "status": "in_progress",
+                    "lease_until": datetime.now(timezone.utc) + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+                    "created_at": datetime.now(timezone.utc)
+                })
+            except DuplicateKeyError:
+                record = await db.idempotency_keys.find_one({"_id": key_id})
+
+        if record is None:
+            await self._execute(key_id, scope, receive, send)
+            return
+
+        if record["request"] != fingerprint:
+            await self._send_json(send, 422, {"detail": "Clé d'idempotence déjà utilisée pour une autre requête"})
+            return
+
+        response = record.get("response")
+        if response is None and key_id not in self.inflight and await self._reclaim(key_id):
+            await self._execute(key_id, scope, receive, send)
+            return
+        response = response or await self._wait_for(key_id)
+        if response is None:
+            if await self._reclaim(key_id):
+                await self._execute(key_id, scope, receive, send)
+                return
+            await self._send_json(send, 409, {"detail": "Requête identique en cours de traitement"})
+            return
+        await self._replay(send, response)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return body
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                return body
+
+    @staticmethod
+    def _body_digest(content_type: str, body: bytes) -> str:
+        """Hash of the request body, taken part by part for multipart bodies.
+
+        Clients pick a new random boundary for every upload, so hashing the raw
+        bytes would reject the retry of an upload as a different request.
+        """
+        mime, _, params = content_type.partition(";")
+        boundary = ""
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "boundary":
+                boundary = value.strip('"')
+        if mime.strip().lower() != "multipart/form-data" or not boundary:
+            return hashlib.sha256(body).hexdigest()
+
+        digest = hashlib.sha256()
+        for part in body.split(b"--" + boundary.encode("latin-1"))[1:]:
+            if part.startswith(b"--"):
+                break
+            # The CRLF before the next delimiter belongs to the delimiter
+            part = part.removeprefix(b"\r\n").removesuffix(b"\r\n")
+            head, _, content = part.partition(b"\r\n\r\n")
+            for line in head.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                digest.update(name.strip().lower() + b":" + value.strip() + b"\n")
+            digest.update(hashlib.sha256(content).digest())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _replay_body(body: bytes, receive):
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return replay
+
+    @staticmethod
+    async def _reclaim(key_id: str) -> bool:
+        """Take over a claim whose lease ran out, e.g. after its worker crashed"""
+        now = datetime.now(timezone.utc)
+        claimed = await db.idempotency_keys.find_one_and_update(
+            {"_id": key_id, "status": "in_progress", "lease_until": {"$not": {"$gt": now}}},
+            {"$set": {"lease_until": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}}
+        )
+        return claimed is not None
+
+    @staticmethod
+    def _user_id(authorization: str) -> Optional[str]:
+        if not authorization.lower().startswith("bearer "):
+            return None
+        try:
+            return jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            return None
+
+    async def _execute(self, key_id: str, scope, receive, send):
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key_id] = future
+        response = {"status": 500, "headers": [], "body": b""}
+        body_size = 0
+
+        async def capture(message):
+            nonlocal body_size
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [k, v] for k, v in message.get("headers", [])
+                    if k.lower() not in (b"content-length", b"x-request-id")
+                ]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+                if body_size <= IDEMPOTENCY_MAX_BODY_BYTES:
+                    response["body"] += message.get("body", b"")
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, receive, capture)
+            if 200 <= response["status"] < 300 and body_size <= IDEMPOTENCY_MAX_BODY_BYTES:
+                stored = response
+        finally:
+            if stored:
+                await db.idempotency_keys.update_one(
+                    {"_id": key_id}, {"$set": {"status": "completed", "response": stored}}
+                )
+            else:
+                await db.idempotency_keys.delete_one({"_id": key_id})
+            self.inflight.pop(key_id, None)
+            future.set_result(stored)
+
+    async def _wait_for(self, key_id: str) -> Optional[dict]:
+        future = self.inflight.get(key_id)
+        if future is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), IDEMPOTENCY_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                return None
+
+        # In flight on another worker: poll the stored record
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+            record = await db.idempotency_keys.find_one({"_id": key_id}, {"response": 1})
+            if record is None:
+                return None
+            if record.get("response"):
+                return record["response"]
+        return None
+
+    @staticmethod
+    async def _replay(send, response: dict):
+        headers = [(bytes(k), bytes(v)) for k, v in response["headers"]]
+        headers.append((b"idempotency-replayed", b"true"))
+        await send({"type": "http.response.start", "status": response["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": bytes(response["body"])})
+
+    @staticmethod
+    async def _send_json(send, status: int, content: dict):
+        body = json.dumps(content).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+class ProfilingMiddleware:
+    """Profiles requests with cProfile when an admin sends X-Profile: 1, or at PROFILE_SAMPLE_RATE.
+
+    cProfile follows the event loop thread, so coroutines of concurrent
+    requests show up in the profile too; mongo_ms is exact since it comes
+    from the command listener through the request context. One request is
+    profiled at a time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.busy:
+            await self.app(scope, receive, send)
+            return
+
+        # Claimed before the role lookup awaits: two profilers must never be enabled at once
+        self.busy = True
+        profiled = False
+        try:
+            profiled = await self._should_profile(scope)
+        finally:
+            self.busy = profiled
+        if not profiled:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = str(uuid.uuid4())
+        status = {"code": 500}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", []).append((b"x-profile-id", profile_id.encode()))
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self.busy = False
+            duration_ms = (time.perf_counter() - started) * 1000
+            await self._store(profile_id, scope, status["code"], duration_ms, profiler)
+
+    async def _should_profile(self, scope) -> bool:
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile") == b"1":
+            user_id = IdempotencyMiddleware._user_id(headers.get(b"authorization", b"").decode())
+            if user_id:
+                user = await db.users.find_one({"id": user_id}, {"_id": 0, "role": 1})
+                return bool(user) and user.get("role") == UserRole.ADMIN
+            return False
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    @staticmethod
+    async def _store(profile_id: str, scope, status_code: int, duration_ms: float, profiler: cProfile.Profile):
+        context = request_context.get() or {}
+        stats = pstats.Stats(profiler)
+        summary = StringIO()
+        stats.stream = summary
+        stats.sort_stats("cumulative").print_stats(40)
+        endpoint = scope.get("endpoint")
+        mongo_ms = context.get("mongo_ms", 0.0)
+        await db.request_profiles.insert_one({
+            "id": profile_id,
+            "created_at": datetime.now(timezone.utc),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": endpoint.__name__ if endpoint else None,
+            "status_code": status_code,
+            "duration_ms": round(duration_ms, 1),
+            "mongo_ms": round(mongo_ms, 1),
+            "mongo_commands": context.get("mongo_commands", 0),
+            "python_ms": round(max(duration_ms - mongo_ms, 0), 1),
+            "summary": summary.getvalue(),
+            "stats": marshal.dumps(stats.stats)
+        })
+        overflow = await db.request_profiles.find({}, {"_id": 0, "created_at": 1}).sort(
+            "created_at", -1).skip(PROFILE_MAX_STORED).limit(1).to_list(1)
+        if overflow:
+            await db.request_profiles.delete_many({"created_at": {"$lte": overflow[0]["created_at"]}})
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1406,7 +5296,141 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestContextMiddleware)
+
+async def ensure_ttl_index(collection, field: str, expire_after_seconds: int):
+    """Create a TTL index, updating its expiry in place if the setting changed"""
+    try:
+        await collection.create_index(field, name=f"{field}_ttl", expireAfterSeconds=expire_after_seconds)
+    except OperationFailure:
+        await db.command({
+            "collMod": collection.name,
+            "index": {"name": f"{field}_ttl", "expireAfterSeconds": expire_after_seconds}
+        })
+
+@app.on_event("startup")
+async def ensure_indexes():
+    # Notifications: hot collection stays small, read ones expire
+    await db.notifications.create_index("id", unique=True)
+    await db.notifications.create_index([("user_id", 1), ("is_read", 1), ("created_at", -1)])
+    await db.notifications.create_index([("user_id", 1), ("created_at", -1)])
+    await ensure_ttl_index(db.notifications, "read_at", NOTIFICATION_READ_TTL_DAYS * 86400)
+    await db.notifications_archive.create_index([("user_id", 1), ("created_at", -1)])
+    await ensure_ttl_index(db.notifications_archive, "capped_at", NOTIFICATION_ARCHIVE_TTL_DAYS * 86400)
+    # Replaced by capped_at_ttl: it also expired the notifications of archived projects
+    if "archived_at_ttl" in await db.notifications_archive.index_information():
+        await db.notifications_archive.drop_index("archived_at_ttl")
+    await db.email_digest_buffer.create_index([("user_id", 1), ("created_at", 1)])
+
+    # Users
+    await db.users.create_index("id", unique=True)
+    await db.users.create_index("email", unique=True)
+    await db.users.create_index("verification_token", sparse=True)
+    await db.users.create_index("reset_token", sparse=True)
+    await db.users.create_index([("search_keys", 1), ("role", 1)])
+
+    # Projects and their dependents, hot and archived
+    await db.projects.create_index("id", unique=True)
+    await db.projects.create_index([("status", 1), ("updated_at", 1)])
+    await db.projects.create_index([("status", 1), ("approved_at", 1)])
+    await db.project_history.create_index([("project_id", 1), ("created_at", -1)])
+    await db.comments.create_index([("project_id", 1), ("created_at", 1)])
+
+    # GET /projects listings in their default created_at order, per role
+    await db.projects.create_index([("created_at", -1)])
+    await db.projects.create_index([("user_id", 1), ("created_at", -1)])
+    await db.projects.create_index([("status", 1), ("created_at", -1)])
+    await db.projects.create_index([("assigned_official_id", 1), ("created_at", -1)])
+
+    # Spatial filters: near/within, optionally narrowed by status and category
+    await db.projects.create_index([("geo", "2dsphere"), ("status", 1), ("category", 1)], name=GEO_INDEX)
+
+    # Delta sync watermarks
+    await db.projects.create_index([("updated_at", 1)])
+    await db.projects.create_index([("user_id", 1), ("updated_at", 1)])
+    await db.comments.create_index([("created_at", 1)])
+    await db.project_history.create_index([("created_at", 1)])
+    await db.notifications.create_index([("user_id", 1), ("updated_at", 1)])
+    await db.sync_tombstones.create_index([("user_id", 1), ("deleted_at", 1)])
+    await ensure_ttl_index(db.sync_tombstones, "deleted_at", SYNC_TOMBSTONE_TTL_DAYS * 86400)
+    await db.notifications.create_index("data.project_id", sparse=True)
+    await db.projects_archive.create_index("id", unique=True)
+    await db.project_history_archive.create_index([("project_id", 1), ("created_at", -1)])
+    await db.comments_archive.create_index([("project_id", 1), ("created_at", 1)])
+
+    # Analytics rollups
+    await db.funding_rollups.create_index([("month", 1), ("region", 1), ("category", 1)])
+
+    # Review listing sorts
+    await db.projects.create_index([("status", 1), ("anomaly_score", -1)])
+
+    # Near-duplicate detection
+    await db.project_signatures.create_index("bands")
+
+    # Idempotency keys
+    await ensure_ttl_index(db.idempotency_keys, "created_at", IDEMPOTENCY_TTL_HOURS * 3600)
+
+    # Request profiles
+    await ensure_ttl_index(db.request_profiles, "created_at", PROFILE_RETENTION_HOURS * 3600)
+    await db.request_profiles.create_index("id", unique=True)
+
+    # Slow-query log
+    await db.slow_queries.create_index([("total_ms", -1)])
+
+    # Webhooks
+    await db.webhook_subscriptions.create_index("id", unique=True)
+    await db.webhook_subscriptions.create_index([("active", 1), ("events", 1)])
+    await db.webhook_deliveries.create_index([("status", 1), ("next_attempt_at", 1)])
+    await db.webhook_deliveries.create_index([("status", 1), ("lease_until", 1)])
+    await db.webhook_deliveries.create_index([("subscription_id", 1), ("status", 1), ("created_at", -1)])
+    await ensure_ttl_index(db.webhook_deliveries, "delivered_at", WEBHOOK_DELIVERED_TTL_DAYS * 86400)
+
+    # Background jobs
+    await ensure_ttl_index(db.job_runs, "started_at", JOB_RUN_HISTORY_DAYS * 86400)
+    await db.job_runs.create_index([("job", 1), ("started_at", -1)])
+
+scheduler.register("cleanup_expired_tokens", cleanup_expired_tokens, interval=3600)
+scheduler.register("backfill_user_search_keys", backfill_user_search_keys, interval=3600)
+scheduler.register("compact_notifications", compact_notifications, interval=3600)
+scheduler.register("flush_email_digests", flush_email_digests, interval=300)
+scheduler.register("rebuild_public_snapshot", rebuild_public_snapshot, interval=3600)
+scheduler.register("rebuild_user_counters", rebuild_user_counters, cron="15 4 * * *", timeout=1800)
+scheduler.register("archive_closed_projects", archive_closed_projects, cron="30 2 * * *", timeout=3600)
+scheduler.register("rebuild_funding_rollups", rebuild_funding_rollups, cron="0 3 * * *", timeout=1800)
+scheduler.register("ensure_indexes", ensure_indexes, cron="0 4 * * *")
+scheduler.register("score_project_budgets", score_project_budgets, interval=900, timeout=600)
+scheduler.register("rebuild_project_signatures", rebuild_project_signatures, cron="0 5 * * 0", timeout=3600)
+
+@app.on_event("startup")
+async def calibrate_password_hash_cost():
+    await configure_password_hashing()
+
+@app.on_event("startup")
+async def start_query_monitor():
+    mongo_monitor.loop = asyncio.get_running_loop()
+    mongo_monitor.flush_task = asyncio.create_task(flush_slow_queries_periodically())
+    health_monitor.start()
+
+@app.on_event("startup")
+async def start_scheduler():
+    if SCHEDULER_ENABLED:
+        await scheduler.start()
+
+@app.on_event("startup")
+async def start_webhook_dispatcher():
+    if WEBHOOKS_ENABLED:
+        await webhook_dispatcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await scheduler.stop()
+    await webhook_dispatcher.stop()
+    await health_monitor.stop()
+    if mongo_monitor.flush_task:
+        mongo_monitor.flush_task.cancel()
+        await asyncio.gather(mongo_monitor.flush_task, return_exceptions=True)
+        await flush_slow_queries()
+    document_validation_pool.shutdown(wait=False, cancel_futures=True)
     client.close()
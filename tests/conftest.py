@@ -0,0 +1,83 @@
+"""Fixtures for the unit tests: the server module on an in-memory MongoDB.
+
+The server is imported once with placeholder connection settings and its
+database handles are swapped for a mongomock database per test, so nothing
+here needs a running MongoDB. Startup hooks (indexes, scheduler, webhook
+dispatcher) are not run; tests call the functions they exercise directly.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+@pytest.fixture(scope="session")
+def server():
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "der_test")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+@pytest.fixture
+def db(server, monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    database = mongomock_motor.AsyncMongoMockClient()["der_test"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "_read_dbs", {mode: database for mode in server._read_dbs})
+    return database
+
+
+@pytest.fixture
+def client(server, db):
+    from fastapi.testclient import TestClient
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def make_user(server, db):
+    """Inserts a user and returns (document, Authorization headers)"""
+    def make(role="citizen", **fields):
+        user = server.User(
+            email=f"{role}-{len(fields)}-{os.urandom(4).hex()}@example.sn",
+            first_name="Awa",
+            last_name="Ndiaye",
+            phone="+221770000000",
+            region="Dakar",
+            role=role,
+            is_verified=True,
+            **fields
+        )
+        doc = server.serialize_datetime(user.model_dump())
+        asyncio.run(db.users.insert_one(doc))
+        token = server.create_access_token({"sub": user.id})
+        return doc, {"Authorization": f"Bearer {token}"}
+    return make
+
+
+@pytest.fixture
+def make_project(server, db):
+    """Inserts a project owned by user and returns its document"""
+    def make(user, status="draft", **fields):
+        project = server.Project(**{
+            "user_id": user["id"],
+            "title": "Atelier de couture",
+            "description": "Confection de tenues scolaires",
+            "category": "Artisanat",
+            "funding_requested": 1200000,
+            "start_date": "2026-02-01",
+            "duration_months": 6,
+            "location": "Thiès",
+            "objectives": ["Former 10 apprenties"],
+            "status": status,
+            **fields
+        })
+        doc = server.serialize_datetime(project.model_dump())
+        asyncio.run(db.projects.insert_one(dict(doc)))
+        return doc
+    return make
@@ -0,0 +1,30 @@
+"""Read routing and funding analytics"""
+import asyncio
+import logging
+
+
+def test_area_figures_read_through_the_analytics_route(server, db, monkeypatch):
+    routes = []
+    read_db = server.read_db
+
+    def record(route):
+        routes.append(route)
+        return read_db(route)
+
+    monkeypatch.setattr(server, "read_db", record)
+    asyncio.run(server.query_project_funding([], {"region": "Dakar"}))
+
+    assert routes == ["admin_funding_analytics"]
+
+
+def test_overrides_skip_malformed_entries_and_unknown_modes(server, caplog):
+    with caplog.at_level(logging.WARNING, logger="server"):
+        overrides = server.parse_read_preference_overrides(
+            "admin_get_users=primary, admin_get_stats ,admin_export_projects=nearest, admin_funding_analytics = secondaryPreferred,"
+        )
+
+    assert overrides == {"admin_get_users": "primary", "admin_funding_analytics": "secondaryPreferred"}
+    warnings = [record.getMessage() for record in caplog.records]
+    assert len(warnings) == 2
+    assert "'admin_get_stats'" in warnings[0]
+    assert "'nearest'" in warnings[1]
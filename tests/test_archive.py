@@ -0,0 +1,109 @@
+"""Archival of closed projects and restore"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+
+def closed_project(server, db, make_user, make_project):
+    owner, _ = make_user()
+    long_ago = datetime.now(timezone.utc) - timedelta(days=800)
+    project = make_project(owner, "rejected", updated_at=long_ago, created_at=long_ago)
+    author = {"project_id": project["id"], "user_id": owner["id"], "user_name": "Awa Ndiaye", "created_at": long_ago}
+    asyncio.run(db.project_history.insert_one(server.serialize_datetime(
+        server.ProjectHistory(id="h1", action="Projet rejeté", new_status="rejected", **author).model_dump()
+    )))
+    asyncio.run(db.comments.insert_one(server.serialize_datetime(
+        server.Comment(id="c1", user_role="citizen", content="Merci", **author).model_dump()
+    )))
+    asyncio.run(db.notifications.insert_one(server.notification_doc(server.Notification(
+        id="n1", user_id=owner["id"], type="project_rejected", title="Projet rejeté", message="",
+        data={"project_id": project["id"]}, created_at=long_ago
+    ))))
+    return owner, project
+
+
+def test_archive_moves_project_and_dependents(server, db, make_user, make_project):
+    owner, project = closed_project(server, db, make_user, make_project)
+
+    stats = asyncio.run(server.archive_closed_projects())
+
+    assert stats == {"projects": 1, "history": 1, "comments": 1, "notifications": 1}
+    assert asyncio.run(db.projects.count_documents({})) == 0
+    assert asyncio.run(db.projects_archive.count_documents({"id": project["id"]})) == 1
+    assert asyncio.run(db.notifications_archive.count_documents({"data.project_id": project["id"]})) == 1
+    assert asyncio.run(db.sync_tombstones.count_documents({"kind": "project", "project_id": project["id"]})) == 1
+    assert asyncio.run(server.find_project(project["id"]))["archived"]
+
+
+def test_restore_brings_everything_back(server, db, make_user, make_project):
+    owner, project = closed_project(server, db, make_user, make_project)
+    asyncio.run(server.archive_closed_projects())
+
+    assert asyncio.run(server.restore_archived_project(project["id"]))
+
+    restored = asyncio.run(db.projects.find_one({"id": project["id"]}))
+    assert restored["restored_at"] == restored["updated_at"]
+    for collection in ("project_history", "comments", "notifications"):
+        assert asyncio.run(db[collection].count_documents({})) == 1, collection
+        assert asyncio.run(db[f"{collection}_archive"].count_documents({})) == 0, collection
+    notification = asyncio.run(db.notifications.find_one({"id": "n1"}))
+    assert "archived_at" not in notification
+    assert notification["updated_at"] == restored["updated_at"]
+    assert asyncio.run(db.sync_tombstones.count_documents({})) == 0
+
+
+def test_restored_project_reaches_clients_that_synced_before_archival(server, client, db, make_user, make_project):
+    owner, project = closed_project(server, db, make_user, make_project)
+    headers = {"Authorization": f"Bearer {server.create_access_token({'sub': owner['id']})}"}
+    token = client.get("/api/sync", headers=headers).json()["token"]
+    asyncio.run(server.archive_closed_projects())
+    asyncio.run(server.restore_archived_project(project["id"]))
+
+    changes = client.get("/api/sync", params={"since": token}, headers=headers).json()
+
+    assert [p["id"] for p in changes["projects"]] == [project["id"]]
+    assert [n["id"] for n in changes["notifications"]] == ["n1"]
+    assert [t for t in changes["deleted"] if t["kind"] == "project"] == []
+
+
+def test_restored_project_is_not_archived_again_right_away(server, db, make_user, make_project):
+    _, project = closed_project(server, db, make_user, make_project)
+    asyncio.run(server.archive_closed_projects())
+    asyncio.run(server.restore_archived_project(project["id"]))
+
+    assert asyncio.run(server.archive_closed_projects())["projects"] == 0
+
+
+def test_archived_projects_are_flagged_in_responses(server, client, db, make_user, make_project):
+    owner, project = closed_project(server, db, make_user, make_project)
+    headers = {"Authorization": f"Bearer {server.create_access_token({'sub': owner['id']})}"}
+    hot = make_project(owner)
+    asyncio.run(server.archive_closed_projects())
+
+    assert client.get(f"/api/projects/{project['id']}", headers=headers).json()["archived"] is True
+    assert client.get(f"/api/projects/{project['id']}/full", headers=headers).json()["project"]["archived"] is True
+    assert client.get(f"/api/projects/{hot['id']}", headers=headers).json()["archived"] is False
+    batch = client.get("/api/projects", params={"ids": f"{project['id']},{hot['id']}"}, headers=headers).json()
+    assert [p["archived"] for p in batch] == [True, False]
+
+
+def test_only_capped_notifications_expire_from_the_archive(server, db, make_user, make_project, monkeypatch):
+    owner, project = closed_project(server, db, make_user, make_project)
+    asyncio.run(server.archive_closed_projects())
+    monkeypatch.setattr(server, "NOTIFICATION_MAX_PER_USER", 1)
+    for i in range(2):
+        asyncio.run(db.notifications.insert_one(server.notification_doc(server.Notification(
+            id=f"capped-{i}", user_id=owner["id"], type="new_comment", title="Commentaire", message=""
+        ))))
+    asyncio.run(server.enforce_notification_cap(owner["id"]))
+    # A deployment still carrying the TTL that expired every archived notification
+    asyncio.run(db.notifications_archive.create_index("archived_at", name="archived_at_ttl", expireAfterSeconds=60))
+
+    asyncio.run(server.ensure_indexes())
+
+    indexes = asyncio.run(db.notifications_archive.index_information())
+    assert "archived_at_ttl" not in indexes
+    assert indexes["capped_at_ttl"]["key"] == [("capped_at", 1)]
+    archived = {n["id"]: n for n in asyncio.run(db.notifications_archive.find({}).to_list(None))}
+    assert "capped_at" not in archived["n1"]
+    capped = [n for id, n in archived.items() if id.startswith("capped")]
+    assert capped and all("capped_at" in n for n in capped)
@@ -0,0 +1,81 @@
+"""Budget consistency and outlier scoring"""
+import asyncio
+
+import pandas as pd
+
+
+def portfolio(**outlier):
+    rows = [
+        {"id": f"p{i}", "category": "Agriculture", "funding_requested": 1000000 + i * 50000,
+         "duration_months": 10, "budget_total": 1000000 + i * 50000, "budget_lines": 2}
+        for i in range(6)
+    ]
+    rows.append({"id": "outlier", "category": "Agriculture", "funding_requested": 1000000,
+                 "duration_months": 10, "budget_total": 1000000, "budget_lines": 2, **outlier})
+    return pd.DataFrame(rows)
+
+
+def test_consistent_budgets_score_low(server):
+    scores = server.score_budgets(portfolio()).set_index("id")
+
+    assert (scores["budget_mismatch_ratio"] == 0).all()
+    assert scores["anomaly_score"].max() < 15
+
+
+def test_inconsistent_breakdown_and_outlier_funding_score_high(server):
+    mismatched = server.score_budgets(portfolio(budget_total=400000)).set_index("id").loc["outlier"]
+    expensive = server.score_budgets(portfolio(funding_requested=30000000, budget_total=30000000)).set_index("id")
+
+    assert mismatched["budget_mismatch_ratio"] == 0.6
+    assert mismatched["anomaly_score"] >= 30
+    assert expensive["funding_zscore"]["outlier"] > 3
+    assert expensive["anomaly_score"].idxmax() == "outlier"
+
+
+def test_missing_breakdown_is_scored_without_a_mismatch_ratio(server):
+    scores = server.score_budgets(portfolio(budget_total=0, budget_lines=0)).set_index("id").loc["outlier"]
+
+    assert pd.isna(scores["budget_mismatch_ratio"])
+    assert scores["anomaly_score"] >= 10
+
+
+def test_analyses_are_stored_and_rewritten_when_stale(server, db, make_user, make_project):
+    owner, _ = make_user()
+    for i in range(4):
+        make_project(owner, "pending", funding_requested=1000000 + i * 100000,
+                     budget_breakdown={"Matériel": 1000000 + i * 100000})
+
+    first = asyncio.run(server.score_project_budgets())
+    again = asyncio.run(server.score_project_budgets())
+
+    assert (first["scored"], first["updated"]) == (4, 4)
+    assert again["updated"] == 0
+    project = asyncio.run(db.projects.find_one({}))
+    assert project["anomaly_score"] is not None
+    assert {"budget_total", "funding_zscore", "scored_at"} <= set(project["budget_analysis"])
+    # Same score, outdated details
+    asyncio.run(db.projects.update_one({"id": project["id"]}, {"$set": {"budget_analysis.budget_total": 1.0}}))
+    assert asyncio.run(server.score_project_budgets())["updated"] == 1
+    assert asyncio.run(db.projects.find_one({"id": project["id"]}))["budget_analysis"]["budget_total"] == project["budget_analysis"]["budget_total"]
+
+
+def test_budget_edit_clears_the_score(server, client, db, make_user, make_project):
+    owner, headers = make_user()
+    project = make_project(owner, "documents_requested", budget_breakdown={"Matériel": 1200000},
+                           anomaly_score=12.5, budget_analysis={"budget_total": 1200000.0})
+
+    response = client.put(f"/api/projects/{project['id']}", json={"funding_requested": 5000000}, headers=headers)
+
+    assert response.status_code == 200
+    stored = asyncio.run(db.projects.find_one({"id": project["id"]}))
+    assert stored["anomaly_score"] is None
+    assert stored["budget_analysis"] is None
+
+
+def test_other_edits_keep_the_score(server, client, db, make_user, make_project):
+    owner, headers = make_user()
+    project = make_project(owner, "documents_requested", budget_breakdown={"Matériel": 1200000}, anomaly_score=12.5)
+
+    client.put(f"/api/projects/{project['id']}", json={"title": "Atelier de couture et broderie"}, headers=headers)
+
+    assert asyncio.run(db.projects.find_one({"id": project["id"]}))["anomaly_score"] == 12.5
@@ -0,0 +1,120 @@
+"""Bulk project transitions and bulk user updates"""
+import asyncio
+
+
+def bulk_transition(client, headers, **body):
+    return client.post("/api/admin/projects/bulk-transition", json=body, headers=headers)
+
+
+def test_transition_reports_each_project(server, client, db, make_user, make_project):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    pending = [make_project(owner, "pending") for _ in range(2)]
+    draft = make_project(owner, "draft")
+    ids = [pending[0]["id"], draft["id"], "inconnu", pending[1]["id"], pending[0]["id"]]
+
+    response = bulk_transition(client, admin, action="reject", project_ids=ids, reason="Budget incomplet")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+    assert [(r["id"], r["success"], r["error"]) for r in body["results"]] == [
+        (pending[0]["id"], True, None),
+        (draft["id"], False, "Ce projet ne peut pas être rejeté"),
+        ("inconnu", False, "Projet non trouvé"),
+        (pending[1]["id"], True, None)
+    ]
+    statuses = {p["id"]: p for p in asyncio.run(db.projects.find({}, {"_id": 0}).to_list(None))}
+    assert statuses[draft["id"]]["status"] == "draft"
+    for project in pending:
+        stored = statuses[project["id"]]
+        assert stored["status"] == "rejected"
+        assert stored["rejection_reason"] == "Budget incomplet"
+        assert stored["rejected_at"] == stored["updated_at"]
+
+
+def test_transition_writes_history_and_notifications(server, client, db, make_user, make_project):
+    owner, _ = make_user()
+    admin_user, admin = make_user("admin")
+    project = make_project(owner, "pending")
+
+    bulk_transition(client, admin, action="request_documents", project_ids=[project["id"]], reason="Devis manquants")
+
+    stored = asyncio.run(db.projects.find_one({"id": project["id"]}))
+    assert stored["status"] == "documents_requested"
+    assert stored["assigned_official_id"] == admin_user["id"]
+    [history] = asyncio.run(db.project_history.find({"project_id": project["id"]}).to_list(None))
+    assert history["action"] == "Documents supplémentaires demandés: Devis manquants"
+    assert (history["old_status"], history["new_status"]) == ("pending", "documents_requested")
+    [notification] = asyncio.run(db.notifications.find({"user_id": owner["id"]}).to_list(None))
+    assert notification["type"] == "documents_requested"
+    assert notification["data"] == {"project_id": project["id"], "reason": "Devis manquants"}
+    assert "Atelier de couture" in notification["message"]
+
+
+def test_reason_is_required_for_rejections(client, db, make_user, make_project):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    project = make_project(owner, "pending")
+
+    response = bulk_transition(client, admin, action="reject", project_ids=[project["id"]])
+
+    assert response.status_code == 400
+    assert asyncio.run(db.projects.find_one({"id": project["id"]}))["status"] == "pending"
+
+
+def test_bulk_endpoints_are_admin_only(client, db, make_user, make_project):
+    owner, _ = make_user()
+    _, official = make_user("official")
+    project = make_project(owner, "pending")
+
+    assert bulk_transition(client, official, action="validate", project_ids=[project["id"]]).status_code == 403
+    response = client.post("/api/admin/users/bulk-update", json={"updates": [{"user_id": owner["id"], "role": "admin"}]}, headers=official)
+    assert response.status_code == 403
+
+
+def test_user_update_applies_only_the_given_fields(client, db, make_user):
+    _, admin = make_user("admin")
+    first, _ = make_user()
+    second, _ = make_user()
+
+    response = client.post("/api/admin/users/bulk-update", json={"updates": [
+        {"user_id": first["id"], "role": "official"},
+        {"user_id": second["id"], "is_active": False},
+        {"user_id": "inconnu", "is_active": False}
+    ]}, headers=admin)
+
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert body["results"][2] == {"id": "inconnu", "success": False, "error": "Utilisateur non trouvé"}
+    users = {u["id"]: u for u in asyncio.run(db.users.find({}, {"_id": 0}).to_list(None))}
+    assert (users[first["id"]]["role"], users[first["id"]]["is_active"]) == ("official", True)
+    assert (users[second["id"]]["role"], users[second["id"]]["is_active"]) == ("citizen", False)
+
+
+def test_project_changed_meanwhile_is_reported_failed(server, client, db, make_user, make_project, monkeypatch):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    kept, changed = make_project(owner, "validated"), make_project(owner, "validated")
+
+    class Projects:
+        """db.projects, with the owner withdrawing a project just before the bulk write"""
+        def __getattr__(self, name):
+            return getattr(db.projects, name)
+
+        async def bulk_write(self, operations, **kwargs):
+            await db.projects.update_one({"id": changed["id"]}, {"$set": {"status": "draft"}})
+            return await db.projects.bulk_write(operations, **kwargs)
+
+    class Database:
+        projects = Projects()
+
+        def __getattr__(self, name):
+            return getattr(db, name)
+
+    monkeypatch.setattr(server, "db", Database())
+    body = bulk_transition(client, admin, action="approve", project_ids=[kept["id"], changed["id"]]).json()
+
+    assert [(r["id"], r["success"]) for r in body["results"]] == [(kept["id"], True), (changed["id"], False)]
+    assert asyncio.run(db.projects.find_one({"id": changed["id"]}))["status"] == "draft"
+    assert asyncio.run(db.project_history.count_documents({})) == 1
@@ -0,0 +1,46 @@
+"""Cron expressions of scheduled jobs"""
+from datetime import datetime, timezone
+
+import pytest
+
+
+def at(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("field, low, high, expected", [
+    ("*", 0, 6, set(range(7))),
+    ("*/15", 0, 59, {0, 15, 30, 45}),
+    ("5/20", 0, 59, {5, 25, 45}),
+    ("1-5", 0, 6, {1, 2, 3, 4, 5}),
+    ("10-20/5", 0, 59, {10, 15, 20}),
+    ("1,15,31", 1, 31, {1, 15, 31}),
+])
+def test_fields(server, field, low, high, expected):
+    assert server.CronSchedule._parse_field(field, low, high) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "*/0 * * * *", "a * * * *"])
+def test_invalid_expressions(server, expression):
+    with pytest.raises(ValueError):
+        server.CronSchedule(expression)
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("30 2 * * *", at(2026, 3, 10, 2, 30), at(2026, 3, 11, 2, 30)),
+    ("30 2 * * *", at(2026, 3, 10, 1, 59, 59), at(2026, 3, 10, 2, 30)),
+    ("*/15 * * * *", at(2026, 3, 10, 23, 50), at(2026, 3, 11, 0, 0)),
+    ("0 5 * * 0", at(2026, 3, 10, 12, 0), at(2026, 3, 15, 5, 0)),
+    ("0 0 1 * *", at(2026, 12, 15, 0, 0), at(2027, 1, 1, 0, 0)),
+    ("0 0 29 2 *", at(2026, 3, 1, 0, 0), at(2028, 2, 29, 0, 0)),
+    # Day of month and weekday both restricted: either one matches
+    ("0 9 13 * 5", at(2026, 3, 10, 12, 0), at(2026, 3, 13, 9, 0)),
+    ("0 9 20 * 1", at(2026, 3, 10, 12, 0), at(2026, 3, 16, 9, 0)),
+])
+def test_next_run(server, expression, after, expected):
+    assert server.CronSchedule(expression).next_after(after) == expected
+
+
+def test_expression_that_never_fires(server):
+    with pytest.raises(ValueError):
+        server.CronSchedule("0 0 30 2 *").next_after(at(2026, 1, 1))
@@ -0,0 +1,83 @@
+"""MinHash signatures, LSH bands and duplicate lookups"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+DESCRIPTION = (
+    "Construction d'un forage et d'un château d'eau pour alimenter les maraîchers du village "
+    "de Ndiassane pendant la saison sèche avec un système d'irrigation goutte à goutte"
+)
+
+
+def words(count, offset=0):
+    return {f"mot{i}" for i in range(offset, offset + count)}
+
+
+def test_signature_estimates_jaccard_similarity(server):
+    a, b = words(200), words(200, offset=100)  # Jaccard 100 / 300
+    estimate = (server.minhash_signature(a) == server.minhash_signature(b)).mean()
+
+    assert abs(estimate - 1 / 3) < 0.12
+    assert (server.minhash_signature(a) == server.minhash_signature(set(a))).all()
+    assert server.minhash_signature(set()) is None
+
+
+def test_shingles_ignore_case_and_accents(server):
+    assert server.project_shingles({"title": "Château d'eau"}) == server.project_shingles({"title": "CHATEAU D EAU"})
+
+
+def test_bands_agree_only_where_rows_agree(server):
+    signature = server.minhash_signature(words(50))
+    changed = signature.copy()
+    changed[0] += 1
+
+    bands, changed_bands = server.lsh_bands(signature), server.lsh_bands(changed)
+
+    assert len(bands) == server.MINHASH_BANDS
+    assert bands[0] != changed_bands[0]
+    assert bands[1:] == changed_bands[1:]
+
+
+def test_near_duplicate_is_found_and_unrelated_is_not(server, db, make_user, make_project):
+    owner, _ = make_user()
+    original = make_project(owner, description=DESCRIPTION)
+    unrelated = make_project(owner, title="Boutique", description="Vente de tissus wax au marché Sandaga de Dakar")
+    for project in (original, unrelated):
+        asyncio.run(server.index_project_signature(project))
+    copy = {"id": "copie", "title": original["title"], "description": DESCRIPTION + " et des femmes"}
+
+    found = asyncio.run(server.find_duplicate_projects(copy))
+
+    assert [d.project_id for d in found] == [original["id"]]
+    assert found[0].score >= server.DUPLICATE_THRESHOLD
+
+
+def test_candidate_cap_keeps_the_most_similar(server, db, make_user, make_project, monkeypatch):
+    owner, _ = make_user()
+    original = make_project(owner, description=DESCRIPTION)
+    # Many weak candidates sharing a single band with the lookup, indexed first
+    doc = server.project_signature_doc({"id": "copie", "title": original["title"], "description": DESCRIPTION})
+    asyncio.run(db.project_signatures.insert_many([
+        {"_id": f"faible-{i}", "signature": (np.array(doc["signature"]) + 1).tolist(), "bands": doc["bands"][:1]}
+        for i in range(10)
+    ]))
+    asyncio.run(server.index_project_signature(original))
+    monkeypatch.setattr(server, "DUPLICATE_MAX_CANDIDATES", 3)
+
+    found = asyncio.run(server.find_duplicate_projects({"id": "copie", "title": original["title"], "description": DESCRIPTION}))
+
+    assert [d.project_id for d in found] == [original["id"]]
+
+
+def test_archived_project_leaves_the_index(server, db, make_user, make_project):
+    owner, _ = make_user()
+    long_ago = (datetime.now(timezone.utc) - timedelta(days=800)).isoformat()
+    project = make_project(owner, "rejected", description=DESCRIPTION, updated_at=long_ago)
+    asyncio.run(server.index_project_signature(project))
+
+    asyncio.run(server.archive_closed_projects())
+    assert asyncio.run(db.project_signatures.count_documents({})) == 0
+
+    asyncio.run(server.restore_archived_project(project["id"]))
+    assert asyncio.run(db.project_signatures.count_documents({"_id": project["id"]})) == 1
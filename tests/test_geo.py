@@ -0,0 +1,234 @@
+"""Gazetteer geocoding and spatial project filters.
+
+mongomock has no geo operators, so the 2dsphere queries are checked through
+the filters the endpoints build rather than by running them.
+"""
+import asyncio
+import math
+
+import pytest
+from fastapi import HTTPException
+
+GAZETTEER = (
+    "name,region,latitude,longitude,aliases\n"
+    "Kaolack,Kaolack,14.1520,-16.0726,\n"
+    "Nioro du Rip,Kaolack,13.7500,-15.8000,Nioro\n"
+    "Saint-Louis,Saint-Louis,16.0179,-16.4896,St-Louis|Ndar\n"
+    "Thiès,Thiès,14.7910,-16.9359,\n"
+)
+
+
+@pytest.fixture
+def gazetteer(server, tmp_path, monkeypatch):
+    path = tmp_path / "localities.csv"
+    path.write_text(GAZETTEER, encoding="utf-8")
+    loaded = server.Gazetteer(path)
+    monkeypatch.setattr(server, "gazetteer", loaded)
+    return loaded
+
+
+def test_place_key_ignores_case_accents_and_punctuation(server):
+    assert server.place_key("  THIÈS, Sénégal ") == "thies senegal"
+    assert server.place_key("Saint-Louis") == server.place_key("saint louis")
+
+
+def test_lookup_matches_names_aliases_and_localities_in_text(gazetteer):
+    assert gazetteer.lookup("Thies")["name"] == "Thiès"
+    assert gazetteer.lookup("ndar")["name"] == "Saint-Louis"
+    assert gazetteer.lookup("Quartier Médina, Kaolack")["name"] == "Kaolack"
+    # The longest name wins over the alias it contains
+    assert gazetteer.lookup("Marché central de Nioro du Rip")["name"] == "Nioro du Rip"
+    assert gazetteer.lookup("Tambacounda") is None
+    assert gazetteer.lookup("") is None
+
+
+def test_missing_gazetteer_disables_geocoding(server, tmp_path):
+    assert server.Gazetteer(tmp_path / "absent.csv").lookup("Kaolack") is None
+
+
+def test_geocode_returns_longitude_first(server, gazetteer):
+    assert server.geocode("Thiès").coordinates == (-16.9359, 14.7910)
+    assert server.geocode(None) is None
+
+
+def test_near_takes_coordinates_or_a_locality(server, gazetteer):
+    assert server.parse_near("14.69, -17.44").coordinates == (-17.44, 14.69)
+    assert server.parse_near("Kaolack").coordinates == (-16.0726, 14.1520)
+    for near in ["91,0", "0,181", "Atlantide"]:
+        with pytest.raises(HTTPException) as rejected:
+            server.parse_near(near)
+        assert rejected.value.status_code == 400
+
+
+def test_near_filters_on_a_sphere_around_the_point(server, gazetteer):
+    condition = server.spatial_filter("Thiès", 20, None)["geo"]["$geoWithin"]["$centerSphere"]
+
+    assert condition[0] == [-16.9359, 14.7910]
+    assert math.isclose(condition[1], 20 / server.EARTH_RADIUS_KM)
+
+
+def test_within_filters_on_a_closed_box(server):
+    polygon = server.spatial_filter(None, 10, "-17.5,14.5,-16.5,15")["geo"]["$geoWithin"]["$geometry"]
+
+    assert polygon["type"] == "Polygon"
+    [ring] = polygon["coordinates"]
+    assert ring[0] == ring[-1] == [-17.5, 14.5]
+    assert [-16.5, 15.0] in ring
+    assert server.spatial_filter(None, 10, None) == {}
+
+
+@pytest.mark.parametrize("near, within", [
+    ("Thiès", "-17.5,14.5,-16.5,15"),
+    (None, "-17.5,14.5"),
+    (None, "-16.5,14.5,-17.5,15"),
+    (None, "a,b,c,d")
+])
+def test_invalid_areas_are_rejected(server, gazetteer, near, within):
+    with pytest.raises(HTTPException) as rejected:
+        server.spatial_filter(near, 10, within)
+    assert rejected.value.status_code == 400
+
+
+def test_geo_hint_spares_citizen_queries(server):
+    area = server.spatial_filter(None, 10, "-17.5,14.5,-16.5,15")
+
+    assert server.geo_hint({**area, "status": "pending"}) == {"hint": server.GEO_INDEX}
+    assert server.geo_hint({**area, "user_id": "u1"}) == {}
+    assert server.geo_hint({"status": "pending"}) == {}
+
+
+def test_batch_lookup_is_restricted_to_the_area(server, client, db, make_user, monkeypatch, gazetteer):
+    _, admin = make_user("admin")
+    queries = []
+
+    async def find_projects(project_ids, query=None):
+        queries.append(query)
+        return []
+
+    monkeypatch.setattr(server, "find_projects", find_projects)
+    response = client.get("/api/projects", params={"ids": "p1,p2", "near": "Kaolack", "radius_km": 15}, headers=admin)
+
+    assert response.status_code == 200
+    [query] = queries
+    assert query["geo"]["$geoWithin"]["$centerSphere"][0] == [-16.0726, 14.1520]
+
+
+def test_geocode_projects_locates_legacy_projects(server, db, gazetteer):
+    asyncio.run(db.projects.insert_many([
+        {"id": "p1", "location": "Quartier Médina, Kaolack"},
+        {"id": "p2", "location": "Tambacounda"},
+        {"id": "p3", "location": "Thiès", "geo": {"type": "Point", "coordinates": [0, 0]}},
+        {"id": "p4", "location": ""}
+    ]))
+
+    assert asyncio.run(server.geocode_projects()) == {"located": 1, "unmatched": 1}
+
+    located = {p["id"]: p.get("geo", "absent") for p in asyncio.run(db.projects.find({}).to_list(None))}
+    assert located["p1"]["coordinates"] == [-16.0726, 14.1520]
+    assert located["p2"] is None
+    assert located["p3"]["coordinates"] == [0, 0]
+    assert located["p4"] == "absent"
+
+
+def test_retry_only_writes_newly_matched_projects(server, db, gazetteer):
+    asyncio.run(db.projects.insert_many([
+        {"id": "p1", "location": "St-Louis", "geo": None, "updated_at": "2026-01-01"},
+        {"id": "p2", "location": "Tambacounda", "geo": None, "updated_at": "2026-01-01"}
+    ]))
+
+    assert asyncio.run(server.geocode_projects(retry_unmatched=True)) == {"located": 1, "unmatched": 1}
+
+    assert asyncio.run(db.projects.find_one({"id": "p1"}))["geo"]["coordinates"] == [-16.4896, 16.0179]
+    assert asyncio.run(db.projects.find_one({"id": "p2"}))["updated_at"] == "2026-01-01"
+
+
+PROJECT = {
+    "title": "Unité de transformation de céréales",
+    "description": "Moulin et décortiqueuse pour le mil et le maïs",
+    "category": "Agriculture",
+    "funding_requested": 3000000,
+    "start_date": "2026-05-01",
+    "duration_months": 12,
+    "budget_breakdown": {"Moulin": 3000000}
+}
+
+
+def test_new_projects_are_located_from_their_locality(client, db, make_user, gazetteer):
+    _, headers = make_user()
+
+    located = client.post("/api/projects", json={**PROJECT, "location": "Marché central, Thiès"}, headers=headers).json()
+    pinned = client.post("/api/projects", json={
+        **PROJECT, "location": "Thiès", "geo": {"type": "Point", "coordinates": [-16.95, 14.8]}
+    }, headers=headers).json()
+    unknown = client.post("/api/projects", json={**PROJECT, "location": "Tambacounda"}, headers=headers).json()
+
+    assert located["geo"] == {"type": "Point", "coordinates": [-16.9359, 14.791]}
+    # Coordinates sent by the client win over the gazetteer
+    assert pinned["geo"]["coordinates"] == [-16.95, 14.8]
+    assert unknown["geo"] is None
+
+
+def test_moving_a_project_locates_it_again(client, db, make_user, make_project, gazetteer):
+    owner, headers = make_user()
+    project = make_project(owner, location="Thiès")
+
+    updated = client.put(f"/api/projects/{project['id']}", json={"location": "Nioro"}, headers=headers).json()
+
+    assert updated["geo"]["coordinates"] == [-15.8, 13.75]
+    assert asyncio.run(db.projects.find_one({"id": project["id"]}))["geo"]["coordinates"] == [-15.8, 13.75]
+
+
+@pytest.mark.parametrize("coordinates", [[-200, 14.8], [-16.9, 95], [-16.9]])
+def test_out_of_range_coordinates_are_rejected(client, db, make_user, coordinates):
+    _, headers = make_user()
+
+    response = client.post("/api/projects", json={**PROJECT, "geo": {"type": "Point", "coordinates": coordinates}}, headers=headers)
+
+    assert response.status_code == 422
+
+
+def test_distance_sort_needs_a_point(client, db, make_user):
+    _, admin = make_user("admin")
+
+    response = client.get("/api/projects", params={"sort_by": "distance"}, headers=admin)
+
+    assert response.status_code == 400
+
+
+def test_plan_summary_walks_geo_index_scans(server):
+    # Shape of a $geoWithin find sorted by created_at, as explained by MongoDB 7
+    explain = {
+        "queryPlanner": {"winningPlan": {"queryPlan": {
+            "stage": "SORT",
+            "inputStage": {"stage": "FETCH", "inputStage": {
+                "stage": "IXSCAN", "indexName": server.GEO_INDEX, "keyPattern": {"geo": "2dsphere", "status": 1}
+            }}
+        }}},
+        "executionStats": {"nReturned": 12, "totalKeysExamined": 40, "totalDocsExamined": 30, "executionTimeMillis": 3}
+    }
+
+    plan = server.summarize_plan(explain)
+
+    assert plan["stages"] == ["SORT", "FETCH", "IXSCAN"]
+    assert plan["indexes"] == [server.GEO_INDEX]
+    assert not plan["collection_scan"]
+    assert (plan["returned"], plan["docs_examined"], plan["keys_examined"]) == (12, 30, 40)
+
+
+def test_plan_summary_reads_geo_near_aggregations(server):
+    explain = {"stages": [
+        {"$geoNearCursor": {
+            "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {
+                "stage": "GEO_NEAR_2DSPHERE", "indexName": server.GEO_INDEX
+            }}},
+            "executionStats": {"nReturned": 5, "totalDocsExamined": 5}
+        }},
+        {"$limit": 1000},
+        {"$project": {"_id": False}}
+    ]}
+
+    plan = server.summarize_plan(explain)
+
+    assert plan["stages"] == ["FETCH", "GEO_NEAR_2DSPHERE"]
+    assert plan["indexes"] == [server.GEO_INDEX]
+    assert plan["returned"] == 5
@@ -0,0 +1,127 @@
+"""Readiness checks, event loop lag and the storage probe"""
+import asyncio
+import time
+from collections import deque
+
+import httpx
+import pytest
+
+
+@pytest.fixture
+def monitor(server, monkeypatch):
+    health = server.HealthMonitor()
+    monkeypatch.setattr(server, "health_monitor", health)
+    return health
+
+
+def test_max_lag_only_covers_the_recent_window(server, monitor):
+    window = monitor.lag_samples.maxlen * server.HEALTH_LOOP_LAG_INTERVAL_SECONDS
+    assert window == server.HEALTH_LOOP_LAG_WINDOW_SECONDS
+
+    monitor.lag_samples = deque(maxlen=3)
+    for lag in [900.0, 2.0, 1.0]:
+        monitor.lag_samples.append(lag)
+    assert monitor.max_loop_lag_ms == 900.0
+
+    monitor.lag_samples.append(3.0)
+
+    assert monitor.max_loop_lag_ms == 3.0
+
+
+def test_blocked_loop_shows_up_as_lag(monitor):
+    async def block():
+        sampler = asyncio.create_task(monitor._sample_loop_lag(interval=0.01))
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        sampler.cancel()
+
+    asyncio.run(block())
+
+    assert monitor.max_loop_lag_ms >= 50
+    assert len(monitor.lag_samples) >= 2
+
+
+def test_storage_probes_share_one_client(server, monitor, monkeypatch):
+    monkeypatch.setattr(server, "SUPABASE_URL", "https://storage.example")
+    monkeypatch.setattr(server, "SUPABASE_ANON_KEY", "anon")
+    statuses = iter([200, 503])
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(next(statuses), json=[])
+
+    async def probe():
+        monitor.start()
+        monitor.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        http = monitor.http
+        results = [await monitor.check_storage(), await monitor.check_storage()]
+        await monitor.stop()
+        return results, http
+
+    (up, down), http = asyncio.run(probe())
+
+    assert up["ok"] and up["status_code"] == 200
+    assert not down["ok"] and down["status_code"] == 503
+    assert [r.url.path for r in requests] == ["/storage/v1/bucket"] * 2
+    assert requests[0].headers["apikey"] == "anon"
+    assert http.is_closed
+
+
+def test_unreachable_storage_is_reported(server, monitor, monkeypatch):
+    monkeypatch.setattr(server, "SUPABASE_URL", "https://storage.example")
+    monkeypatch.setattr(server, "SUPABASE_ANON_KEY", "anon")
+
+    def refuse(request):
+        raise httpx.ConnectError("connexion refusée")
+
+    monitor.http = httpx.AsyncClient(transport=httpx.MockTransport(refuse))
+    result = asyncio.run(monitor.check_storage())
+
+    assert result == {"ok": False, "backend": "supabase", "error": "connexion refusée"}
+
+
+@pytest.fixture
+def checks(monitor, monkeypatch):
+    results = {"mongo": {"ok": True}, "storage": {"ok": True}}
+    calls = []
+
+    async def check_mongo():
+        calls.append("mongo")
+        return results["mongo"]
+
+    async def check_storage():
+        return results["storage"]
+
+    monkeypatch.setattr(monitor, "check_mongo", check_mongo)
+    monkeypatch.setattr(monitor, "check_storage", check_storage)
+    return results, calls
+
+
+def test_readiness_follows_mongo_and_loop_lag(server, client, monitor, checks, monkeypatch):
+    results, _ = checks
+    monkeypatch.setattr(server, "HEALTH_CACHE_SECONDS", 0)
+
+    assert client.get("/api/health/ready").status_code == 200
+    results["storage"] = {"ok": False}
+    degraded = client.get("/api/health/ready")
+    assert degraded.status_code == 200 and degraded.json()["degraded"]
+
+    monitor.loop_lag_ms = server.HEALTH_MAX_LOOP_LAG_MS + 1
+    assert client.get("/api/health/ready").status_code == 503
+    monitor.loop_lag_ms = 0
+    results["mongo"] = {"ok": False, "error": "timeout"}
+    assert client.get("/api/health/ready").status_code == 503
+
+
+def test_concurrent_probes_share_a_cached_check(server, db, monitor, checks):
+    _, calls = checks
+
+    async def probes():
+        return await asyncio.gather(*(monitor.check() for _ in range(5)))
+
+    results = asyncio.run(probes())
+
+    assert calls == ["mongo"]
+    assert all(result is results[0] for result in results)
@@ -0,0 +1,123 @@
+"""Idempotency-Key replay, request binding and claim leases"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+PROJECT = {
+    "title": "Poulailler communautaire",
+    "description": "Élevage de poulets de chair pour le marché de Thiès",
+    "category": "Agriculture",
+    "funding_requested": 2500000,
+    "start_date": "2026-03-01",
+    "duration_months": 12,
+    "budget_breakdown": {"Bâtiment": 1500000, "Poussins": 1000000}
+}
+
+
+def test_retry_replays_the_first_response(client, db, make_user):
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": "create-1"}
+
+    first = client.post("/api/projects", json=PROJECT, headers=headers)
+    retry = client.post("/api/projects", json=PROJECT, headers=headers)
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+    assert asyncio.run(db.projects.count_documents({})) == 1
+
+
+def test_key_reused_with_another_body_is_rejected(client, db, make_user):
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": "create-2"}
+
+    assert client.post("/api/projects", json=PROJECT, headers=headers).status_code == 200
+    response = client.post("/api/projects", json={**PROJECT, "funding_requested": 9000000}, headers=headers)
+
+    assert response.status_code == 422
+    assert asyncio.run(db.projects.count_documents({})) == 1
+
+
+def test_client_errors_are_not_stored(client, db, make_user):
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": "create-3"}
+    invalid = {**PROJECT, "category": "Inconnue"}
+
+    assert client.post("/api/projects", json=invalid, headers=headers).status_code == 422
+    assert asyncio.run(db.idempotency_keys.count_documents({})) == 0
+    # Not replayed: the retry goes through validation again
+    assert client.post("/api/projects", json=invalid, headers=headers).status_code == 422
+
+
+def test_expired_claim_is_taken_over(server, client, db, make_user):
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": "create-4"}
+    client.post("/api/projects", json=PROJECT, headers=headers)
+    record = asyncio.run(db.idempotency_keys.find_one({}))
+    # As left behind by a worker that died while handling the request
+    asyncio.run(db.idempotency_keys.replace_one({"_id": record["_id"]}, {
+        **{k: v for k, v in record.items() if k != "response"},
+        "status": "in_progress",
+        "lease_until": datetime.now(timezone.utc) - timedelta(seconds=1)
+    }))
+    asyncio.run(db.projects.delete_many({}))
+
+    response = client.post("/api/projects", json=PROJECT, headers=headers)
+
+    assert response.status_code == 200
+    assert asyncio.run(db.projects.count_documents({})) == 1
+    assert asyncio.run(db.idempotency_keys.find_one({}))["status"] == "completed"
+
+
+def test_live_claim_is_not_taken_over(server, client, db, make_user):
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": "create-5"}
+    client.post("/api/projects", json=PROJECT, headers=headers)
+    record = asyncio.run(db.idempotency_keys.find_one({}))
+    asyncio.run(db.idempotency_keys.update_one({"_id": record["_id"]}, {
+        "$set": {"status": "in_progress", "lease_until": datetime.now(timezone.utc) + timedelta(minutes=5)},
+        "$unset": {"response": ""}
+    }))
+    server.IDEMPOTENCY_WAIT_SECONDS, wait = 0.2, server.IDEMPOTENCY_WAIT_SECONDS
+    try:
+        response = client.post("/api/projects", json=PROJECT, headers=headers)
+    finally:
+        server.IDEMPOTENCY_WAIT_SECONDS = wait
+
+    assert response.status_code == 409
+
+
+def multipart(boundary, content):
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="avatar.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def test_retried_upload_with_a_new_boundary_is_replayed(server, client, db, make_user, monkeypatch):
+    uploads = []
+
+    async def validate(file, allowed):
+        return await file.read(), {"file_type": "image/png"}
+
+    async def upload(content, filename, file_type):
+        uploads.append(content)
+        return f"https://storage.example/{len(uploads)}.png"
+
+    monkeypatch.setattr(server, "validate_upload", validate)
+    monkeypatch.setattr(server, "upload_to_supabase", upload)
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": "avatar-1"}
+
+    responses = []
+    for boundary in ("boundary-first", "boundary-retry"):
+        body, content_type = multipart(boundary, b"\x89PNG\r\n\r\npixels")
+        responses.append(client.post("/api/users/upload-avatar", content=body, headers={**headers, "Content-Type": content_type}))
+    body, content_type = multipart("boundary-other", b"\x89PNG\r\n\r\nother pixels")
+    other = client.post("/api/users/upload-avatar", content=body, headers={**headers, "Content-Type": content_type})
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[1].json() == responses[0].json()
+    assert uploads == [b"\x89PNG\r\n\r\npixels"]
+    assert other.status_code == 422
@@ -0,0 +1,113 @@
+"""Bulk CSV/NDJSON import of users and projects"""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+COLUMNS = ["user_email", "title", "description", "category", "funding_requested",
+           "start_date", "duration_months", "objectives", "budget_breakdown"]
+
+
+def project_row(owner_email, title, **fields):
+    return {
+        "user_email": owner_email,
+        "title": title,
+        "description": f"{title} pour les femmes du quartier",
+        "category": "Agriculture",
+        "funding_requested": "1500000",
+        "start_date": "2026-04-01",
+        "duration_months": "9",
+        "objectives": json.dumps(["Former 20 productrices"]),
+        "budget_breakdown": json.dumps({"Semences": 500000, "Matériel": 1000000}),
+        **fields
+    }
+
+
+def as_csv(rows):
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    # Spreadsheet exports start with a BOM
+    return "﻿".encode() + text.getvalue().encode()
+
+
+@pytest.fixture
+def batches_of_two(server, monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_BATCH_SIZE", 2)
+
+
+def import_file(client, headers, kind, filename, content):
+    return client.post(f"/api/admin/import/{kind}", files={"file": (filename, content)}, headers=headers)
+
+
+def test_csv_rows_are_imported_across_batches(server, client, db, make_user, batches_of_two):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    rows = [
+        project_row(owner["email"], "Maraîchage bio à Mbour"),
+        project_row(owner["email"], "Transformation de mangues", category="Inconnue"),
+        project_row("inconnu@example.sn", "Boulangerie solaire"),
+        project_row(owner["email"], "Élevage de pondeuses"),
+        project_row(owner["email"], "Fumage de poisson à Joal")
+    ]
+
+    response = import_file(client, admin, "projects", "projets.csv", as_csv(rows))
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["processed"], report["inserted"], report["failed"]) == (5, 3, 2)
+    errors = {error["row"]: error["error"] for error in report["errors"]}
+    assert set(errors) == {2, 3}
+    assert errors[2].startswith("category")
+    assert errors[3] == "Propriétaire du projet non trouvé"
+
+    projects = asyncio.run(db.projects.find({}, {"_id": 0}).to_list(None))
+    assert sorted(p["title"] for p in projects) == ["Fumage de poisson à Joal", "Maraîchage bio à Mbour", "Élevage de pondeuses"]
+    assert all(p["user_id"] == owner["id"] and p["status"] == "draft" for p in projects)
+    # JSON cells are parsed into the nested fields
+    assert projects[0]["objectives"] == ["Former 20 productrices"]
+    assert projects[0]["budget_breakdown"] == {"Semences": 500000, "Matériel": 1000000}
+    assert asyncio.run(db.project_history.count_documents({"action": "Projet importé"})) == 3
+
+
+def test_imported_projects_are_indexed_for_duplicate_detection(server, client, db, make_user, batches_of_two):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    description = (
+        "Aménagement de deux hectares de maraîchage biologique à Mbour avec un forage, "
+        "un bassin de rétention et un système d'irrigation goutte à goutte pour vingt productrices"
+    )
+    rows = [project_row(owner["email"], f"Maraîchage bio lot {i}", description=description) for i in range(3)]
+
+    import_file(client, admin, "projects", "projets.csv", as_csv(rows))
+
+    projects = asyncio.run(db.projects.find({}, {"_id": 0}).to_list(None))
+    signatures = asyncio.run(db.project_signatures.find({}).to_list(None))
+    assert {s["_id"] for s in signatures} == {p["id"] for p in projects}
+    duplicates = asyncio.run(server.find_duplicate_projects(projects[0]))
+    assert {d.project_id for d in duplicates} == {p["id"] for p in projects[1:]}
+
+
+def test_ndjson_users_are_deduplicated_across_batches(server, client, db, make_user, batches_of_two):
+    _, admin = make_user("admin")
+    user = {"email": "fatou@example.sn", "password": "motdepasse1", "first_name": "Fatou",
+            "last_name": "Diop", "phone": "+221771234567", "region": "Kaolack"}
+    lines = [
+        json.dumps(user),
+        "{pas du json",
+        json.dumps({**user, "email": "awa@example.sn"}),
+        json.dumps(user)
+    ]
+
+    report = import_file(client, admin, "users", "users.ndjson", "\n".join(lines).encode()).json()
+
+    assert (report["processed"], report["inserted"], report["failed"]) == (4, 2, 2)
+    assert {error["row"]: error["error"] for error in report["errors"]} == {
+        2: "JSON invalide",
+        4: "Cet email est déjà utilisé"
+    }
+    stored = asyncio.run(db.users.find_one({"email": "fatou@example.sn"}))
+    assert stored["password_hash"] != user["password"]
@@ -0,0 +1,118 @@
+"""Queued JSON logging, sampling and the diagnostics endpoint"""
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+
+def make_record(name="server", level=logging.INFO, msg="Projet %s approuvé", args=("p1",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_carry_extra_fields_and_request_context(server):
+    record = make_record(request_id="req-1", route="approve_project", project_id="p1", at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+    entry = json.loads(server.JsonFormatter().format(record))
+
+    assert entry["msg"] == "Projet p1 approuvé"
+    assert (entry["level"], entry["logger"]) == ("INFO", "server")
+    assert (entry["request_id"], entry["route"]) == ("req-1", "approve_project")
+    assert entry["project_id"] == "p1"
+    # Values JSON cannot carry are written as strings
+    assert entry["at"] == "2026-01-01 00:00:00+00:00"
+    assert "args" not in entry and "exc" not in entry
+
+
+def test_records_outside_a_request_have_no_request_fields(server):
+    record = make_record()
+    server.RequestContextFilter().filter(record)
+
+    entry = json.loads(server.JsonFormatter().format(record))
+
+    assert "request_id" not in entry and "route" not in entry
+
+
+def test_request_context_tags_records(server):
+    token = server.request_context.set({"request_id": "req-2", "scope": {"path": "/api/projects"}})
+    try:
+        record = make_record()
+        server.RequestContextFilter().filter(record)
+    finally:
+        server.request_context.reset(token)
+
+    assert (record.request_id, record.route) == ("req-2", "/api/projects")
+
+
+def test_queued_records_are_resolved_before_they_leave_the_caller(server):
+    log_queue = queue.Queue()
+    handler = server.LogQueueHandler(log_queue)
+    try:
+        raise ValueError("budget invalide")
+    except ValueError:
+        record = make_record(level=logging.ERROR)
+        record.exc_info = sys.exc_info()
+
+    handler.handle(record)
+    queued = log_queue.get_nowait()
+
+    assert (queued.msg, queued.args, queued.exc_info) == ("Projet p1 approuvé", None, None)
+    assert "ValueError: budget invalide" in queued.exc_text
+    assert json.loads(server.JsonFormatter().format(queued))["exc"] == queued.exc_text
+    # The caller's record is left untouched for other handlers
+    assert record.args == ("p1",)
+
+
+def test_full_queue_drops_instead_of_blocking(server):
+    handler = server.LogQueueHandler(queue.Queue(maxsize=2))
+
+    for _ in range(5):
+        handler.handle(make_record())
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_sampling_applies_to_a_logger_and_its_children(server):
+    sampling = server.SamplingFilter({"server.access": 0.0})
+
+    assert not sampling.filter(make_record("server.access"))
+    assert not sampling.filter(make_record("server.access.static"))
+    assert sampling.filter(make_record("server.access", level=logging.WARNING))
+    assert sampling.filter(make_record("server"))
+    assert server.SamplingFilter({}).filter(make_record("server.access"))
+
+
+@pytest.fixture
+def log_settings(server, monkeypatch):
+    monkeypatch.setattr(server.log_sampling, "rates", {"server.access": 0.5})
+    test_logger = logging.getLogger("tests.diagnostics")
+    yield test_logger
+    test_logger.setLevel(logging.NOTSET)
+
+
+def test_settings_can_be_changed_at_runtime(server, client, db, make_user, log_settings):
+    _, admin = make_user("admin")
+
+    response = client.put("/api/admin/diagnostics/logging", json={
+        "levels": {"tests.diagnostics": "debug"},
+        "sampling": {"server.access": 1, "server.jobs": 0.25}
+    }, headers=admin)
+
+    assert response.status_code == 200
+    assert response.json()["levels"]["tests.diagnostics"] == "DEBUG"
+    assert response.json()["sampling"] == {"server.jobs": 0.25}
+    assert log_settings.level == logging.DEBUG
+
+
+@pytest.mark.parametrize("body", [{"levels": {"tests.diagnostics": "bavard"}}, {"sampling": {"server.access": 2}}])
+def test_invalid_settings_change_nothing(server, client, db, make_user, log_settings, body):
+    _, admin = make_user("admin")
+
+    assert client.put("/api/admin/diagnostics/logging", json=body, headers=admin).status_code == 400
+    assert log_settings.level == logging.NOTSET
+    assert server.log_sampling.rates == {"server.access": 0.5}
@@ -0,0 +1,105 @@
+"""Notification coalescing, per-user cap and retention indexes"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_emails(server, monkeypatch):
+    async def deliver(notifications, users):
+        pass
+    monkeypatch.setattr(server, "deliver_notification_emails", deliver)
+
+
+def notify(server, user_id, project_id="p1", notif_type="project_validated"):
+    return server.Notification(user_id=user_id, type=notif_type, title="Projet validé", message="", data={"project_id": project_id})
+
+
+def test_repeated_events_coalesce_into_one_notification(server, db, make_user):
+    user, _ = make_user()
+    for _ in range(3):
+        asyncio.run(server.create_notification(user["id"], "project_validated", "Projet validé", "", {"project_id": "p1"}))
+
+    [stored] = asyncio.run(db.notifications.find({}).to_list(None))
+    assert stored["count"] == 3
+    assert stored["updated_at"] >= stored["created_at"]
+
+
+def test_coalescing_window_is_anchored_to_the_first_event(server, db, make_user):
+    user, _ = make_user()
+    first = notify(server, user["id"])
+    first.created_at = datetime.now(timezone.utc) - timedelta(minutes=server.NOTIFICATION_COALESCE_MINUTES - 1)
+    asyncio.run(db.notifications.insert_one(server.notification_doc(first)))
+
+    asyncio.run(server.create_notification(user["id"], "project_validated", "Projet validé", "", {"project_id": "p1"}))
+    stored = asyncio.run(db.notifications.find_one({"id": first.id}))
+    assert stored["count"] == 2
+    assert stored["created_at"] == first.created_at.isoformat()
+
+    # Once the first event leaves the window, a new notification starts
+    asyncio.run(db.notifications.update_one({"id": first.id}, {"$set": {
+        "created_at": (datetime.now(timezone.utc) - timedelta(minutes=server.NOTIFICATION_COALESCE_MINUTES + 1)).isoformat()
+    }}))
+    asyncio.run(server.create_notification(user["id"], "project_validated", "Projet validé", "", {"project_id": "p1"}))
+    assert asyncio.run(db.notifications.count_documents({})) == 2
+
+
+def test_bulk_notifications_coalesce_with_existing_ones(server, db, make_user):
+    user, _ = make_user()
+    other, _ = make_user()
+    asyncio.run(server.create_notifications_bulk([notify(server, user["id"])]))
+
+    stored = asyncio.run(server.create_notifications_bulk([notify(server, user["id"]), notify(server, other["id"])]))
+
+    assert [n.count for n in stored] == [2, 1]
+    assert asyncio.run(db.notifications.count_documents({"user_id": user["id"]})) == 1
+    assert asyncio.run(db.notifications.count_documents({"user_id": other["id"]})) == 1
+
+
+def test_bulk_notifications_respect_the_cap(server, db, make_user, monkeypatch):
+    monkeypatch.setattr(server, "NOTIFICATION_MAX_PER_USER", 2)
+    user, _ = make_user()
+
+    asyncio.run(server.create_notifications_bulk([notify(server, user["id"], f"p{i}") for i in range(5)]))
+
+    assert asyncio.run(db.notifications.count_documents({"user_id": user["id"]})) == 2
+    assert asyncio.run(db.notifications_archive.count_documents({"user_id": user["id"]})) == 3
+
+
+@pytest.mark.parametrize("email_mode, digest", [(None, False), ("immediate", False), ("digest", True)])
+def test_email_digest_is_opt_in(server, email_mode, digest):
+    user = {"id": "u1", "email": "awa@example.sn", "email_mode": email_mode}
+
+    assert server.uses_email_digest(user, server.NotificationType.PROJECT_VALIDATED) == digest
+    assert not server.uses_email_digest(user, server.NotificationType.PASSWORD_RESET)
+
+
+def test_ttl_index_is_created_then_retuned_in_place(server, db, monkeypatch):
+    commands = []
+
+    class Database:
+        def __getattr__(self, name):
+            return getattr(db, name)
+
+        async def command(self, command):
+            commands.append(command)
+
+    monkeypatch.setattr(server, "db", Database())
+    asyncio.run(server.ensure_ttl_index(db.notifications, "read_at", 30 * 86400))
+
+    assert asyncio.run(db.notifications.index_information())["read_at_ttl"]["expireAfterSeconds"] == 30 * 86400
+    assert commands == []
+
+    # NOTIFICATION_READ_TTL_DAYS changed: the existing index is updated rather than rebuilt
+    asyncio.run(server.ensure_ttl_index(db.notifications, "read_at", 7 * 86400))
+
+    assert commands == [{"collMod": "notifications", "index": {"name": "read_at_ttl", "expireAfterSeconds": 7 * 86400}}]
+
+
+def test_startup_indexes_expire_read_notifications(server, db):
+    asyncio.run(server.ensure_indexes())
+
+    indexes = asyncio.run(db.notifications.index_information())
+    assert indexes["read_at_ttl"]["expireAfterSeconds"] == server.NOTIFICATION_READ_TTL_DAYS * 86400
+    assert indexes["id_1"]["unique"]
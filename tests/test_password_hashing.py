@@ -0,0 +1,34 @@
+"""Shared password work factor and login with unusable hashes"""
+import asyncio
+
+
+def test_pinned_cost_is_clamped_to_the_scheme_range(server):
+    assert server.calibrate_password_hashing(2)["cost"] == 4
+    assert server.calibrate_password_hashing(5)["cost"] == 5
+
+
+def test_workers_share_the_first_calibration(server, db):
+    asyncio.run(db.app_settings.insert_one({"_id": server.PASSWORD_SETTINGS_ID, "scheme": server.password_scheme(), "cost": 5}))
+
+    report = asyncio.run(server.configure_password_hashing())
+
+    assert report["cost"] == 5
+    assert not report["calibrated"]
+    assert server.pwd_context.hash("motdepasse").startswith("$2b$05$")
+
+
+def test_first_worker_stores_its_calibration(server, db):
+    report = asyncio.run(server.configure_password_hashing())
+
+    stored = asyncio.run(db.app_settings.find_one({"_id": server.PASSWORD_SETTINGS_ID}))
+    assert report["calibrated"]
+    assert (stored["scheme"], stored["cost"]) == (report["scheme"], report["cost"])
+
+
+def test_login_without_usable_hash_is_rejected(client, db, make_user):
+    for password_hash in (None, "not-a-hash"):
+        user, _ = make_user()
+        if password_hash:
+            asyncio.run(db.users.update_one({"id": user["id"]}, {"$set": {"password_hash": password_hash}}))
+        response = client.post("/api/auth/login", json={"email": user["email"], "password": "motdepasse"})
+        assert response.status_code == 401
@@ -0,0 +1,79 @@
+"""Request profiling middleware"""
+import asyncio
+
+import pytest
+
+
+async def ok_app(scope, receive, send):
+    await asyncio.sleep(0.01)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def call(middleware, headers=()):
+    scope = {"type": "http", "method": "GET", "path": "/api/projects", "headers": list(headers)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await middleware(scope, receive, send)
+        return dict(messages[0]["headers"]).get(b"x-profile-id")
+    return run()
+
+
+@pytest.mark.parametrize("rate, profiled", [(0, 0), (1, 1)])
+def test_sampling(server, db, monkeypatch, rate, profiled):
+    monkeypatch.setattr(server, "PROFILE_SAMPLE_RATE", rate)
+
+    asyncio.run(call(server.ProfilingMiddleware(ok_app)))
+
+    assert asyncio.run(db.request_profiles.count_documents({})) == profiled
+
+
+def test_admin_header_profiles_on_demand(server, db, make_user):
+    _, admin = make_user("admin")
+    _, citizen = make_user()
+    middleware = server.ProfilingMiddleware(ok_app)
+
+    for headers in (admin, citizen):
+        asyncio.run(call(middleware, [(b"x-profile", b"1"), (b"authorization", headers["Authorization"].encode())]))
+
+    [profile] = asyncio.run(db.request_profiles.find({}).to_list(None))
+    assert profile["path"] == "/api/projects"
+    assert profile["status_code"] == 200
+
+
+def test_one_request_is_profiled_at_a_time(server, db, monkeypatch):
+    middleware = server.ProfilingMiddleware(ok_app)
+
+    async def slow_role_lookup(scope):
+        await asyncio.sleep(0.01)
+        return True
+
+    monkeypatch.setattr(middleware, "_should_profile", slow_role_lookup)
+
+    async def concurrently():
+        return await asyncio.gather(*(call(middleware) for _ in range(3)))
+
+    profile_ids = asyncio.run(concurrently())
+
+    assert sum(1 for profile_id in profile_ids if profile_id) == 1
+    assert not middleware.busy
+
+
+def test_failed_lookup_releases_the_profiler(server, db, monkeypatch):
+    middleware = server.ProfilingMiddleware(ok_app)
+
+    async def failing_lookup(scope):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(middleware, "_should_profile", failing_lookup)
+    with pytest.raises(RuntimeError):
+        asyncio.run(call(middleware))
+
+    assert not middleware.busy
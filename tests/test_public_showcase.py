@@ -0,0 +1,99 @@
+"""Cached public snapshot of approved projects"""
+import asyncio
+import gzip
+import json
+
+import pytest
+
+
+@pytest.fixture
+def showcase(server, db, monkeypatch):
+    fresh = server.PublicShowcase()
+    monkeypatch.setattr(server, "public_showcase", fresh)
+    return fresh
+
+
+def approved(make_project, owner, approved_at, **fields):
+    return make_project(owner, "approved", approved_at=approved_at, **fields)
+
+
+def test_snapshot_lists_approved_projects_newest_first(server, db, make_user, make_project, showcase):
+    owner, _ = make_user()
+    older = approved(make_project, owner, "2026-01-10T00:00:00+00:00")
+    newer = approved(make_project, owner, "2026-03-10T00:00:00+00:00", budget_breakdown={"Machines": 1200000})
+    make_project(owner, "pending")
+    archived = approved(make_project, owner, "2025-06-01T00:00:00+00:00")
+    asyncio.run(db.projects_archive.insert_one(asyncio.run(db.projects.find_one_and_delete({"id": archived["id"]}))))
+
+    stats = asyncio.run(showcase.rebuild())
+
+    body = json.loads(showcase.snapshot["body"])
+    assert stats["projects"] == body["count"] == 3
+    assert [p["id"] for p in body["projects"]] == [newer["id"], older["id"], archived["id"]]
+    # Only the public fields leave the server
+    assert set(body["projects"][0]) == set(server.PUBLIC_PROJECT_FIELDS) - {"_id"}
+    assert json.loads(gzip.decompress(showcase.snapshot["gzip"])) == body
+
+
+def test_unchanged_content_keeps_the_stored_snapshot(db, make_user, make_project, showcase):
+    owner, _ = make_user()
+    approved(make_project, owner, "2026-01-10T00:00:00+00:00")
+    first = asyncio.run(showcase.rebuild())
+    stored = asyncio.run(db.public_snapshots.find_one({}))
+
+    assert asyncio.run(showcase.rebuild()) == first
+    assert asyncio.run(db.public_snapshots.find_one({}))["generated_at"] == stored["generated_at"]
+
+    approved(make_project, owner, "2026-02-10T00:00:00+00:00")
+    assert asyncio.run(showcase.rebuild())["version"] != first["version"]
+
+
+def test_endpoint_serves_gzip_with_an_etag(client, db, make_user, make_project, showcase):
+    owner, _ = make_user()
+    project = approved(make_project, owner, "2026-01-10T00:00:00+00:00")
+
+    response = client.get("/api/public/projects", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert [p["id"] for p in response.json()["projects"]] == [project["id"]]
+    etag = response.headers["etag"]
+    assert client.get("/api/public/projects", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    plain = client.get("/api/public/projects", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json()["version"] == etag.strip('"')
+
+
+def test_workers_pick_up_a_snapshot_built_elsewhere(server, db, make_user, make_project, showcase, monkeypatch):
+    owner, _ = make_user()
+    approved(make_project, owner, "2026-01-10T00:00:00+00:00")
+    asyncio.run(showcase.current())
+    other_worker = server.PublicShowcase()
+    approved(make_project, owner, "2026-02-10T00:00:00+00:00")
+    newer = asyncio.run(other_worker.rebuild())["version"]
+
+    # Within the check interval the local copy is served as is
+    assert asyncio.run(showcase.current())["version"] != newer
+    monkeypatch.setattr(server, "PUBLIC_SNAPSHOT_CHECK_SECONDS", 0)
+    assert asyncio.run(showcase.current())["version"] == newer
+
+
+def test_approvals_during_a_rebuild_trigger_one_more_pass(db, showcase, monkeypatch):
+    passes = []
+
+    async def rebuild():
+        passes.append(len(passes))
+        await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(showcase, "rebuild", rebuild)
+
+    async def approvals():
+        showcase.request_rebuild()
+        await asyncio.sleep(0)
+        for _ in range(3):
+            showcase.request_rebuild()
+        await showcase.rebuild_task
+
+    asyncio.run(approvals())
+
+    assert passes == [0, 1]
@@ -0,0 +1,192 @@
+"""Query-plan and latency regression tests against a generated dataset.
+
+Each case calls an endpoint in-process, captures the MongoDB commands it
+issued, explains them and asserts that they are answered from an index
+without a blocking sort, then checks the endpoint's median latency against
+its budget. Needs a disposable MongoDB:
+
+    PERF_MONGO_URL=mongodb://localhost:27017 python -m pytest tests/test_query_plans.py
+
+The dataset is generated into PERF_DB_NAME (default der_perf) with
+backend/scripts/generate_dataset.py and reused while its manifest matches.
+PERF_USERS, PERF_PROJECTS and PERF_SEED set its size and seed,
+PERF_REGENERATE=1 forces a fresh load and PERF_LATENCY_FACTOR scales every
+budget for slower machines. Skipped when PERF_MONGO_URL is not set.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import httpx
+import pytest
+
+PERF_MONGO_URL = os.environ.get("PERF_MONGO_URL")
+PERF_DB_NAME = os.environ.get("PERF_DB_NAME", "der_perf")
+PERF_USERS = int(os.environ.get("PERF_USERS", "20000"))
+PERF_PROJECTS = int(os.environ.get("PERF_PROJECTS", "200000"))
+PERF_SEED = int(os.environ.get("PERF_SEED", "42"))
+PERF_LATENCY_FACTOR = float(os.environ.get("PERF_LATENCY_FACTOR", "1.0"))
+PERF_REPEAT = 5
+# Fixed so the data, and therefore the plans, do not change from day to day
+PERF_ANCHOR = "2026-01-01"
+
+# Documents a query may examine beyond what it returns before it counts as a scan
+MAX_EXAMINED_RATIO = 3
+MIN_EXAMINED_ALLOWANCE = 100
+
+pytestmark = pytest.mark.skipif(not PERF_MONGO_URL, reason="PERF_MONGO_URL not set")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Set at collection, before any test imports the server with other settings
+if PERF_MONGO_URL:
+    os.environ["MONGO_URL"] = PERF_MONGO_URL
+    os.environ["DB_NAME"] = PERF_DB_NAME
+
+
+@pytest.fixture(scope="module")
+def loop():
+    # Motor binds its client to the first loop it runs on: one loop for the whole module
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def server(loop):
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    from scripts.generate_dataset import DatasetConfig, current_manifest, generate_dataset
+
+    config = DatasetConfig(seed=PERF_SEED, users=PERF_USERS, projects=PERF_PROJECTS, anchor=PERF_ANCHOR)
+    manifest = loop.run_until_complete(current_manifest())
+    wanted = {k: v for k, v in asdict(config).items() if k != "batch_size"}
+    stored = {k: v for k, v in ((manifest or {}).get("config") or {}).items() if k != "batch_size"}
+    if os.environ.get("PERF_REGENERATE") or stored != wanted:
+        loop.run_until_complete(generate_dataset(config, drop=True))
+    else:
+        loop.run_until_complete(server.ensure_indexes())
+    loop.run_until_complete(server.rebuild_funding_rollups())
+    yield server
+    server.client.close()
+
+
+@pytest.fixture(scope="module")
+def actors(server, loop):
+    """The busiest citizen (worst case for per-user queries), an official, an admin and a project"""
+    async def pick():
+        busiest = await server.db.projects.aggregate([
+            {"$group": {"_id": "$user_id", "projects": {"$sum": 1}}},
+            {"$sort": {"projects": -1}},
+            {"$limit": 1}
+        ]).to_list(1)
+        citizen = await server.db.users.find_one({"id": busiest[0]["_id"]})
+        official = await server.db.users.find_one({"role": server.UserRole.OFFICIAL.value})
+        admin = await server.db.users.find_one({"role": server.UserRole.ADMIN.value})
+        project = await server.db.projects.find_one({"user_id": citizen["id"], "status": server.ProjectStatus.APPROVED.value})
+        return citizen, official, admin, project
+
+    citizen, official, admin, project = loop.run_until_complete(pick())
+    return {
+        "citizen": citizen,
+        "official": official,
+        "admin": admin,
+        "project_id": project["id"],
+        "project_ids": ",".join([project["id"]] * 3),
+        "search": citizen["last_name"][:3],
+    }
+
+
+@pytest.fixture
+def captured(server, monkeypatch):
+    """Find, aggregate, count and distinct commands sent while the test runs"""
+    commands = []
+    started = server.mongo_monitor.started
+
+    def record(event):
+        if event.command_name in server.EXPLAINABLE_COMMANDS:
+            commands.append((event.database_name, event.command_name, event.command))
+        started(event)
+
+    monkeypatch.setattr(server.mongo_monitor, "started", record)
+    return commands
+
+
+# name, role, path, latency budget in ms
+CASES = [
+    ("citizen_projects", "citizen", "/api/projects", 200),
+    ("official_projects", "official", "/api/projects", 400),
+    ("official_pending_projects", "official", "/api/projects?status=pending", 400),
+    ("admin_projects_by_status", "admin", "/api/projects?status=validated", 400),
+    ("project_detail", "citizen", "/api/projects/{project_id}", 30),
+    ("project_full", "citizen", "/api/projects/{project_id}/full", 50),
+    ("project_batch", "admin", "/api/projects?ids={project_ids}", 30),
+    ("project_history", "citizen", "/api/projects/{project_id}/history", 30),
+    ("project_comments", "citizen", "/api/projects/{project_id}/comments", 30),
+    ("notifications", "citizen", "/api/notifications", 50),
+    ("unread_notifications", "citizen", "/api/notifications?unread_only=true", 50),
+    ("unread_count", "citizen", "/api/notifications/unread-count", 20),
+    ("dashboard_summary", "official", "/api/users/me/summary", 20),
+    ("citizen_sync", "citizen", "/api/sync", 300),
+    ("admin_user_search", "admin", "/api/admin/users?search={search}&limit=50", 100),
+    ("user_autocomplete", "admin", "/api/admin/users/autocomplete?q={search}", 50),
+    ("funding_analytics", "admin", "/api/admin/analytics/funding?month_from=2025-01&month_to=2025-06", 50),
+    ("projects_near_locality", "admin", "/api/projects?near=Kaolack&radius_km=50&status=pending&category=Agriculture", 200),
+    ("projects_nearest_first", "official", "/api/projects?near=14.79,-16.93&radius_km=30&sort_by=distance", 400),
+    ("projects_in_box", "citizen", "/api/projects?within=-17.6,14.6,-17.2,14.9", 200),
+    ("funding_analytics_near", "admin", "/api/admin/analytics/funding?near=Touba&radius_km=40&group_by=month", 500),
+]
+
+# Sorted by created_at in memory after the geo index narrowed the candidates
+BOUNDED_SORT_CASES = {"projects_near_locality", "projects_in_box"}
+
+
+def plan_problems(plan: dict, allow_sort: bool = False) -> list:
+    problems = []
+    if plan["collection_scan"]:
+        problems.append("collection scan")
+    if "SORT" in plan["stages"] and not allow_sort:
+        problems.append("in-memory sort")
+    examined, returned = plan["docs_examined"] or 0, plan["returned"] or 0
+    if examined > max(returned * MAX_EXAMINED_RATIO, MIN_EXAMINED_ALLOWANCE):
+        problems.append(f"{examined} documents examined for {returned} returned")
+    return problems
+
+
+@pytest.mark.parametrize("name, role, path, budget_ms", CASES, ids=[case[0] for case in CASES])
+def test_endpoint_uses_indexes_within_budget(name, role, path, budget_ms, server, actors, captured, loop):
+    token = server.create_access_token({"sub": actors[role]["id"]})
+    url = path.format(**actors)
+
+    async def call():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://perf", headers={"Authorization": f"Bearer {token}"}) as client:
+            response = await client.get(url)
+            assert response.status_code == 200, response.text
+            commands = list(captured)
+
+            timings = []
+            for _ in range(PERF_REPEAT):
+                started = time.perf_counter()
+                response = await client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+        return commands, timings
+
+    commands, timings = loop.run_until_complete(call())
+    assert commands, f"{name} sent no query to MongoDB"
+
+    problems = []
+    for database, command_name, command in commands:
+        explain = loop.run_until_complete(server.explain_command(database, command_name, command))
+        plan = server.summarize_plan(explain)
+        for problem in plan_problems(plan, allow_sort=name in BOUNDED_SORT_CASES):
+            problems.append(f"{command_name} on {command[command_name]} {server.query_shape(command_name, command)}: {problem} (plan {plan['stages']})")
+    assert not problems, "\n".join(problems)
+
+    median_ms = statistics.median(timings)
+    assert median_ms <= budget_ms * PERF_LATENCY_FACTOR, f"{name} took {median_ms:.1f}ms (budget {budget_ms}ms)"
@@ -0,0 +1,67 @@
+"""Slow-query shapes recorded by the command listener and their flush"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def monitor(server, monkeypatch):
+    monitor = server.MongoCommandMonitor()
+    monkeypatch.setattr(server, "mongo_monitor", monitor)
+    return monitor
+
+
+def run_command(monitor, command_name, command, duration_ms, request_id=1):
+    event = SimpleNamespace(
+        connection_id=("mongo", 27017), request_id=request_id, database_name="der",
+        command_name=command_name, command=command, duration_micros=int(duration_ms * 1000)
+    )
+    monitor.started(event)
+    monitor.succeeded(event)
+
+
+def test_literals_are_redacted(server):
+    shape = server.query_shape("find", {
+        "find": "projects",
+        "filter": {"user_id": "u-42", "status": {"$in": ["pending", "validated"]}, "archived": None, "geo": {"$exists": True}},
+        "sort": {"created_at": -1}
+    })
+
+    assert shape == {
+        "filter": {"user_id": "?", "status": {"$in": ["?"]}, "archived": None, "geo": {"$exists": True}},
+        "sort": {"created_at": -1}
+    }
+
+
+def test_same_shape_with_other_values_is_one_entry(server, monitor):
+    slow = server.SLOW_QUERY_THRESHOLD_MS + 50
+    run_command(monitor, "find", {"find": "projects", "filter": {"user_id": "a"}}, slow, request_id=1)
+    run_command(monitor, "find", {"find": "projects", "filter": {"user_id": "b"}}, slow * 2, request_id=2)
+    run_command(monitor, "find", {"find": "projects", "filter": {"user_id": "c"}}, 1, request_id=3)
+
+    [entry] = monitor.drain_slow_queries().values()
+    assert (entry["collection"], entry["command"], entry["count"]) == ("projects", "find", 2)
+    assert entry["max_ms"] == pytest.approx(slow * 2)
+    assert "a" not in str(entry["shape"])
+    assert monitor.drain_slow_queries() == {}
+
+
+def test_flush_merges_workers_and_keeps_explained_shapes_complete(server, db, monitor):
+    slow = server.SLOW_QUERY_THRESHOLD_MS + 50
+    command = {"count": "notifications", "query": {"user_id": "a", "is_read": False}}
+    run_command(monitor, "count", command, slow)
+    [shape_key] = monitor.slow_queries
+    # What capture_explain leaves behind before the first flush
+    asyncio.run(db.slow_queries.update_one({"_id": shape_key}, {"$set": {"plan": {"stages": ["COUNT_SCAN"]}}}, upsert=True))
+
+    asyncio.run(server.flush_slow_queries())
+    run_command(monitor, "count", command, slow * 3)
+    asyncio.run(server.flush_slow_queries())
+
+    stored = asyncio.run(db.slow_queries.find_one({"_id": shape_key}))
+    assert (stored["database"], stored["collection"], stored["command"]) == ("der", "notifications", "count")
+    assert stored["count"] == 2
+    assert stored["max_ms"] == pytest.approx(slow * 3)
+    assert stored["routes"] == ["background"]
+    assert stored["plan"] == {"stages": ["COUNT_SCAN"]}
@@ -0,0 +1,96 @@
+"""Delta sync tokens, paging and tombstones"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+def token_at(server, **delta):
+    return server.encode_sync_token(datetime.now(timezone.utc) - timedelta(**delta))
+
+
+def test_token_round_trip(server):
+    at = datetime(2026, 5, 1, 12, 30, tzinfo=timezone.utc)
+    assert server.decode_sync_token(server.encode_sync_token(at)) == at
+
+
+@pytest.mark.parametrize("token", ["pas-un-jeton", "MjAyNi0wNS0wMVQxMjozMDowMA"])
+def test_invalid_or_naive_token_is_rejected(client, make_user, token):
+    _, headers = make_user()
+    assert client.get("/api/sync", params={"since": token}, headers=headers).status_code == 400
+
+
+def test_token_older_than_tombstones_needs_full_sync(server, client, make_user):
+    _, headers = make_user()
+    since = token_at(server, days=server.SYNC_TOMBSTONE_TTL_DAYS + 1)
+    assert client.get("/api/sync", params={"since": since}, headers=headers).status_code == 410
+
+
+def test_truncated_page_resumes_after_its_last_change(server, client, make_user, make_project, monkeypatch):
+    monkeypatch.setattr(server, "SYNC_PAGE_SIZE", 2)
+    owner, headers = make_user()
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    ids = [make_project(owner, updated_at=start + timedelta(minutes=i))["id"] for i in range(3)]
+
+    first = client.get("/api/sync", params={"since": server.encode_sync_token(start - timedelta(minutes=1))}, headers=headers).json()
+    second = client.get("/api/sync", params={"since": first["token"]}, headers=headers).json()
+
+    assert first["has_more"]
+    assert [p["id"] for p in first["projects"]] == ids[:2]
+    assert not second["has_more"]
+    assert [p["id"] for p in second["projects"]] == ids[2:]
+
+
+def test_capped_notifications_leave_a_tombstone(server, client, db, make_user, monkeypatch):
+    monkeypatch.setattr(server, "NOTIFICATION_MAX_PER_USER", 1)
+    owner, headers = make_user()
+    since = token_at(server, minutes=1)
+    for i in range(2):
+        asyncio.run(db.notifications.insert_one(server.notification_doc(server.Notification(
+            user_id=owner["id"], type="project_submitted", title=f"N{i}", message="",
+            created_at=datetime.now(timezone.utc) - timedelta(minutes=10 - i)
+        ))))
+
+    asyncio.run(server.enforce_notification_cap(owner["id"]))
+    deleted = client.get("/api/sync", params={"since": since}, headers=headers).json()["deleted"]
+
+    [capped] = [t for t in deleted if t["before"]]
+    assert capped["kind"] == "notifications"
+
+
+def test_sync_sends_the_read_expiry_watermark(server, client, make_user):
+    _, headers = make_user()
+
+    deleted = client.get("/api/sync", params={"since": token_at(server, minutes=1)}, headers=headers).json()["deleted"]
+
+    [watermark] = [t for t in deleted if t["read_before"]]
+    read_before = datetime.fromisoformat(watermark["read_before"])
+    expected = datetime.now(timezone.utc) - timedelta(days=server.NOTIFICATION_READ_TTL_DAYS)
+    assert abs(read_before - expected) < timedelta(minutes=1)
+
+
+def test_geocoding_bumps_updated_at(server, db, make_user, make_project):
+    owner, _ = make_user()
+    old = (datetime.now(timezone.utc) - timedelta(days=3)).isoformat()
+    project = make_project(owner, location="Kaolack", updated_at=old)
+    asyncio.run(db.projects.update_one({"id": project["id"]}, {"$unset": {"geo": ""}}))
+
+    asyncio.run(server.geocode_projects())
+
+    stored = asyncio.run(db.projects.find_one({"id": project["id"]}))
+    assert stored["geo"] is not None
+    assert stored["updated_at"] > old
+
+
+def test_budget_scoring_bumps_updated_at(server, db, make_user, make_project):
+    owner, _ = make_user()
+    old = (datetime.now(timezone.utc) - timedelta(days=3)).isoformat()
+    ids = [
+        make_project(owner, "pending", funding_requested=amount, budget_breakdown={"Matériel": amount}, updated_at=old)["id"]
+        for amount in (1000000, 1100000, 1200000, 90000000)
+    ]
+
+    assert asyncio.run(server.score_project_budgets())["updated"] == len(ids)
+
+    for stored in asyncio.run(db.projects.find({"id": {"$in": ids}}).to_list(None)):
+        assert stored["updated_at"] > old
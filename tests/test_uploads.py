@@ -0,0 +1,106 @@
+"""Upload validation off the event loop"""
+import asyncio
+import io
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from pypdf import PdfWriter
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\x0dIHDR" + struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00"
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\x03" + b"\x00" * 9
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+def pdf(pages=1, password=None):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=595, height=842)
+    if password:
+        writer.encrypt(password)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def upload(content, content_type):
+    return UploadFile(io.BytesIO(content), filename="piece", size=len(content), headers={"content-type": content_type})
+
+
+def test_validation_that_runs_too_long_is_rejected(server, monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setitem(server.EXECUTOR_POOLS, "document_validation", pool)
+    monkeypatch.setattr(server, "inspect_document", lambda *args: time.sleep(1))
+    monkeypatch.setattr(server, "DOCUMENT_VALIDATION_TIMEOUT_SECONDS", 0.05)
+    upload = UploadFile(io.BytesIO(b"%PDF-1.7"), filename="plan.pdf", headers={"content-type": "application/pdf"})
+
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(server.validate_upload(upload, server.DOCUMENT_TYPES))
+
+    assert rejected.value.status_code == 422
+    pool.shutdown(wait=False)
+
+
+def test_images_are_sniffed_and_measured(server):
+    metadata = server.inspect_document(png(800, 600), "image/png", server.IMAGE_TYPES)
+
+    assert (metadata["file_type"], metadata["width"], metadata["height"]) == ("image/png", 800, 600)
+    assert len(metadata["sha256"]) == 64
+    # Browsers sometimes declare image/jpg
+    assert server.inspect_document(jpeg(640, 480), "image/jpg", server.IMAGE_TYPES)["width"] == 640
+
+
+@pytest.mark.parametrize("content, declared, message", [
+    (b"GIF89a" + b"\x00" * 20, "image/gif", "Format non accepté"),
+    (png(800, 600), "image/jpeg", "ne correspond pas"),
+    (png(20, 600), "image/png", "trop petite"),
+    (png(10000, 10000), "image/png", "trop grande"),
+    (b"\xff\xd8\xff\xe0 tronque", "image/jpeg", "illisible"),
+])
+def test_bad_images_are_rejected(server, content, declared, message):
+    with pytest.raises(server.DocumentRejected, match=message):
+        server.inspect_document(content, declared, server.IMAGE_TYPES)
+
+
+def test_pdfs_are_opened_and_counted(server, monkeypatch):
+    assert server.inspect_document(pdf(pages=3), "application/pdf", server.DOCUMENT_TYPES)["page_count"] == 3
+
+    monkeypatch.setattr(server, "DOCUMENT_MAX_PAGES", 2)
+    for content, message in [
+        (pdf(pages=3), "trop long"),
+        (pdf(password="secret"), "protégés par mot de passe"),
+        (b"%PDF-1.7\n tout sauf un PDF", "illisible"),
+    ]:
+        with pytest.raises(server.DocumentRejected, match=message):
+            server.inspect_document(content, "application/pdf", server.DOCUMENT_TYPES)
+    # Only images are accepted where a PDF makes no sense
+    with pytest.raises(server.DocumentRejected, match="JPEG, PNG, WEBP"):
+        server.inspect_document(pdf(), "application/pdf", server.IMAGE_TYPES)
+
+
+def test_rejection_in_a_worker_process_becomes_a_400(server):
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(server.validate_upload(upload(pdf(password="secret"), "application/pdf"), server.DOCUMENT_TYPES))
+
+    assert rejected.value.status_code == 400
+    assert "mot de passe" in rejected.value.detail
+    content, metadata = asyncio.run(server.validate_upload(upload(pdf(), "application/pdf"), server.DOCUMENT_TYPES))
+    assert metadata["page_count"] == 1
+
+
+def test_oversized_upload_is_rejected_before_parsing(server, monkeypatch):
+    monkeypatch.setattr(server, "run_in_pool", lambda *args: pytest.fail("oversized upload was parsed"))
+    content = b"%PDF-" + b"0" * server.UPLOAD_MAX_BYTES
+
+    for file in [upload(content, "application/pdf"), UploadFile(io.BytesIO(content), filename="piece")]:
+        with pytest.raises(HTTPException) as rejected:
+            asyncio.run(server.validate_upload(file, server.DOCUMENT_TYPES))
+        assert rejected.value.status_code == 400
@@ -0,0 +1,58 @@
+"""Admin user search on normalised prefix keys"""
+import asyncio
+
+
+def test_keys_cover_email_names_and_both_name_orders(server):
+    keys = server.user_search_keys({"email": "Mame.Diarra@Example.SN", "first_name": "Mame Diarra", "last_name": "Bâ"})
+
+    assert keys == [
+        "mame.diarra@example.sn", "mame diarra", "ba",
+        "mame diarra ba", "ba mame diarra", "mame", "diarra"
+    ]
+
+
+def test_query_is_an_anchored_escaped_prefix(server):
+    assert server.user_search_query("  Sénè") == {"search_keys": {"$regex": "^sene"}}
+    assert server.user_search_query("a.b+c")["search_keys"]["$regex"] == r"^a\.b\+c"
+
+
+def test_registered_users_are_found_by_prefix(client, db, make_user):
+    _, admin = make_user("admin")
+    registered = client.post("/api/auth/register", json={
+        "email": "aissatou.ndiaye@example.sn", "password": "motdepasse1", "first_name": "Aïssatou",
+        "last_name": "Ndiaye", "phone": "+221770000001", "region": "Louga"
+    })
+    assert registered.status_code == 200
+
+    for q in ["aiss", "AÏSSATOU N", "ndiaye ai", "aissatou.nd"]:
+        found = client.get("/api/admin/users/autocomplete", params={"q": q}, headers=admin).json()
+        assert [u["email"] for u in found] == ["aissatou.ndiaye@example.sn"], q
+    # Prefixes only: a fragment from the middle of a name does not match
+    assert client.get("/api/admin/users/autocomplete", params={"q": "ssatou"}, headers=admin).json() == []
+
+
+def test_backfilled_users_are_searchable_with_role_and_paging(server, client, db, make_user):
+    _, admin = make_user("admin")
+    for role in ["citizen", "citizen", "official"]:
+        make_user(role)
+
+    assert asyncio.run(server.backfill_user_search_keys()) == {"updated": 4}
+    assert asyncio.run(server.backfill_user_search_keys()) == {"updated": 0}
+
+    found = client.get("/api/admin/users/autocomplete", params={"q": "awa", "role": "citizen"}, headers=admin).json()
+    assert [u["role"] for u in found] == ["citizen", "citizen"]
+    assert set(found[0]) == {"id", "email", "first_name", "last_name", "role"}
+    page = client.get("/api/admin/users", params={"search": "ndiaye", "skip": 1, "limit": 2}, headers=admin).json()
+    assert len(page) == 2
+    assert all("search_keys" not in u and "password_hash" not in u for u in page)
+
+
+def test_name_change_refreshes_the_keys(client, db, make_user):
+    _, admin = make_user("admin")
+    user, headers = make_user()
+
+    client.put("/api/users/me", json={"last_name": "Sène"}, headers=headers)
+
+    found = client.get("/api/admin/users/autocomplete", params={"q": "sene"}, headers=admin).json()
+    assert [u["id"] for u in found] == [user["id"]]
+    assert client.get("/api/admin/users/autocomplete", params={"q": "awa ndiaye"}, headers=admin).json() == []
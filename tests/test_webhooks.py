@@ -0,0 +1,139 @@
+"""Webhook signatures, retry backoff and lifecycle event payloads"""
+import asyncio
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.fixture
+def emitted(server, monkeypatch):
+    events = []
+
+    async def enqueue(event_type, items, at):
+        events.append((event_type, items))
+        return len(items)
+
+    monkeypatch.setattr(server.webhook_dispatcher, "enqueue", enqueue)
+    return events
+
+
+def test_signature_covers_timestamp_and_body(server):
+    body = b'{"type": "project.approved"}'
+    signature = server.sign_webhook("s3cret", "1767225600", body)
+
+    expected = hmac.new(b"s3cret", b"1767225600." + body, hashlib.sha256).hexdigest()
+    assert signature == f"sha256={expected}"
+    assert server.sign_webhook("s3cret", "1767225601", body) != signature
+    assert server.sign_webhook("other", "1767225600", body) != signature
+
+
+def test_backoff_doubles_with_jitter_up_to_the_cap(server):
+    base = server.WEBHOOK_BACKOFF_BASE_SECONDS
+    for attempts in range(1, 6):
+        delay = server.webhook_backoff(attempts)
+        assert 0.8 * base * 2 ** (attempts - 1) <= delay <= 1.2 * base * 2 ** (attempts - 1)
+    assert server.webhook_backoff(50) <= 1.2 * server.WEBHOOK_BACKOFF_MAX_SECONDS
+
+
+def test_failed_delivery_is_retried_then_dead_lettered(server, db):
+    sub = {"id": "sub-1", "url": "https://example.sn/hook"}
+    asyncio.run(db.webhook_subscriptions.insert_one(dict(sub)))
+    deliveries = [
+        {"_id": "retry", "subscription_id": "sub-1", "status": "leased", "attempts": 0},
+        {"_id": "last", "subscription_id": "sub-1", "status": "leased", "attempts": server.WEBHOOK_MAX_ATTEMPTS - 1}
+    ]
+    asyncio.run(db.webhook_deliveries.insert_many([dict(d) for d in deliveries]))
+    before = datetime.now(timezone.utc)
+
+    asyncio.run(server.webhook_dispatcher._record(sub, deliveries, "HTTP 503"))
+
+    retry = asyncio.run(db.webhook_deliveries.find_one({"_id": "retry"}))
+    assert retry["status"] == "pending"
+    assert retry["attempts"] == 1
+    next_attempt = retry["next_attempt_at"].replace(tzinfo=timezone.utc)
+    assert next_attempt >= before + timedelta(seconds=0.8 * server.WEBHOOK_BACKOFF_BASE_SECONDS)
+    assert asyncio.run(db.webhook_deliveries.find_one({"_id": "last"}))["status"] == "dead"
+    assert asyncio.run(db.webhook_subscriptions.find_one({"id": "sub-1"}))["consecutive_failures"] == 1
+
+
+def test_approval_payload_describes_the_approved_project(server, client, db, make_user, make_project, emitted):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    project = make_project(owner, "validated")
+
+    assert client.post(f"/api/projects/{project['id']}/approve", headers=admin).status_code == 200
+
+    [(event_type, [item])] = emitted
+    assert event_type == "project.approved"
+    assert item["project"]["status"] == "approved"
+    assert item["project"]["previous_status"] == "validated"
+    assert item["project"]["approved_at"] is not None
+
+
+def test_bulk_transition_payload_is_complete(server, client, db, make_user, make_project, emitted):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    project = make_project(owner, "validated")
+
+    response = client.post(
+        "/api/admin/projects/bulk-transition",
+        json={"action": "approve", "project_ids": [project["id"]]},
+        headers=admin
+    )
+
+    assert response.json()["succeeded"] == 1
+    [(_, [item])] = emitted
+    for field in ("description", "location", "start_date", "duration_months", "objectives", "approved_at"):
+        assert item["project"][field], field
+
+
+def test_status_edit_goes_through_the_transition_hooks(server, client, db, make_user, make_project, emitted):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    project = make_project(owner, "validated")
+
+    response = client.put(f"/api/projects/{project['id']}", json={"status": "approved"}, headers=admin)
+
+    assert response.status_code == 200
+    assert response.json()["approved_at"] is not None
+    [(event_type, [item])] = emitted
+    assert event_type == "project.approved"
+    # The project was inserted directly, so only the transition's own increments are there
+    counters = asyncio.run(db.user_counters.find_one({"_id": owner["id"]}))
+    assert counters["projects"] == {"validated": -1, "approved": 1}
+
+
+def test_concurrent_transition_runs_the_hooks_once(server, client, db, make_user, make_project, emitted, monkeypatch):
+    owner, headers = make_user()
+    project = make_project(owner, "draft")
+
+    async def submitted_meanwhile(project):
+        # Another request submits the project between our load and our update
+        await db.projects.update_one({"id": project["id"]}, {"$set": {"status": "pending"}})
+        return []
+
+    monkeypatch.setattr(server, "find_duplicate_projects", submitted_meanwhile)
+    response = client.post(f"/api/projects/{project['id']}/submit", headers=headers)
+
+    assert response.status_code == 409
+    assert emitted == []
+    assert asyncio.run(db.user_counters.count_documents({})) == 0
+
+
+def test_deliveries_are_queued_before_the_transition_returns(server, client, db, make_user, make_project):
+    owner, _ = make_user()
+    _, admin = make_user("admin")
+    project = make_project(owner, "validated")
+    asyncio.run(db.webhook_subscriptions.insert_many([
+        {"id": "sub-1", "active": True, "events": ["project.approved"]},
+        {"id": "sub-2", "active": True, "events": ["project.rejected"]}
+    ]))
+
+    assert client.post(f"/api/projects/{project['id']}/approve", headers=admin).status_code == 200
+
+    [delivery] = asyncio.run(db.webhook_deliveries.find({}).to_list(None))
+    assert delivery["subscription_id"] == "sub-1"
+    assert delivery["status"] == "pending"
+    assert delivery["payload"]["data"]["project"]["id"] == project["id"]